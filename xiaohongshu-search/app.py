@@ -12,34 +12,53 @@ import logging
 import time
 import threading
 import shutil
-from flask import Flask
+import importlib.util
+from contextlib import contextmanager
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(__file__))
 
 # 导入全局配置
 from config.config import (
-    APP_CONFIG, SEARCH_CONFIG, CRAWLER_CONFIG, 
-    DIRECTORIES, FILE_PATHS, LOGGING_CONFIG,
+    APP_CONFIG, SEARCH_CONFIG,
+    DIRECTORIES, FILE_PATHS, MOCK_DATA_CONFIG,
     create_directories, validate_config
 )
+from src.utils.logging_setup import setup_logging
 
 # 创建必要的目录
 create_directories()
 
-# 配置日志 - 使用全局配置
-logging.basicConfig(
-    level=getattr(logging, LOGGING_CONFIG['LEVEL']), 
-    format=LOGGING_CONFIG['FORMAT'],
-    handlers=[
-        logging.FileHandler(FILE_PATHS['STARTUP_LOG'], encoding=LOGGING_CONFIG['ENCODING']),
-        logging.StreamHandler()
-    ]
-)
+# 配置日志 - 使用全局配置（队列异步写入，日志文件按大小轮转）
+setup_logging(FILE_PATHS['STARTUP_LOG'])
 logger = logging.getLogger(__name__)
 
+# 启动必需的Python包（只检查是否已安装，不在检查时导入）
+REQUIRED_PACKAGES = ['selenium', 'flask', 'flask_cors', 'requests', 'bs4']
+
+# 启动各步骤耗时 [(步骤名称, 秒)]
+startup_phases = []
+
+@contextmanager
+def startup_phase(name):
+    """记录一个启动步骤的耗时"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_phases.append((name, time.perf_counter() - started))
+
+def log_startup_report():
+    """输出启动各步骤耗时报告"""
+    total = sum(seconds for _, seconds in startup_phases)
+    logger.info("启动耗时报告:")
+    for name, seconds in startup_phases:
+        share = seconds / total * 100 if total else 0
+        logger.info(f"  {name:<16} {seconds * 1000:8.1f}ms  {share:5.1f}%")
+    logger.info(f"  {'合计':<16} {total * 1000:8.1f}ms")
+
 def cleanup_cache():
-    """清理缓存目录中的过期文件，保留cookies目录和最新的日志文件"""
+    """清理缓存目录中的过期文件，保留cookies、state、exports、captures目录和最新的日志文件"""
     logger.info("正在清理缓存过期文件...")
     
     try:
@@ -50,7 +69,7 @@ def cleanup_cache():
             return True
         
         # 保护的目录列表（不删除）
-        protected_dirs = ['cookies']
+        protected_dirs = ['cookies', 'state', 'exports', 'captures']
         
         # 统计清理的文件和目录数量
         cleaned_files = 0
@@ -91,7 +110,7 @@ def cleanup_cache():
         logger.info(f"✓ 缓存清理完成: 删除了 {cleaned_files} 个文件, {cleaned_dirs} 个目录")
         
         # 重新创建必要的目录
-        essential_dirs = ['temp', 'logs', 'results']
+        essential_dirs = ['temp', 'logs', 'results', 'details']
         for dir_name in essential_dirs:
             dir_path = os.path.join(cache_dir, dir_name)
             os.makedirs(dir_path, exist_ok=True)
@@ -150,19 +169,14 @@ def check_dependencies():
     """检查和安装所有依赖"""
     logger.info("正在检查系统依赖...")
     
-    try:
-        # 检查基础Python包
-        import selenium
-        import flask
-        import flask_cors
-        import requests
-        import bs4
-        logger.info("✓ 基础Python包检查完成")
-    except ImportError as e:
-        logger.error(f"缺少必要的Python包: {e}")
+    # 检查基础Python包（只查找包是否存在，Selenium等在第一次抓取时才导入）
+    missing = [name for name in REQUIRED_PACKAGES if importlib.util.find_spec(name) is None]
+    if missing:
+        logger.error(f"缺少必要的Python包: {', '.join(missing)}")
         logger.info("正在安装缺失的依赖...")
         os.system("python3 -m pip install -r requirements.txt")
         return False
+    logger.info("✓ 基础Python包检查完成")
     
     # 检查Chrome和chromedriver
     try:
@@ -178,18 +192,16 @@ def check_dependencies():
     return True
 
 def initialize_webdriver():
-    """初始化WebDriver - 使用全局配置"""
+    """
+    初始化并验证WebDriver - 使用全局配置
+    
+    返回:
+        WebDriver: 验证通过的浏览器（交给爬虫继续使用，不再重复启动），失败时返回None
+    """
     logger.info("正在初始化WebDriver...")
     
     try:
-        from selenium.webdriver.chrome.service import Service
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        
-        # 配置Chrome选项 - 使用全局配置
-        chrome_options = Options()
-        for option in CRAWLER_CONFIG['CHROME_OPTIONS']:
-            chrome_options.add_argument(option)
+        from src.crawler.xiaohongshu_crawler import create_chrome_driver
         
         # 使用本地chromedriver
         local_driver_path = FILE_PATHS['CHROMEDRIVER_PATH']
@@ -197,25 +209,20 @@ def initialize_webdriver():
         if os.path.exists(local_driver_path):
             logger.info(f"找到本地chromedriver: {local_driver_path}")
             
-            # 设置文件权限
-            os.chmod(local_driver_path, 0o755)
-            
-            # 验证本地chromedriver
-            service = Service(local_driver_path)
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+            # 验证本地chromedriver（与爬虫使用相同的启动参数）
+            driver = create_chrome_driver()
             driver.get("data:text/html,<html><body><h1>WebDriver Validation</h1></body></html>")
-            driver.quit()
             
             logger.info("✓ 本地chromedriver验证成功")
-            return True
+            return driver
         else:
             logger.error("本地chromedriver不存在")
             logger.info("请确保drivers/chromedriver-mac-arm64/chromedriver文件存在")
-            return False
+            return None
                 
     except Exception as e:
         logger.error(f"WebDriver初始化失败: {e}")
-        return False
+        return None
 
 def initialize_crawler():
     """预初始化爬虫组件"""
@@ -235,12 +242,18 @@ def initialize_crawler():
         logger.error(f"爬虫组件预初始化失败: {e}")
         return False
 
-def start_flask_app():
-    """启动Flask应用"""
+def start_flask_app(driver=None):
+    """
+    启动Flask应用
+    
+    参数:
+        driver (WebDriver): 启动检查时验证过的浏览器，交给爬虫在后台预热
+    """
     logger.info("正在启动Flask应用...")
     
     try:
-        from src.server.main_server import app
+        with startup_phase('加载服务模块'):
+            from src.server.main_server import app, start_prewarm
         
         # 创建静态文件目录
         os.makedirs(os.path.join(DIRECTORIES['STATIC_DIR'], 'css'), exist_ok=True)
@@ -254,6 +267,10 @@ def start_flask_app():
         logger.info(f"如需登录，请访问: http://{APP_CONFIG['HOST']}:{APP_CONFIG['PORT']}/login")
         logger.info(f"默认搜索结果数量: {SEARCH_CONFIG['DEFAULT_MAX_RESULTS']} 篇笔记")
         logger.info("=" * 50)
+        log_startup_report()
+        
+        # 后台预热爬虫（接管验证过的浏览器、添加cookie、打开搜索页），/readyz在预热完成后返回200
+        start_prewarm(driver)
         
         # 启动Flask应用 - 使用全局配置
         app.run(debug=APP_CONFIG['DEBUG'], host=APP_CONFIG['HOST'], port=APP_CONFIG['PORT'])
@@ -269,7 +286,8 @@ def main():
     
     try:
         # 步骤0: 验证配置
-        config_errors = validate_config()
+        with startup_phase('验证配置'):
+            config_errors = validate_config()
         if config_errors:
             logger.warning("配置验证发现问题:")
             for error in config_errors:
@@ -278,21 +296,34 @@ def main():
             logger.info("✓ 配置验证通过")
         
         # 步骤1: 清理缓存过期文件
-        if not cleanup_cache():
+        with startup_phase('清理缓存'):
+            cleaned = cleanup_cache()
+        if not cleaned:
             logger.warning("缓存清理失败，但继续启动...")
         
         # 步骤2: 检查依赖
-        if not check_dependencies():
+        with startup_phase('检查依赖'):
+            dependencies_ok = check_dependencies()
+        if not dependencies_ok:
             logger.error("依赖检查失败，请手动安装所需依赖")
             return False
         
-        # 步骤3: 初始化WebDriver（使用本地chromedriver）
-        if not initialize_webdriver():
-            logger.error("WebDriver初始化失败，请检查本地chromedriver")
-            return False
+        # 步骤3: 初始化WebDriver（使用本地chromedriver；data模式的模拟后端不需要浏览器）
+        # 验证通过的浏览器保留给爬虫使用，第一个搜索请求不必再等待Chrome启动
+        driver = None
+        if MOCK_DATA_CONFIG['ENABLE_MOCK'] and MOCK_DATA_CONFIG['MOCK_MODE'] == 'data':
+            logger.info("已启用模拟数据后端，跳过WebDriver验证")
+        else:
+            with startup_phase('验证WebDriver'):
+                driver = initialize_webdriver()
+            if driver is None:
+                logger.error("WebDriver初始化失败，请检查本地chromedriver")
+                return False
         
         # 步骤4: 预初始化爬虫组件
-        if not initialize_crawler():
+        with startup_phase('预初始化爬虫'):
+            crawler_ok = initialize_crawler()
+        if not crawler_ok:
             logger.error("爬虫组件预初始化失败")
             return False
         
@@ -300,7 +331,7 @@ def main():
         elapsed_time = time.time() - start_time
         logger.info(f"所有初始化步骤完成，用时: {elapsed_time:.2f}秒")
         
-        start_flask_app()
+        start_flask_app(driver)
         
     except KeyboardInterrupt:
         logger.info("服务已停止")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+近似重复检测检查
+用构造的笔记检查 DEDUP_CONFIG 下的合并规则，不启动浏览器
+
+检查内容：
+1. 转发 - 两条不同真实笔记ID、文本相同的笔记合并为一条
+2. 封面 - 两条不同真实笔记ID、封面相同但文本不同的笔记不合并；临时ID与真实ID封面相同时合并
+3. 合并方向 - 真实ID的笔记没有URL、临时ID的笔记有URL时，合并结果保留真实ID并补上URL
+4. 占位封面 - 一批笔记中的占位封面不影响之后的搜索
+
+使用方法：
+    python benchmarks/dedup_check.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.crawler.near_duplicates import NearDuplicateIndex, deduplicate_notes, merge_notes
+from src.crawler.note_model import Note
+
+REAL_A = '64a1b2c3d4e5f60718293a4b'
+REAL_B = '64f0e1d2c3b4a59687786950'
+NOTE_URL = 'https://www.xiaohongshu.com/explore/{}'
+PLACEHOLDER_COVER = 'https://sns-webpic-qc.xhscdn.com/default/placeholder.png'
+
+
+def check_reposts():
+    """两条真实ID的转发笔记合并为一条"""
+    notes = [
+        Note(REAL_A, title='秋冬口红试色合集', desc='十二支热门色号逐一试色', url=NOTE_URL.format(REAL_A)),
+        Note(REAL_B, title='秋冬口红试色合集', desc='十二支热门色号逐一试色', url=NOTE_URL.format(REAL_B)),
+    ]
+    result = deduplicate_notes(notes)
+    if len(result) != 1 or result[0]['id'] != REAL_A:
+        return [f"转发笔记未合并: {[note['id'] for note in result]}"]
+    return []
+
+
+def check_covers():
+    """封面相同只在有临时ID时合并"""
+    cover = 'https://sns-webpic-qc.xhscdn.com/202401/cover1.jpg?imageView2'
+    real_a = Note(REAL_A, title='通勤穿搭一周不重样', url=NOTE_URL.format(REAL_A), cover=cover)
+    real_b = Note(REAL_B, title='周末露营装备清单', url=NOTE_URL.format(REAL_B), cover=cover)
+    synthetic = Note('s1_0_2', title='通勤穿搭', cover=cover)
+
+    problems = []
+    if len(deduplicate_notes([real_a, real_b])) != 2:
+        problems.append("不同真实ID的笔记因封面相同被合并")
+    result = deduplicate_notes([synthetic, real_a])
+    if len(result) != 1 or result[0]['id'] != REAL_A:
+        problems.append(f"临时ID与真实ID封面相同未合并: {[note['id'] for note in result]}")
+    return problems
+
+
+def check_merge_primary():
+    """合并结果优先保留真实ID"""
+    real = Note(REAL_A, title='护肤步骤分享')
+    synthetic = Note('s1_0_1', title='护肤步骤分享', url=NOTE_URL.format(REAL_A))
+
+    problems = []
+    for first, second in ((real, synthetic), (synthetic, real)):
+        merged = merge_notes(first, second)
+        if merged['id'] != REAL_A or merged['url'] != NOTE_URL.format(REAL_A):
+            problems.append(f"合并后ID或URL错误: {merged['id']} {merged['url']}")
+    return problems
+
+
+def check_placeholder_covers():
+    """占位封面只在所在的一批笔记中忽略"""
+    history = NearDuplicateIndex(capacity=100)
+    batch = [Note(f"{i:024x}", title=f"第{i}篇不同主题的笔记内容", url=NOTE_URL.format(f"{i:024x}"),
+                  cover=PLACEHOLDER_COVER) for i in range(1, 6)]
+    if len(deduplicate_notes(batch, history)) != len(batch):
+        return ["占位封面使不同笔记被合并"]
+
+    # 之后的搜索中该封面只出现一次，按封面补全临时ID
+    cover = 'https://sns-webpic-qc.xhscdn.com/202402/cover2.jpg'
+    real = Note(REAL_B, title='旅行攻略', url=NOTE_URL.format(REAL_B), cover=cover)
+    deduplicate_notes([real], history)
+    result = deduplicate_notes([Note('s3_4', title='旅行', cover=cover)], history)
+    if history._ignored_covers or result[0]['id'] != REAL_B:
+        return ["占位封面被历史索引长期保留或影响之后的搜索"]
+    return []
+
+
+def main():
+    problems = check_reposts() + check_covers() + check_merge_primary() + check_placeholder_covers()
+    for problem in problems:
+        print(f"✗ {problem}")
+    if problems:
+        return 1
+    print("✓ 近似重复检测检查通过")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
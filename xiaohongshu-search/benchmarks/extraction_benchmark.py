@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+笔记提取性能基准测试
+在无头Chrome中通过file://加载保存的搜索结果页源码，离线测量提取流程各阶段的性能
+
+测量内容：
+1. 各阶段耗时 - 策略1/2/3、去重、URL过滤，多次运行取中位数
+2. WebDriver调用次数 - 按命令类型统计每个阶段发出的WebDriver请求
+3. 吞吐和召回率 - 每秒提取笔记数；提供标注文件时计算召回率和精确率
+
+页面源码来源：
+- benchmarks/fixtures/ 下自带的离线页面（默认）
+- 搜索时保存的调试文件 cache/temp/artifacts/*.html.gz（gzip压缩的页面源码会先解压到临时文件）
+
+标注文件与页面源码同名，扩展名为 .labels.json：
+    {"keyword": "搜索关键词", "note_ids": ["笔记ID", ...]}
+
+使用方法：
+    python benchmarks/extraction_benchmark.py
+    python benchmarks/extraction_benchmark.py --fixtures "cache/temp/artifacts/search_*.html.gz" --keyword 手表
+    python benchmarks/extraction_benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from src.crawler.xiaohongshu_crawler import XiaoHongShuCrawler
+
+# 结果文件格式版本，字段变化时递增
+RESULT_SCHEMA_VERSION = 1
+
+DEFAULT_FIXTURES = os.path.join(PROJECT_ROOT, 'benchmarks', 'fixtures', 'page_source_*.html')
+
+# 提取流程各阶段，与 _extract_notes_with_strategies 的执行顺序一致
+STAGES = ('strategy1', 'strategy2', 'strategy3', 'dedup', 'filter')
+
+logger = logging.getLogger('extraction_benchmark')
+
+
+class WebDriverCallCounter:
+    """
+    WebDriver调用计数器
+
+    WebDriver和WebElement的所有命令最终都经过 driver.execute，
+    在实例上替换该方法即可统计每个阶段发出的请求数量
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.counts = Counter()
+        self._execute = driver.execute
+        driver.execute = self._counting_execute
+
+    def _counting_execute(self, driver_command, params=None):
+        self.counts[driver_command] += 1
+        return self._execute(driver_command, params)
+
+    def take(self):
+        """返回并清空当前计数"""
+        counts = dict(self.counts)
+        self.counts.clear()
+        return counts
+
+    def detach(self):
+        """恢复原始的execute方法"""
+        self.driver.execute = self._execute
+
+
+def load_labels(fixture_path):
+    """读取页面源码对应的标注文件，不存在时返回None"""
+    base_path = fixture_path[:-3] if fixture_path.endswith('.gz') else fixture_path
+    labels_path = os.path.splitext(base_path)[0] + '.labels.json'
+    if not os.path.exists(labels_path):
+        return None
+    with open(labels_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_pipeline(crawler, counter, keyword):
+    """
+    在当前已加载的页面上执行一次完整提取流程
+
+    返回:
+        tuple: (各阶段测量结果, 通过URL验证的笔记列表)
+    """
+    stages = {}
+    all_notes = []
+    strategies = crawler.extraction_strategies
+
+    def measure(stage, func, *args):
+        counter.take()
+        start = time.perf_counter()
+        notes = func(*args)
+        elapsed = time.perf_counter() - start
+        calls = counter.take()
+        stages[stage] = {
+            'seconds': elapsed,
+            'notes': len(notes),
+            'webdriver_calls': sum(calls.values()),
+            'webdriver_commands': calls,
+        }
+        return notes
+
+    if strategies['STRATEGY_1']['ENABLED']:
+        all_notes.extend(measure('strategy1', crawler._extract_strategy_1))
+    if strategies['STRATEGY_2']['ENABLED']:
+        all_notes.extend(measure('strategy2', crawler._extract_strategy_2))
+    if strategies['STRATEGY_3']['ENABLED']:
+        all_notes.extend(measure('strategy3', crawler._extract_strategy_3, keyword))
+
+    unique_notes = measure('dedup', crawler._deduplicate_notes, all_notes)
+    valid_notes = measure('filter', crawler._filter_notes_with_valid_urls, unique_notes)
+    return stages, valid_notes
+
+
+def summarize_runs(runs):
+    """合并多次运行的阶段测量结果，耗时取中位数"""
+    summary = {}
+    for stage in STAGES:
+        samples = [run[stage] for run in runs if stage in run]
+        if not samples:
+            continue
+        seconds = [sample['seconds'] for sample in samples]
+        summary[stage] = {
+            'median_seconds': round(statistics.median(seconds), 6),
+            'min_seconds': round(min(seconds), 6),
+            'max_seconds': round(max(seconds), 6),
+            'notes': samples[-1]['notes'],
+            'webdriver_calls': samples[-1]['webdriver_calls'],
+            'webdriver_commands': samples[-1]['webdriver_commands'],
+        }
+    return summary
+
+
+def score(notes, labels):
+    """根据标注计算召回率和精确率"""
+    expected = set(labels.get('note_ids', []))
+    found = {note['id'] for note in notes}
+    matched = expected & found
+    return {
+        'expected': len(expected),
+        'found': len(found),
+        'matched': len(matched),
+        'missing': sorted(expected - found),
+        'recall': round(len(matched) / len(expected), 4) if expected else None,
+        'precision': round(len(matched) / len(found), 4) if found else None,
+    }
+
+
+def fixture_uri(fixture_path, temp_dir):
+    """获取页面源码的file:// URL，gzip压缩的页面源码先解压到临时目录"""
+    if fixture_path.endswith('.gz'):
+        html_path = os.path.join(temp_dir, os.path.basename(fixture_path)[:-3])
+        with gzip.open(fixture_path, 'rb') as src, open(html_path, 'wb') as dst:
+            dst.write(src.read())
+        fixture_path = html_path
+    return Path(fixture_path).resolve().as_uri()
+
+
+def benchmark_fixture(crawler, counter, fixture_path, repeat, default_keyword, temp_dir):
+    """对单个页面源码执行基准测试"""
+    labels = load_labels(fixture_path)
+    keyword = (labels or {}).get('keyword') or default_keyword
+
+    crawler.driver.get(fixture_uri(fixture_path, temp_dir))
+    counter.take()
+
+    runs = []
+    notes = []
+    for _ in range(repeat):
+        stages, notes = run_pipeline(crawler, counter, keyword)
+        runs.append(stages)
+
+    stages = summarize_runs(runs)
+    total_seconds = sum(stage['median_seconds'] for stage in stages.values())
+    total_calls = sum(stage['webdriver_calls'] for stage in stages.values())
+
+    result = {
+        'fixture': os.path.basename(fixture_path),
+        'keyword': keyword,
+        'repeat': repeat,
+        'stages': stages,
+        'total': {
+            'median_seconds': round(total_seconds, 6),
+            'notes': len(notes),
+            'notes_per_second': round(len(notes) / total_seconds, 2) if total_seconds else None,
+            'webdriver_calls': total_calls,
+        },
+    }
+    if labels:
+        result['accuracy'] = score(notes, labels)
+    return result
+
+
+def git_revision():
+    """获取当前代码版本，失败时返回None"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline):
+    """打印与基线结果的对比"""
+    baseline_fixtures = {item['fixture']: item for item in baseline.get('fixtures', [])}
+
+    print(f"\n与基线对比（基线版本: {baseline.get('git_revision')}，当前版本: {current.get('git_revision')}）")
+    print(f"{'页面':<40}{'指标':<18}{'基线':>12}{'当前':>12}{'变化':>10}")
+
+    for item in current['fixtures']:
+        before = baseline_fixtures.get(item['fixture'])
+        if not before:
+            print(f"{item['fixture']:<40}基线中不存在")
+            continue
+
+        rows = [
+            ('耗时(秒)', before['total']['median_seconds'], item['total']['median_seconds']),
+            ('笔记/秒', before['total']['notes_per_second'], item['total']['notes_per_second']),
+            ('WebDriver调用', before['total']['webdriver_calls'], item['total']['webdriver_calls']),
+        ]
+        if 'accuracy' in item and 'accuracy' in before:
+            rows.append(('召回率', before['accuracy']['recall'], item['accuracy']['recall']))
+
+        for name, old, new in rows:
+            if old and new is not None:
+                change = f"{(new - old) / old * 100:+.1f}%"
+            else:
+                change = '-'
+            print(f"{item['fixture']:<40}{name:<18}{old!s:>12}{new!s:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='笔记提取性能基准测试')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES,
+                        help='页面源码文件的glob模式（默认使用自带的离线页面）')
+    parser.add_argument('--keyword', default='',
+                        help='没有标注文件时策略3使用的关键词')
+    parser.add_argument('--repeat', type=int, default=3, help='每个页面的重复次数，耗时取中位数')
+    parser.add_argument('--output', help='结果JSON文件路径（默认输出到标准输出）')
+    parser.add_argument('--compare', help='基线结果JSON文件，输出对比表')
+    parser.add_argument('--verbose', action='store_true', help='输出爬虫的详细日志')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    fixtures = sorted(glob.glob(args.fixtures))
+    if not fixtures:
+        print(f"未找到页面源码文件: {args.fixtures}", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 基准测试只加载本地页面，使用空的cookie文件，浏览器启动时不打开小红书页面添加cookie
+        cookies_file = os.path.join(temp_dir, 'cookies.json')
+        with open(cookies_file, 'w', encoding='utf-8') as f:
+            json.dump([], f)
+
+        crawler = XiaoHongShuCrawler(use_selenium=True, headless=True, cookies_file=cookies_file)
+        if not crawler._ensure_driver_initialized():
+            crawler.close()
+            print("浏览器初始化失败，请检查ChromeDriver配置", file=sys.stderr)
+            return 1
+
+        browser_version = crawler.driver.capabilities.get('browserVersion')
+        counter = WebDriverCallCounter(crawler.driver)
+        try:
+            results = []
+            for fixture_path in fixtures:
+                logger.warning(f"正在测试: {fixture_path}")
+                results.append(benchmark_fixture(crawler, counter, fixture_path, args.repeat, args.keyword, temp_dir))
+        finally:
+            counter.detach()
+            crawler.close()
+
+    report = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'browser_version': browser_version,
+        },
+        'strategies': {
+            name: strategy['ENABLED'] for name, strategy in crawler.extraction_strategies.items()
+            if isinstance(strategy, dict) and 'ENABLED' in strategy
+        },
+        'fixtures': results,
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        logger.warning(f"基准测试结果已保存: {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
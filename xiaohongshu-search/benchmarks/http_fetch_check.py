@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTTP抓取检查
+启动本地替身服务器提供带初始状态JSON的模拟搜索页，让 use_selenium=False 的爬虫向它发起搜索，
+检查解析结果并测量每次搜索的耗时，不访问小红书也不启动浏览器
+
+检查内容：
+1. 解析 - 搜索结果的笔记ID、标题和作者与替身页面中的数据一致
+2. 连接复用 - 多次搜索共用连接池中的连接
+3. 回退 - 替身服务器返回没有初始状态的页面时，爬虫判定需要改用浏览器
+
+使用方法：
+    python benchmarks/http_fetch_check.py
+    python benchmarks/http_fetch_check.py --searches 50 --max-results 20
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.crawler.mock_backend import generate_mock_notes, render_initial_state_page
+
+# 替身服务器对该关键词返回没有初始状态的页面（模拟客户端渲染或登录页）
+EMPTY_KEYWORD = '没有初始状态'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """替身服务器：/search_result 返回模拟搜索页"""
+
+    protocol_version = 'HTTP/1.1'
+    max_results = 20
+    connections = set()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        keyword = parse_qs(parts.query).get('keyword', [''])[0]
+        if parts.path != '/search_result' or not keyword:
+            self.send_error(404)
+            return
+
+        StandInHandler.connections.add(self.client_address)
+        if keyword == EMPTY_KEYWORD:
+            body = '<html><body><div id="app"></div></body></html>'
+        else:
+            body = render_initial_state_page(keyword, self.max_results)
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP抓取检查')
+    parser.add_argument('--searches', type=int, default=20, help='搜索次数')
+    parser.add_argument('--max-results', type=int, default=20, help='每次搜索的结果数量')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    StandInHandler.max_results = args.max_results
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from src.crawler.xiaohongshu_crawler import XiaoHongShuCrawler
+    crawler = XiaoHongShuCrawler(use_selenium=False)
+    if crawler.http_fetcher is None:
+        print("已启用模拟抓取后端，HTTP抓取未启用（取消设置 XIAOHONGSHU_MOCK_MODE 后重试）", file=sys.stderr)
+        return 1
+    crawler.http_fetcher.base_url = base_url
+
+    problems = []
+    timings = []
+    try:
+        for i in range(args.searches):
+            keyword = f"替身搜索{i}"
+            started = time.perf_counter()
+            notes = crawler.search(keyword, max_results=args.max_results, use_cache=False, use_index=False)
+            timings.append(time.perf_counter() - started)
+
+            expected = generate_mock_notes(keyword, args.max_results)
+            if [(n['id'], n['title'], n['author']) for n in notes] != \
+                    [(n['id'], n['title'], n['author']) for n in expected]:
+                problems.append(f"搜索结果与替身页面不一致: {keyword}")
+
+        if crawler._search_with_http(EMPTY_KEYWORD, args.max_results) is not None:
+            problems.append("没有初始状态的页面未触发回退")
+    finally:
+        crawler.close()
+        server.shutdown()
+
+    timings.sort()
+    print("=" * 60)
+    print(f"HTTP抓取检查（替身服务器 {base_url}）")
+    print("=" * 60)
+    print(f"搜索次数:   {len(timings)}")
+    print(f"耗时中位数: {statistics.median(timings) * 1000:.1f}ms")
+    print(f"最大耗时:   {timings[-1] * 1000:.1f}ms")
+    print(f"客户端连接: {len({port for _, port in StandInHandler.connections})} 个")
+    print(f"抓取统计:   {crawler.http_fetcher.stats}")
+
+    for problem in problems:
+        print(f"失败: {problem}", file=sys.stderr)
+    if not problems:
+        print("✓ HTTP抓取检查通过")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
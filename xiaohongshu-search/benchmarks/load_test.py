@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+/api/search 压力测试
+按指定的并发数和缓存命中比例向搜索接口发请求，统计延迟分位数和吞吐量
+
+请求类型：
+1. 命中 - 从固定的关键词池中选取，测试开始前逐个预热，之后应直接命中缓存
+2. 未命中 - 每次使用新关键词，触发一次完整抓取
+
+压测时建议使用模拟后端启动服务，避免访问小红书：
+    XIAOHONGSHU_MOCK_MODE=data python app.py
+
+使用方法：
+    python benchmarks/load_test.py --concurrency 8 --requests 500 --hit-ratio 0.9
+    python benchmarks/load_test.py --duration 60 --hit-ratio 0.5 --output load.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# 结果文件格式版本，字段变化时递增
+RESULT_SCHEMA_VERSION = 1
+
+
+def percentile(sorted_values, p):
+    """计算分位数（线性插值），sorted_values需已排序"""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+class LoadTest:
+    """搜索接口压力测试"""
+
+    def __init__(self, base_url, hit_keywords, hit_ratio, max_results, timeout, seed=None):
+        """
+        初始化压测
+
+        参数:
+            base_url (str): 服务地址，如 http://127.0.0.1:8080
+            hit_keywords (list): 命中请求使用的关键词池
+            hit_ratio (float): 命中请求所占比例
+            max_results (int): 每次搜索的结果数量
+            timeout (float): 单个请求超时时间（秒）
+            seed (int): 随机种子，用于复现请求序列
+        """
+        self.base_url = base_url.rstrip('/')
+        self.hit_keywords = hit_keywords
+        self.hit_ratio = hit_ratio
+        self.max_results = max_results
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._miss_counter = 0
+        self._results = []
+        self._results_lock = threading.Lock()
+
+    def _request(self, keyword):
+        """发送一次搜索请求，返回 (状态码, 耗时秒数)"""
+        query = urllib.parse.urlencode({'keyword': keyword, 'max_results': self.max_results})
+        url = f"{self.base_url}/api/search?{query}"
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except Exception:
+            # 连接失败或超时
+            status = 0
+        return status, time.perf_counter() - start
+
+    def _next_request(self):
+        """按命中比例选出下一个请求的类型和关键词"""
+        with self._random_lock:
+            if self.hit_keywords and self._random.random() < self.hit_ratio:
+                return 'hit', self._random.choice(self.hit_keywords)
+            self._miss_counter += 1
+            return 'miss', f"压测{self.run_id}_{self._miss_counter}"
+
+    def _run_one(self):
+        kind, keyword = self._next_request()
+        status, elapsed = self._request(keyword)
+        with self._results_lock:
+            self._results.append((kind, status, elapsed))
+
+    def prewarm(self):
+        """逐个请求命中关键词池，确保之后的命中请求都能命中缓存"""
+        failed = []
+        for keyword in self.hit_keywords:
+            status, _ = self._request(keyword)
+            if status != 200:
+                failed.append(keyword)
+        return failed
+
+    def run(self, concurrency, total_requests=None, duration=None):
+        """
+        执行压测
+
+        参数:
+            concurrency (int): 并发数
+            total_requests (int): 请求总数（与duration二选一）
+            duration (float): 持续时间（秒）
+
+        返回:
+            dict: 压测报告
+        """
+        self._results = []
+        deadline = time.perf_counter() + duration if duration else None
+        remaining = [total_requests]
+        remaining_lock = threading.Lock()
+
+        def worker():
+            while True:
+                if deadline is not None:
+                    if time.perf_counter() >= deadline:
+                        return
+                else:
+                    with remaining_lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                self._run_one()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(worker)
+        wall_time = time.perf_counter() - start
+
+        return self.report(concurrency, wall_time)
+
+    @staticmethod
+    def _summarize(results, wall_time):
+        latencies = sorted(elapsed for _, _, elapsed in results)
+        statuses = {}
+        for _, status, _ in results:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            'requests': len(results),
+            'status': statuses,
+            'error_rate': round(1 - statuses.get('200', 0) / len(results), 4) if results else None,
+            'throughput_rps': round(len(results) / wall_time, 2) if wall_time else None,
+            'latency_ms': {
+                'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+                'p50': ms(percentile(latencies, 50)),
+                'p95': ms(percentile(latencies, 95)),
+                'p99': ms(percentile(latencies, 99)),
+                'max': ms(latencies[-1]) if latencies else None,
+            },
+        }
+
+    def report(self, concurrency, wall_time):
+        """生成压测报告"""
+        results = list(self._results)
+        report = {
+            'schema_version': RESULT_SCHEMA_VERSION,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'base_url': self.base_url,
+            'concurrency': concurrency,
+            'hit_ratio': self.hit_ratio,
+            'hit_keywords': len(self.hit_keywords),
+            'max_results': self.max_results,
+            'wall_time': round(wall_time, 3),
+            'overall': self._summarize(results, wall_time),
+        }
+        for kind in ('hit', 'miss'):
+            subset = [result for result in results if result[0] == kind]
+            if subset:
+                report[kind] = self._summarize(subset, wall_time)
+        return report
+
+
+def print_report(report):
+    """打印压测结果摘要"""
+    print(f"\n压测完成: 并发 {report['concurrency']}，命中比例 {report['hit_ratio']}，用时 {report['wall_time']} 秒")
+    print(f"{'类型':<10}{'请求数':>8}{'吞吐(rps)':>12}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'错误率':>8}  状态码")
+    for kind, name in (('overall', '全部'), ('hit', '命中'), ('miss', '未命中')):
+        summary = report.get(kind)
+        if not summary:
+            continue
+        latency = summary['latency_ms']
+        print(f"{name:<10}{summary['requests']:>8}{summary['throughput_rps']!s:>12}"
+              f"{latency['p50']!s:>10}{latency['p95']!s:>10}{latency['p99']!s:>10}"
+              f"{summary['error_rate']!s:>8}  {summary['status']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/api/search 压力测试')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8080', help='服务地址')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发数')
+    parser.add_argument('--requests', type=int, default=200, help='请求总数')
+    parser.add_argument('--duration', type=float, help='持续时间（秒），指定后忽略--requests')
+    parser.add_argument('--hit-ratio', type=float, default=0.8, help='缓存命中请求所占比例（0-1）')
+    parser.add_argument('--hit-keywords', type=int, default=20, help='命中关键词池大小')
+    parser.add_argument('--max-results', type=int, default=21, help='每次搜索的结果数量')
+    parser.add_argument('--timeout', type=float, default=120, help='单个请求超时时间（秒）')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--no-prewarm', action='store_true', help='跳过命中关键词的预热')
+    parser.add_argument('--output', help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    if not 0 <= args.hit_ratio <= 1:
+        print("--hit-ratio 必须在0到1之间", file=sys.stderr)
+        return 1
+
+    hit_keywords = [f"压测热词{i}" for i in range(args.hit_keywords)] if args.hit_ratio > 0 else []
+    load_test = LoadTest(args.base_url, hit_keywords, args.hit_ratio, args.max_results, args.timeout, args.seed)
+
+    if hit_keywords and not args.no_prewarm:
+        print(f"正在预热 {len(hit_keywords)} 个命中关键词...")
+        failed = load_test.prewarm()
+        if failed:
+            print(f"警告: {len(failed)} 个关键词预热失败，对应请求可能不会命中缓存", file=sys.stderr)
+
+    report = load_test.run(args.concurrency, args.requests, args.duration)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"压测结果已保存: {args.output}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
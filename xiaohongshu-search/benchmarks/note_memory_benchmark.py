@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+笔记内存基准测试
+比较同一批笔记保存为dict和Note对象时常驻的内存，以及两者互相转换的耗时
+
+测量方法：
+1. 数据 - 模拟笔记（带各不相同的封面URL）先编码为JSON，与读取缓存文件、全文索引时一样解码得到笔记，
+   字符串都是解码时新建的对象
+2. 内存 - 用tracemalloc统计解码后常驻的内存（不含JSON文本）：dict为解码结果本身，
+   Note为from_dict转换并释放中间dict之后的结果，包括列表和全部字段值
+3. 转换 - from_dict和to_dict（接口响应、写缓存时的转换）每条笔记的耗时
+
+使用方法：
+    python benchmarks/note_memory_benchmark.py
+    python benchmarks/note_memory_benchmark.py --notes 100000 500000 --output note_memory.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.crawler.mock_backend import generate_mock_notes
+from src.crawler.note_model import Note
+
+# 结果文件格式版本，字段变化时递增
+RESULT_SCHEMA_VERSION = 1
+
+PER_NOTES = 100000
+
+
+def notes_json(count):
+    """生成count条模拟笔记的JSON文本"""
+    notes = []
+    for note in generate_mock_notes('内存基准', count):
+        note = note.to_dict()
+        note['cover'] = f"https://sns-webpic-qc.xhscdn.com/{note['id']}/1040g00831!nc_n_webp_mw_1"
+        notes.append(note)
+    return json.dumps(notes, ensure_ascii=False)
+
+
+def retained_bytes(text, build):
+    """解码text并用build转换，返回 (常驻字节数, 结果)"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(json.loads(text))
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - before, result
+
+
+def per_note_us(func, items):
+    """对每条笔记执行func，返回平均耗时（微秒）"""
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+
+def measure(count):
+    """测量count条笔记"""
+    text = notes_json(count)
+
+    tracemalloc.start()
+    dict_bytes, dicts = retained_bytes(text, lambda notes: notes)
+    del dicts
+    note_bytes, notes = retained_bytes(text, lambda notes: [Note.from_dict(note) for note in notes])
+    tracemalloc.stop()
+
+    dicts = json.loads(text)
+    if [note.to_dict() for note in notes] != dicts:
+        raise RuntimeError("Note.to_dict 与原笔记dict不一致")
+
+    return {
+        'notes': count,
+        'dict_bytes': dict_bytes,
+        'note_bytes': note_bytes,
+        'dict_bytes_per_note': round(dict_bytes / count, 1),
+        'note_bytes_per_note': round(note_bytes / count, 1),
+        'saved_mb_per_100k': round((dict_bytes - note_bytes) / count * PER_NOTES / 1024 / 1024, 2),
+        'saved_ratio': round(1 - note_bytes / dict_bytes, 3),
+        'from_dict_us': round(per_note_us(Note.from_dict, dicts), 3),
+        'to_dict_us': round(per_note_us(Note.to_dict, notes), 3),
+    }
+
+
+def print_report(report):
+    """打印基准测试结果"""
+    print("=" * 72)
+    print(f"{'笔记数':>10}{'dict/条':>12}{'Note/条':>12}{'每10万条节省':>16}{'节省比例':>10}"
+          f"{'from_dict':>12}{'to_dict':>10}")
+    print("=" * 72)
+    for row in report['results']:
+        print(f"{row['notes']:>10}{row['dict_bytes_per_note']:>11.0f}B{row['note_bytes_per_note']:>11.0f}B"
+              f"{row['saved_mb_per_100k']:>13.1f}MB{row['saved_ratio']:>10.1%}"
+              f"{row['from_dict_us']:>10.2f}us{row['to_dict_us']:>8.2f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='笔记内存基准测试')
+    parser.add_argument('--notes', type=int, nargs='+', default=[PER_NOTES], help='笔记数')
+    parser.add_argument('--output', help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    report = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'python': sys.version.split()[0],
+        'results': [measure(count) for count in args.notes],
+    }
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
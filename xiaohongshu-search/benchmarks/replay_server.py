@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+抓取回放服务器
+在本地回放录制模式（XIAOHONGSHU_CAPTURE=1）保存的HAR存档，使浏览器离线、可重复地打开真实形态的搜索页，
+用于测试页面就绪判断、提取策略和滚动加载的性能
+
+实现说明：
+1. 同源 - 存档中出现的所有域名都映射到本服务器：搜索页所在的主域名直接使用原路径，
+   其他域名使用 /__host__/<域名>/<路径>；文本响应（HTML、脚本、JSON）中的这些域名地址按同样规则改写
+2. 匹配 - 按 请求方法 + 原始URL 匹配录制的响应，同一URL录制了多次时按顺序依次返回；
+   URL中带时间戳等动态参数而匹配不到时，退回只按路径匹配
+3. 延迟 - original 按录制的等待首字节和接收耗时回放，zero 立即返回
+4. 响应头 - 去掉压缩、长度、CSP、HSTS和Set-Cookie等不适用于本地回放的响应头
+
+使用方法：
+    python benchmarks/replay_server.py cache/captures/capture_xxx.har.gz
+    python benchmarks/replay_server.py cache/captures/capture_xxx.har.gz --latency zero --port 8766
+
+    # 另开终端：让爬虫的浏览器打开回放服务器上的搜索页
+    XIAOHONGSHU_REPLAY_URL=http://127.0.0.1:8766 python app.py
+
+    # 或直接在本进程中用爬虫搜索存档中的关键词并统计耗时（需要Chrome）
+    python benchmarks/replay_server.py cache/captures/capture_xxx.har.gz --latency zero --search --runs 3
+"""
+
+import argparse
+import base64
+import logging
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.crawler.session_capture import load_archive
+
+HOST_PREFIX = '/__host__/'
+
+# 不适用于本地回放的响应头
+_DROPPED_HEADERS = {
+    'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+    'content-security-policy', 'content-security-policy-report-only', 'strict-transport-security',
+    'set-cookie', 'alt-svc', 'report-to', 'nel',
+}
+
+# 需要改写其中域名地址的响应类型
+_TEXT_TYPES = ('html', 'javascript', 'json', 'text/', 'xml', 'ecmascript')
+
+
+class ReplayArchive:
+    """录制存档的索引和改写规则"""
+
+    def __init__(self, har, base_url):
+        """
+        建立存档索引
+
+        参数:
+            har (dict): HAR格式的存档
+            base_url (str): 回放服务器地址，如 http://127.0.0.1:8766
+        """
+        self.base_url = base_url.rstrip('/')
+        self.keyword = har['log'].get('_keyword')
+        self.entries = [entry for entry in har['log']['entries'] if entry['request'].get('url', '').startswith('http')]
+        if not self.entries:
+            raise ValueError("存档中没有可回放的响应")
+
+        documents = [entry for entry in self.entries if entry.get('_resourceType') == 'Document']
+        self.primary_host = urlsplit((documents or self.entries)[0]['request']['url']).netloc
+        self.page_path = self._local_path((documents or self.entries)[0]['request']['url'])
+        self.schemes = {}
+        self._by_url = {}
+        self._by_path = {}
+        for entry in self.entries:
+            parts = urlsplit(entry['request']['url'])
+            self.schemes.setdefault(parts.netloc, parts.scheme)
+            method = entry['request'].get('method', 'GET')
+            self._by_url.setdefault((method, entry['request']['url'].split('#')[0]), []).append(entry)
+            self._by_path.setdefault((method, parts.netloc, parts.path), []).append(entry)
+
+        hosts = sorted(self.schemes, key=len, reverse=True)
+        # 匹配 https://host、//host 以及JSON中转义的 https:\/\/host
+        self._host_pattern = re.compile(
+            r'(?:https?:)?(?:\\/\\/|//)(' + '|'.join(re.escape(host) for host in hosts) + r')(?![\w.-])')
+
+        self._served = {}
+        self._lock = threading.Lock()
+        self.stats = {'served': 0, 'path_matched': 0, 'missed': 0}
+        self.misses = []
+
+    def _local_path(self, url):
+        """原始URL在回放服务器上的路径"""
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        if parts.netloc == self.primary_host:
+            return path
+        return f"{HOST_PREFIX}{parts.netloc}{path}"
+
+    def rewrite_url(self, url):
+        """将原始URL改写为回放服务器上的地址，不在存档中的域名保持不变"""
+        if urlsplit(url).netloc not in self.schemes:
+            return url
+        return self.base_url + self._local_path(url)
+
+    def _replace_host(self, match):
+        host = match.group(1)
+        return self.base_url if host == self.primary_host else f"{self.base_url}{HOST_PREFIX}{host}"
+
+    def rewrite_text(self, text):
+        """改写文本响应中的域名地址"""
+        return self._host_pattern.sub(self._replace_host, text)
+
+    def original_url(self, path):
+        """回放服务器上的路径对应的原始URL"""
+        if path.startswith(HOST_PREFIX):
+            host, _, rest = path[len(HOST_PREFIX):].partition('/')
+            return f"{self.schemes.get(host, 'https')}://{host}/{rest}"
+        return f"{self.schemes.get(self.primary_host, 'https')}://{self.primary_host}{path}"
+
+    def lookup(self, method, path):
+        """
+        查找录制的响应
+
+        参数:
+            method (str): 请求方法
+            path (str): 回放服务器上的请求路径（含查询参数）
+
+        返回:
+            dict: HAR记录，没有匹配时返回None
+        """
+        url = self.original_url(path)
+        candidates = self._by_url.get((method, url))
+        path_matched = False
+        if not candidates:
+            parts = urlsplit(url)
+            candidates = self._by_path.get((method, parts.netloc, parts.path))
+            path_matched = bool(candidates)
+
+        with self._lock:
+            if path_matched:
+                self.stats['path_matched'] += 1
+            if not candidates:
+                self.stats['missed'] += 1
+                if len(self.misses) < 100:
+                    self.misses.append(f"{method} {url}")
+                return None
+            # 同一URL录制了多次时依次返回，用完后重复最后一次
+            key = id(candidates)
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            self.stats['served'] += 1
+            return candidates[min(index, len(candidates) - 1)]
+
+    def response_body(self, entry):
+        """取出（并改写）录制的响应体"""
+        content = entry['response'].get('content', {})
+        text = content.get('text')
+        if text is None:
+            return b''
+        if content.get('encoding') == 'base64':
+            return base64.b64decode(text)
+        if any(kind in content.get('mimeType', '') for kind in _TEXT_TYPES):
+            text = self.rewrite_text(text)
+        return text.encode('utf-8')
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """回放请求处理"""
+
+    protocol_version = 'HTTP/1.1'
+    archive = None
+    latency = 'original'
+
+    def _replay(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        entry = self.archive.lookup(self.command, self.path)
+        if entry is None:
+            self.send_error(404, "Not recorded in archive")
+            return
+
+        timings = entry.get('timings', {})
+        if self.latency == 'original':
+            time.sleep(max(0.0, timings.get('wait', 0)) / 1000)
+
+        response = entry['response']
+        body = b'' if self.command == 'HEAD' else self.archive.response_body(entry)
+        self.send_response(response.get('status') or 200, response.get('statusText') or None)
+        for header in response.get('headers', []):
+            name = header['name']
+            if name.lower() in _DROPPED_HEADERS:
+                continue
+            value = self.archive.rewrite_url(header['value']) if name.lower() == 'location' else header['value']
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if self.latency == 'original':
+            time.sleep(max(0.0, timings.get('receive', 0)) / 1000)
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = _replay
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(archive_path, host='127.0.0.1', port=0, latency='original'):
+    """
+    在后台线程中启动回放服务器
+
+    返回:
+        tuple: (服务器, ReplayArchive)
+    """
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    base_url = f"http://{host}:{server.server_address[1]}"
+    handler = type('BoundReplayHandler', (ReplayHandler,), {
+        'archive': ReplayArchive(load_archive(archive_path), base_url),
+        'latency': latency,
+    })
+    server.RequestHandlerClass = handler
+    threading.Thread(target=server.serve_forever, name='replay-server', daemon=True).start()
+    return server, handler.archive
+
+
+def run_searches(archive, keyword, runs, max_results):
+    """让爬虫的浏览器在回放服务器上搜索，返回每次的耗时和笔记数"""
+    from config.config import CAPTURE_CONFIG
+    CAPTURE_CONFIG['REPLAY_BASE_URL'] = archive.base_url
+    from src.crawler.xiaohongshu_crawler import XiaoHongShuCrawler
+
+    crawler = XiaoHongShuCrawler(use_selenium=True, headless=True, capture=False)
+    results = []
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            notes = crawler.search(keyword, max_results=max_results, use_cache=False, use_index=False)
+            results.append((time.perf_counter() - started, len(notes)))
+    finally:
+        crawler.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取回放服务器')
+    parser.add_argument('archive', help='录制存档路径（.har 或 .har.gz）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8766, help='监听端口，0表示随机端口')
+    parser.add_argument('--latency', choices=['original', 'zero'], default='original', help='按录制耗时回放或立即返回')
+    parser.add_argument('--search', action='store_true', help='用爬虫搜索存档中的关键词后退出（需要Chrome）')
+    parser.add_argument('--keyword', help='--search 使用的关键词，默认使用存档中记录的关键词')
+    parser.add_argument('--runs', type=int, default=1, help='--search 的搜索次数')
+    parser.add_argument('--max-results', type=int, default=20, help='--search 每次搜索的结果数量')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server, archive = start_server(args.archive, args.host, args.port, args.latency)
+    print("=" * 60)
+    print(f"回放服务器: {archive.base_url}（{len(archive.entries)} 个响应，延迟: {args.latency}）")
+    print(f"搜索页: {archive.base_url}{archive.page_path}")
+    print("=" * 60)
+
+    try:
+        if args.search:
+            keyword = args.keyword or archive.keyword
+            if not keyword:
+                print("存档中没有记录关键词，请使用 --keyword 指定", file=sys.stderr)
+                return 1
+            results = run_searches(archive, keyword, max(1, args.runs), args.max_results)
+            for i, (seconds, count) in enumerate(results, 1):
+                print(f"第 {i} 次搜索: {seconds:.2f}s，{count} 条笔记")
+            print(f"耗时中位数: {statistics.median(seconds for seconds, _ in results):.2f}s")
+        else:
+            print(f"设置 XIAOHONGSHU_REPLAY_URL={archive.base_url} 后启动服务即可使用回放，按 Ctrl+C 停止")
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(f"回放统计: {archive.stats}")
+        for miss in archive.misses[:20]:
+            print(f"  未录制: {miss}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+序列化基准测试
+用模拟笔记组成的搜索缓存条目，比较各编码后端和压缩方式的编码耗时、解码耗时和文件大小，
+以及接口响应的编码耗时
+
+测量内容：
+1. 缓存文件 - 加入序列化模块之前的格式（json.dump indent=2）作为基线，以及已安装的
+   json/orjson/msgpack × 不压缩/zstd 组合（解码JSON内容时总是优先使用orjson）
+2. 接口响应 - Flask jsonify 使用的标准库编码（ensure_ascii、sort_keys）与 json_dumps 对比
+
+使用方法：
+    python benchmarks/serialization_benchmark.py
+    python benchmarks/serialization_benchmark.py --notes 21 200 --repeat 500 --output serialization.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.crawler.mock_backend import generate_mock_notes
+from src.utils.serialization import encode, decode, get_backend, json_dumps, zstd_available
+
+# 结果文件格式版本，字段变化时递增
+RESULT_SCHEMA_VERSION = 1
+
+FORMATS = ['json', 'orjson', 'msgpack']
+COMPRESSIONS = ['none', 'zstd']
+
+
+def cache_entry(count):
+    """生成与 _save_to_cache 写入内容相同结构的缓存条目"""
+    notes = [note.to_dict() for note in generate_mock_notes('序列化基准', count)]
+    for note in notes:
+        note['content'] = note['desc'] * 4
+    return {
+        'timestamp': time.time(),
+        'keyword': '序列化基准',
+        'source': 'search',
+        'crawl_state': {'scroll_rounds': 3, 'last_scroll_height': 12000, 'note_ids': [n['id'] for n in notes]},
+        'data': notes,
+    }
+
+
+def measure(func, repeat):
+    """重复执行，返回单次耗时的中位数（微秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+def bench_cache(entry, repeat):
+    """测量各缓存格式"""
+    rows = []
+    legacy = json.dumps(entry, ensure_ascii=False, indent=2).encode('utf-8')
+    rows.append({
+        'format': 'legacy(indent=2)',
+        'compression': 'none',
+        'bytes': len(legacy),
+        'encode_us': measure(lambda: json.dumps(entry, ensure_ascii=False, indent=2).encode('utf-8'), repeat),
+        'decode_us': measure(lambda: json.loads(legacy), repeat),
+    })
+
+    for fmt in FORMATS:
+        if get_backend(fmt) is None:
+            continue
+        for compression in COMPRESSIONS:
+            if compression == 'zstd' and not zstd_available():
+                continue
+            data = encode(entry, fmt, compression)
+            if decode(data) != json.loads(json.dumps(entry)):
+                raise RuntimeError(f"{fmt}/{compression} 解码结果与原数据不一致")
+            rows.append({
+                'format': fmt,
+                'compression': compression,
+                'bytes': len(data),
+                'encode_us': measure(lambda: encode(entry, fmt, compression), repeat),
+                'decode_us': measure(lambda: decode(data), repeat),
+            })
+    return rows
+
+
+def bench_response(entry, repeat):
+    """测量接口响应编码"""
+    body = {'keyword': entry['keyword'], 'count': len(entry['data']), 'notes': entry['data']}
+    return {
+        'jsonify_us': measure(lambda: json.dumps(body, separators=(',', ':'), sort_keys=True).encode('utf-8'), repeat),
+        'json_dumps_us': measure(lambda: json_dumps(body), repeat),
+        'json_dumps_backend': 'orjson' if get_backend('orjson') else 'json',
+    }
+
+
+def print_report(report):
+    """打印基准测试结果"""
+    for result in report['results']:
+        print("=" * 72)
+        print(f"缓存条目: {result['notes']} 条笔记")
+        print("=" * 72)
+        print(f"{'格式':<18}{'压缩':<8}{'大小':>10}{'编码':>12}{'解码':>12}")
+        for row in result['cache']:
+            print(f"{row['format']:<18}{row['compression']:<8}{row['bytes']:>10}"
+                  f"{row['encode_us']:>10.1f}us{row['decode_us']:>10.1f}us")
+        response = result['response']
+        print(f"接口响应: jsonify {response['jsonify_us']:.1f}us，"
+              f"json_dumps({response['json_dumps_backend']}) {response['json_dumps_us']:.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='序列化基准测试')
+    parser.add_argument('--notes', type=int, nargs='+', default=[21, 200], help='每个缓存条目的笔记数')
+    parser.add_argument('--repeat', type=int, default=200, help='每项测量的重复次数')
+    parser.add_argument('--output', help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    report = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'repeat': args.repeat,
+        'installed': [fmt for fmt in FORMATS if get_backend(fmt)] +
+                     (['zstandard'] if zstd_available() else []),
+        'results': [],
+    }
+    for count in args.notes:
+        entry = cache_entry(count)
+        report['results'].append({
+            'notes': count,
+            'cache': bench_cache(entry, args.repeat),
+            'response': bench_response(entry, args.repeat),
+        })
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+服务启动耗时检查
+测量导入服务模块和第一个缓存命中请求的耗时，超过PERFORMANCE_CONFIG中的预算时以非零状态退出，
+可在CI中作为启动性能回归检查
+
+测量内容：
+1. 导入耗时 - 在新进程中导入 src.server.main_server，按 -X importtime 的输出统计各顶层包的导入耗时
+2. 首个命中请求 - 在同一新进程中预先写入一条搜索缓存，用Flask测试客户端请求/api/search
+3. 延迟导入 - 检查导入服务和处理缓存命中请求之后Selenium仍未被导入
+
+检查时自动使用模拟数据后端（XIAOHONGSHU_MOCK_MODE=data），不启动浏览器。
+
+使用方法：
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --runs 5 --top 30 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from config.config import PERFORMANCE_CONFIG
+
+# 结果文件格式版本，字段变化时递增
+RESULT_SCHEMA_VERSION = 1
+
+# 这些模块只应在第一次抓取需要浏览器时导入
+LAZY_MODULES = ['selenium']
+
+# 在新进程中执行的测量脚本，结果以JSON输出到标准输出最后一行
+_PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+import src.server.main_server as server
+imported = time.perf_counter()
+
+keyword = '启动检查关键词'
+server.init_crawler()
+notes = server.crawler.mock_backend.search(keyword, 10)
+server.crawler._save_to_cache(keyword, notes, source='search')
+cached = time.perf_counter()
+
+response = server.app.test_client().get('/api/search', query_string={'keyword': keyword, 'max_results': 10})
+served = time.perf_counter()
+
+print(json.dumps({
+    'import_seconds': imported - started,
+    'first_hit_seconds': served - cached,
+    'status': response.status_code,
+    'loaded': sorted({name.split('.')[0] for name in sys.modules}),
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 输出
+
+    参数:
+        stderr (str): 子进程的标准错误输出
+
+    返回:
+        dict: 顶层包名 -> 该包所有模块自身导入耗时之和（秒）
+    """
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # 格式: "import time: <自身耗时us> | <累计耗时us> | <缩进的模块名>"
+        try:
+            self_us, _, name = line[len('import time:'):].split('|', 2)
+            self_us = int(self_us)
+        except ValueError:
+            continue
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us / 1e6
+    return packages
+
+
+def run_probe():
+    """
+    在新进程中运行一次测量
+
+    返回:
+        dict: 测量结果，包含各顶层包导入耗时
+    """
+    env = dict(os.environ, XIAOHONGSHU_MOCK_MODE='data', PYTHONDONTWRITEBYTECODE='1')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"测量进程失败:\n{completed.stderr[-2000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['packages'] = parse_importtime(completed.stderr)
+    return result
+
+
+def build_report(results, top):
+    """汇总多次测量，导入耗时取中位数"""
+    packages = {}
+    for result in results:
+        for name, seconds in result['packages'].items():
+            packages.setdefault(name, []).append(seconds)
+    slowest = sorted(((name, statistics.median(values)) for name, values in packages.items()),
+                     key=lambda item: item[1], reverse=True)[:top]
+
+    loaded = set().union(*(result['loaded'] for result in results))
+    return {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'runs': len(results),
+        'import_seconds': statistics.median(result['import_seconds'] for result in results),
+        'first_hit_seconds': statistics.median(result['first_hit_seconds'] for result in results),
+        'statuses': sorted({result['status'] for result in results}),
+        'eagerly_loaded': [name for name in LAZY_MODULES if name in loaded],
+        'slowest_imports': [{'package': name, 'seconds': round(seconds, 4)} for name, seconds in slowest],
+        'budget': {
+            'import_seconds': PERFORMANCE_CONFIG['STARTUP_IMPORT_BUDGET'],
+            'first_hit_seconds': PERFORMANCE_CONFIG['STARTUP_FIRST_HIT_BUDGET'],
+        },
+    }
+
+
+def check_budget(report):
+    """
+    检查测量结果是否超出预算
+
+    返回:
+        list: 问题描述，为空表示通过
+    """
+    problems = []
+    if report['import_seconds'] > report['budget']['import_seconds']:
+        problems.append(f"导入服务模块耗时 {report['import_seconds']:.3f}s 超过预算 "
+                        f"{report['budget']['import_seconds']}s")
+    if report['first_hit_seconds'] > report['budget']['first_hit_seconds']:
+        problems.append(f"首个缓存命中请求耗时 {report['first_hit_seconds']:.3f}s 超过预算 "
+                        f"{report['budget']['first_hit_seconds']}s")
+    if report['statuses'] != [200]:
+        problems.append(f"缓存命中请求返回状态码 {report['statuses']}")
+    for name in report['eagerly_loaded']:
+        problems.append(f"{name} 在处理缓存命中请求前已被导入")
+    return problems
+
+
+def print_report(report):
+    """打印启动耗时报告"""
+    print("=" * 60)
+    print(f"服务启动耗时（{report['runs']} 次测量的中位数）")
+    print("=" * 60)
+    print(f"导入服务模块:     {report['import_seconds'] * 1000:8.1f}ms  （预算 {report['budget']['import_seconds'] * 1000:.0f}ms）")
+    print(f"首个缓存命中请求: {report['first_hit_seconds'] * 1000:8.1f}ms  （预算 {report['budget']['first_hit_seconds'] * 1000:.0f}ms）")
+    print("-" * 60)
+    print("导入耗时最多的顶层包:")
+    for item in report['slowest_imports']:
+        print(f"  {item['package']:<40} {item['seconds'] * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='服务启动耗时检查')
+    parser.add_argument('--runs', type=int, default=3, help='测量次数')
+    parser.add_argument('--top', type=int, default=20, help='报告中列出的包数量')
+    parser.add_argument('--output', help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    results = [run_probe() for _ in range(max(1, args.runs))]
+    report = build_report(results, args.top)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+
+    problems = check_budget(report)
+    for problem in problems:
+        print(f"超出预算: {problem}", file=sys.stderr)
+    if not problems:
+        print("✓ 启动耗时在预算内")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
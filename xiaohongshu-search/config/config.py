@@ -47,6 +47,27 @@ SEARCH_CONFIG = {
     'RETRY_DELAY': 2,  # 重试间隔（秒）
 }
 
+# 搜索耗时预算配置：/api/search?timeout_ms=... 到期时返回已提取到的笔记（partial: true），抓取在后台完成并写入缓存
+SEARCH_DEADLINE_CONFIG = {
+    'DEFAULT_TIMEOUT_MS': None,  # 请求未指定timeout_ms时使用的预算，None表示不限制
+    'MIN_TIMEOUT_MS': 500,
+    'MAX_TIMEOUT_MS': 120000,
+    'EXTRACTION_RESERVE_MS': 1500,  # 为提取策略预留的时间，等待页面加载和滚动只使用其余的预算
+}
+
+# 关键词规范化配置：缓存文件名、结果页面和内存缓存都使用规范化后的关键词
+QUERY_NORMALIZATION_CONFIG = {
+    'ENABLED': True,
+    'TRADITIONAL_TO_SIMPLIFIED': True,  # 繁体转简体（安装opencc时使用完整词表，否则使用内置常用字表）
+    'KEEP_SYMBOLS': '+#',  # 不替换为空白的标点和符号（区分 C++、C# 和 C 这类关键词）
+    'ALIASES': {  # 同义词 -> 规范关键词（两侧都会先规范化）
+        '苹果手机': 'iphone',
+        '爱疯': 'iphone',
+        '腕表': '手表',
+    },
+    'ALIASES_FILE': os.path.join(PROJECT_ROOT, 'config', 'query_aliases.json'),  # 可选的补充同义词表（JSON对象）
+}
+
 # ===========================================
 # 爬虫配置
 # ===========================================
@@ -75,6 +96,15 @@ CRAWLER_CONFIG = {
     'ELEMENT_WAIT_TIME': 10,  # 元素等待时间
 }
 
+# 增量补充抓取配置：缓存中的笔记少于请求数量时，从上次抓取的位置继续，只抓取缺少的笔记
+INCREMENTAL_CRAWL_CONFIG = {
+    'ENABLED': True,
+    'FAST_FORWARD_PAUSE': 0.5,  # 快进到上次滚动位置时的停顿时间（秒），这段内容已抓取过，无需等待渲染
+    'DEFAULT_NOTES_PER_SCROLL': 6,  # 缺少历史数据时估计的每次滚动新增笔记数
+    'MAX_EXTRA_SCROLLS': 20,  # 单次补充抓取最多额外滚动次数
+    'END_OF_PAGE_CHECKS': 2,  # 连续多少次滚动页面高度不变视为已到底部
+}
+
 # ===========================================
 # 三种提取策略配置
 # ===========================================
@@ -146,6 +176,95 @@ EXTRACTION_STRATEGIES = {
     }
 }
 
+# 近似重复笔记合并配置：SimHash分段索引查找候选，再用字符n-gram的Jaccard相似度确认
+DEDUP_CONFIG = {
+    'ENABLED': True,
+    'SHINGLE_SIZE': 2,  # 字符n-gram长度（适合中文短标题）
+    'HAMMING_DISTANCE': 3,  # SimHash候选的最大汉明距离，需小于BANDS
+    'BANDS': 4,  # 64位SimHash的分段数，任一分段相同即为候选
+    'SIMILARITY_THRESHOLD': 0.8,  # 确认重复所需的Jaccard相似度
+    'REPOST_SIMILARITY_THRESHOLD': 0.95,  # 两条不同的真实笔记ID（转发）确认重复所需的Jaccard相似度
+    'MIN_TEXT_LENGTH': 6,  # 规范化文本短于该长度时只按笔记ID和封面判断
+    'MAX_COVER_REPEATS': 3,  # 同一批笔记中封面出现超过该次数（或属于多个真实ID）时视为占位图，不按封面判断
+    'HISTORY_SIZE': 5000,  # 跨搜索记住的笔记数量，用于将临时ID替换为真实笔记ID
+}
+
+# 自适应提取配置：按历史命中率排列策略和策略1的选择器，提取到足够笔记后提前结束
+ADAPTIVE_EXTRACTION_CONFIG = {
+    'ENABLED': True,
+    'EARLY_STOP': True,  # 去重后的有效笔记数达到max_results后跳过剩余策略
+    'SCALE_LIMITS': True,  # 策略1每个选择器、策略2最多处理的元素数至少为max_results，单个策略即可提取足够笔记
+    'FULL_RUN_INTERVAL': 20,  # 每隔多少次搜索按配置顺序完整执行所有策略，用于发现页面结构变化
+    'SMOOTHING': 0.3,  # 命中率指数移动平均中新样本的权重
+    'INITIAL_SCORE': 0.5,  # 没有历史记录时的初始得分
+}
+
+# ===========================================
+# 本地全文索引配置
+# ===========================================
+
+# 对抓取过的笔记建立全文索引，缓存未命中时先尝试从索引回答，避免启动浏览器
+NOTE_INDEX_CONFIG = {
+    'ENABLED': True,
+    'ANSWER_FROM_INDEX': True,  # 缓存未命中时是否尝试用索引回答
+    'MIN_COVERAGE': 0.6,  # 新鲜的匹配笔记数达到 max_results 的该比例时才用索引回答
+    'MAX_AGE': 24 * 3600,  # 只使用在该时间（秒）内抓取到的笔记
+    'RETENTION': 30 * 24 * 3600,  # 索引中笔记的保留时间（秒）
+    'EXPORT_BATCH_SIZE': 500,  # 导出时每次从数据库读取的笔记数
+}
+
+# 列式导出（python src/utils/columnar_export.py，需要安装pyarrow）
+COLUMNAR_EXPORT_CONFIG = {
+    'BATCH_SIZE': 5000,  # 每个分区攒够该行数写入一次Parquet（一个row group）
+    'COMPRESSION': 'zstd',  # Parquet压缩算法：zstd、snappy、gzip或none
+}
+
+# ===========================================
+# 序列化配置
+# ===========================================
+
+# 搜索缓存和详情缓存文件的编码，文件头记录编码方式，修改后旧文件仍可读取
+SERIALIZATION_CONFIG = {
+    'CACHE_FORMAT': 'json',  # json（标准库）、orjson或msgpack，未安装时退回json
+    'CACHE_COMPRESSION': None,  # None或'zstd'（需要安装zstandard），未安装时不压缩
+    'ZSTD_LEVEL': 3,
+    'FAST_JSON_RESPONSES': True,  # 搜索和详情接口的响应安装了orjson时用其编码
+}
+
+# ===========================================
+# 笔记详情配置
+# ===========================================
+
+DETAIL_CONFIG = {
+    # 详情缓存配置（笔记内容变化较慢，过期时间长于搜索缓存）
+    'USE_CACHE': True,
+    'CACHE_EXPIRE_TIME': 6 * 3600,  # 详情缓存过期时间（秒）
+    'MEMORY_CACHE_SIZE': 500,  # 内存中保留的详情条数
+    
+    # 页面等待配置
+    'PAGE_WAIT_TIME': 3,  # 打开详情页后的等待时间（秒）
+    
+    # 后台预取配置
+    'PREFETCH_ENABLED': True,
+    'PREFETCH_TOP_N': 5,  # 每次新搜索后预取前N条笔记的详情
+    'PREFETCH_QUEUE_SIZE': 50,  # 预取队列容量，队列满时丢弃新任务
+    'PREFETCH_IDLE_DELAY': 1,  # 交互请求结束后至少空闲多久才开始预取（秒）
+    'PREFETCH_MAX_ATTEMPTS': 3,  # 预取被交互请求抢占时放回队尾，最多尝试的次数
+    
+    # 详情页选择器（按顺序尝试，取第一个非空结果）
+    'SELECTORS': {
+        'TITLE': ['#detail-title', '.note-content .title', '.note-detail .title'],
+        'DESC': ['#detail-desc', '.note-content .desc', '.note-detail .desc'],
+        'AUTHOR': ['.author-wrapper .username', '.author .name', '.user-name'],
+        'PUBLISHED': ['.note-content .date', '.bottom-container .date', '.publish-date'],
+        'IMAGES': ['.swiper-slide img', '.note-slider img', '.media-container img'],
+        'LIKES': ['.interact-container .like-wrapper .count', '.like-wrapper .count'],
+        'COLLECTS': ['.interact-container .collect-wrapper .count', '.collect-wrapper .count'],
+        'COMMENTS': ['.interact-container .chat-wrapper .count', '.chat-wrapper .count'],
+        'SHARES': ['.interact-container .share-wrapper .count', '.share-wrapper .count'],
+    }
+}
+
 # ===========================================
 # 目录配置
 # ===========================================
@@ -154,7 +273,13 @@ DIRECTORIES = {
     'CACHE_DIR': os.path.join(PROJECT_ROOT, 'cache'),
     'TEMP_DIR': os.path.join(PROJECT_ROOT, 'cache', 'temp'),
     'LOGS_DIR': os.path.join(PROJECT_ROOT, 'cache', 'logs'),
+    'PROFILES_DIR': os.path.join(PROJECT_ROOT, 'cache', 'logs', 'profiles'),
+    'DETAILS_DIR': os.path.join(PROJECT_ROOT, 'cache', 'details'),
+    'STATE_DIR': os.path.join(PROJECT_ROOT, 'cache', 'state'),  # 需要跨重启保留的运行状态
+    'ARTIFACTS_DIR': os.path.join(PROJECT_ROOT, 'cache', 'temp', 'artifacts'),  # 页面源码和截图等调试文件
     'COOKIES_DIR': os.path.join(PROJECT_ROOT, 'cache', 'cookies'),
+    'EXPORTS_DIR': os.path.join(PROJECT_ROOT, 'cache', 'exports'),  # 列式导出的数据集
+    'CAPTURES_DIR': os.path.join(PROJECT_ROOT, 'cache', 'captures'),  # 录制的抓取会话（HAR存档）
     'STATIC_DIR': os.path.join(PROJECT_ROOT, 'static'),
     'DRIVERS_DIR': os.path.join(PROJECT_ROOT, 'drivers'),
 }
@@ -168,6 +293,9 @@ FILE_PATHS = {
     'COOKIES_FILE': os.path.join(DIRECTORIES['COOKIES_DIR'], 'xiaohongshu_cookies.json'),
     'STARTUP_LOG': os.path.join(DIRECTORIES['LOGS_DIR'], 'startup.log'),
     'CRAWLER_LOG': os.path.join(DIRECTORIES['LOGS_DIR'], 'crawler.log'),
+    'HOT_KEYWORDS_SNAPSHOT': os.path.join(DIRECTORIES['STATE_DIR'], 'hot_keywords.json'),
+    'EXTRACTION_STATS_SNAPSHOT': os.path.join(DIRECTORIES['STATE_DIR'], 'extraction_stats.json'),
+    'NOTE_INDEX_DB': os.path.join(DIRECTORIES['STATE_DIR'], 'notes_index.sqlite3'),
 }
 
 # ===========================================
@@ -180,7 +308,10 @@ LOGGING_CONFIG = {
     'DATE_FORMAT': '%Y-%m-%d %H:%M:%S',
     'MAX_FILE_SIZE': 10 * 1024 * 1024,  # 10MB
     'BACKUP_COUNT': 5,
-    'ENCODING': 'utf-8'
+    'ENCODING': 'utf-8',
+    'JSON_FORMAT': True,  # 日志文件每行一个JSON对象（包含搜索关联ID search_id），控制台仍使用FORMAT
+    'PER_ELEMENT_BURST': 3,  # 逐元素日志：每次搜索每个代码位置完整输出的条数
+    'PER_ELEMENT_SAMPLE': 20,  # 超出后每多少条输出一条，0表示不再输出
 }
 
 # ===========================================
@@ -190,6 +321,7 @@ LOGGING_CONFIG = {
 URLS = {
     'XIAOHONGSHU_BASE': 'https://www.xiaohongshu.com',
     'SEARCH_URL_TEMPLATE': 'https://www.xiaohongshu.com/search_result?keyword={keyword}&source=web_search&type=comprehensive',
+    'NOTE_DETAIL_URL_TEMPLATE': 'https://www.xiaohongshu.com/explore/{note_id}',
     'LOGIN_URL': 'https://www.xiaohongshu.com/login',
     'API_BASE': '/api'
 }
@@ -208,14 +340,82 @@ SECURITY_CONFIG = {
     'CAPTCHA_HANDLING': False  # 暂不支持
 }
 
+# ===========================================
+# 抓取调度配置
+# ===========================================
+
+# 页面加载速率使用SECURITY_CONFIG['RATE_LIMIT']和SEARCH_CONFIG['REQUEST_DELAY']
+CRAWL_SCHEDULER_CONFIG = {
+    'INTERACTIVE_MAX_QUEUE': 5,  # 排队中的交互抓取数量上限，超过时返回429
+    'INTERACTIVE_MAX_WAIT': 90,  # 预计等待时间上限（秒），超过时返回429
+    'INITIAL_CRAWL_TIME': 20,  # 单次抓取耗时的初始估计（秒），之后按实际耗时更新
+    'BACKGROUND_RESERVE': 0.5,  # 令牌余量低于该比例时，预取和预热让出额度给交互请求
+}
+
+# ===========================================
+# Cookie配置
+# ===========================================
+
+# 所有爬虫实例共用一个cookie管理器（src/utils/cookie_manager.py），cookie文件变化时推送到各个浏览器和HTTP会话
+COOKIE_CONFIG = {
+    'WATCH_ENABLED': True,  # 是否监视cookie文件（其他进程写入时自动重新加载）
+    'WATCH_INTERVAL': 2,  # 检查cookie文件是否变化的间隔（秒）
+}
+
 # ===========================================
 # 模拟数据配置
 # ===========================================
 
+# 设置环境变量 XIAOHONGSHU_MOCK_MODE=data 或 page 可在不修改配置的情况下启用模拟后端（用于压测）
+_MOCK_MODE_ENV = os.environ.get('XIAOHONGSHU_MOCK_MODE', '').strip().lower()
+
 MOCK_DATA_CONFIG = {
-    'ENABLE_MOCK': False,  # 是否启用模拟数据
+    'ENABLE_MOCK': bool(_MOCK_MODE_ENV),  # 是否启用模拟数据
+    'MOCK_MODE': _MOCK_MODE_ENV or 'data',  # data: 不启动浏览器直接生成笔记；page: 浏览器访问本地模拟搜索页
     'MOCK_DELAY': 0.1,  # 模拟请求延迟
     'MOCK_SUCCESS_RATE': 0.95,  # 模拟成功率
+    'MOCK_PAGE': os.path.join(PROJECT_ROOT, 'static', 'mock', 'search_result.html'),  # 本地模拟搜索页
+}
+
+# ===========================================
+# 录制与回放配置
+# ===========================================
+
+# 设置环境变量 XIAOHONGSHU_CAPTURE=1 时，Selenium搜索期间收到的文档、XHR和脚本响应录制为HAR存档（cache/captures/），
+# 录制需要读取performance日志和每个响应的内容，会增加搜索耗时，只用于采集测试数据
+# 设置环境变量 XIAOHONGSHU_REPLAY_URL（如 http://127.0.0.1:8766）时，浏览器打开回放服务器（benchmarks/replay_server.py）上的搜索页
+CAPTURE_CONFIG = {
+    'ENABLED': os.environ.get('XIAOHONGSHU_CAPTURE', '').strip() == '1',
+    'RESOURCE_TYPES': ['Document', 'XHR', 'Fetch', 'Script'],  # 录制响应内容的资源类型
+    'MAX_BODY_SIZE': 5 * 1024 * 1024,  # 超过该大小（字节）的响应只记录元数据
+    'REPLAY_BASE_URL': os.environ.get('XIAOHONGSHU_REPLAY_URL', '').strip().rstrip('/'),
+    # 存档由后台线程gzip压缩写入，保留策略同调试文件
+    'MODE': 'always',
+    'QUEUE_SIZE': 4,
+    'COMPRESS': True,
+    'COMPRESS_LEVEL': 6,
+    'MAX_FILES': 100,
+    'MAX_TOTAL_SIZE': 1024 * 1024 * 1024,
+    'MAX_AGE': 30 * 24 * 3600,
+}
+
+# ===========================================
+# HTTP抓取配置
+# ===========================================
+
+# 不启动浏览器，直接请求搜索页并解析服务端渲染的初始状态JSON（window.__INITIAL_STATE__）
+# use_selenium=False 时总是先用HTTP抓取；PREFER_HTTP为True时使用Selenium的爬虫也先尝试HTTP
+# 设置环境变量 XIAOHONGSHU_HTTP_BASE_URL 可将请求指向本地替身服务器（如 http://127.0.0.1:8765）
+HTTP_FETCH_CONFIG = {
+    'PREFER_HTTP': False,  # 使用Selenium时是否也先尝试HTTP抓取
+    'FALLBACK_TO_SELENIUM': True,  # use_selenium=False时，HTTP抓取没有得到笔记是否改用Selenium
+    'BASE_URL': os.environ.get('XIAOHONGSHU_HTTP_BASE_URL', '').rstrip('/') or URLS['XIAOHONGSHU_BASE'],
+    'CONNECT_TIMEOUT': 5,  # 秒
+    'READ_TIMEOUT': 15,  # 秒
+    'POOL_SIZE': 4,  # 连接池大小
+    'MAX_RETRIES': 2,  # 连接失败和5xx响应的重试次数
+    'DISABLE_AFTER_FAILURES': 3,  # 连续多少次没有得到笔记后暂停HTTP抓取
+    'RETRY_AFTER': 600,  # 暂停HTTP抓取的时间（秒），之后再尝试
 }
 
 # ===========================================
@@ -228,6 +428,31 @@ HOT_KEYWORDS = [
     "手表", "鞋子", "数码产品", "家居用品", "美食"
 ]
 
+# 热门关键词统计配置（基于真实搜索流量，数据不足时用HOT_KEYWORDS补齐）
+HOT_KEYWORDS_CONFIG = {
+    'ENABLE_TRACKING': True,
+    'CAPACITY': 500,  # Space-Saving计数器数量，决定内存上限
+    'TOP_K': 15,  # 维护的热门关键词数量
+    'HALF_LIFE': 24 * 3600,  # 查询次数衰减半衰期（秒）
+    'SNAPSHOT_INTERVAL': 60,  # 快照写入最小间隔（秒）
+}
+
+# ===========================================
+# 缓存预热配置
+# ===========================================
+
+CACHE_WARMER_CONFIG = {
+    'ENABLED': True,
+    'TOP_N': 10,  # 预热排名前N的热门关键词
+    'REFRESH_AHEAD': 300,  # 缓存过期前多少秒开始重新抓取
+    'CHECK_INTERVAL': 30,  # 调度检查间隔（秒）
+    'IDLE_DELAY': 5,  # 交互请求结束后至少空闲多久才开始预热（秒）
+    'DAILY_BUDGET': 200,  # 每日最多预热抓取次数
+    'QUIET_HOURS': [],  # 不进行预热的时段（本地小时，左闭右开），如 [(1, 7)] 或跨午夜的 [(23, 6)]
+    'FAILURE_BACKOFF': 1800,  # 预热失败后该关键词的暂停时间（秒）
+    'MAX_RESULTS': SEARCH_CONFIG['DEFAULT_MAX_RESULTS'],
+}
+
 # ===========================================
 # 错误处理配置
 # ===========================================
@@ -239,12 +464,31 @@ ERROR_CONFIG = {
     'MAX_RECOVERY_ATTEMPTS': 3
 }
 
+# 调试文件配置：搜索页面源码和截图的保存策略，压缩和写盘在后台线程完成
+DEBUG_ARTIFACTS_CONFIG = {
+    'MODE': 'sampled',  # always: 每次搜索都保存；sampled: 抽样保存；on_error: 只在出错时保存
+    'SAMPLE_RATE': 0.05,  # sampled模式下的保存比例
+    'SAVE_SCREENSHOT': True,  # 保存页面源码时是否同时保存截图
+    'COMPRESS': True,  # 页面源码以gzip压缩保存
+    'COMPRESS_LEVEL': 6,
+    'QUEUE_SIZE': 16,  # 后台写入队列容量，队列满时丢弃
+    'MAX_FILES': 200,  # 最多保留的文件数
+    'MAX_TOTAL_SIZE': 200 * 1024 * 1024,  # 最多占用的磁盘空间（字节）
+    'MAX_AGE': 7 * 24 * 3600,  # 文件保留时间（秒）
+}
+
 # ===========================================
 # 性能配置
 # ===========================================
 
 PERFORMANCE_CONFIG = {
     'ENABLE_PROFILING': False,
+    'PROFILE_SAMPLE_RATE': 0.01,  # 随机采样分析的请求比例
+    'PROFILE_HEADER': 'X-Debug-Profile',  # 携带该请求头的请求总是进行分析
+    'PROFILE_TOP_FUNCTIONS': 60,  # 文本报告中列出的函数数量
+    'PROFILE_MAX_FILES': 200,  # 保留的分析结果数量
+    'STARTUP_IMPORT_BUDGET': 1.5,  # 秒，导入服务模块（不含Selenium）的耗时上限
+    'STARTUP_FIRST_HIT_BUDGET': 0.5,  # 秒，服务导入后第一个缓存命中请求的耗时上限
     'MAX_MEMORY_USAGE': 1024,  # MB
     'CLEANUP_INTERVAL': 3600,  # 秒
 }
@@ -262,16 +506,32 @@ def get_config(section=None):
     all_config = {
         'APP': APP_CONFIG,
         'SEARCH': SEARCH_CONFIG,
+        'SEARCH_DEADLINE': SEARCH_DEADLINE_CONFIG,
         'CRAWLER': CRAWLER_CONFIG,
+        'INCREMENTAL_CRAWL': INCREMENTAL_CRAWL_CONFIG,
+        'QUERY_NORMALIZATION': QUERY_NORMALIZATION_CONFIG,
         'EXTRACTION_STRATEGIES': EXTRACTION_STRATEGIES,
+        'ADAPTIVE_EXTRACTION': ADAPTIVE_EXTRACTION_CONFIG,
+        'DEDUP': DEDUP_CONFIG,
+        'NOTE_INDEX': NOTE_INDEX_CONFIG,
+        'COLUMNAR_EXPORT': COLUMNAR_EXPORT_CONFIG,
+        'SERIALIZATION': SERIALIZATION_CONFIG,
+        'DETAIL': DETAIL_CONFIG,
         'DIRECTORIES': DIRECTORIES,
         'FILE_PATHS': FILE_PATHS,
         'LOGGING': LOGGING_CONFIG,
         'URLS': URLS,
         'SECURITY': SECURITY_CONFIG,
+        'COOKIE': COOKIE_CONFIG,
+        'CRAWL_SCHEDULER': CRAWL_SCHEDULER_CONFIG,
         'MOCK_DATA': MOCK_DATA_CONFIG,
+        'HTTP_FETCH': HTTP_FETCH_CONFIG,
+        'CAPTURE': CAPTURE_CONFIG,
         'HOT_KEYWORDS': HOT_KEYWORDS,
+        'HOT_KEYWORDS_TRACKING': HOT_KEYWORDS_CONFIG,
+        'CACHE_WARMER': CACHE_WARMER_CONFIG,
         'ERROR': ERROR_CONFIG,
+        'DEBUG_ARTIFACTS': DEBUG_ARTIFACTS_CONFIG,
         'PERFORMANCE': PERFORMANCE_CONFIG
     }
     
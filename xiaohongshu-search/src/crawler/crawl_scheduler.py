@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+抓取调度模块
+统一管理浏览器的使用权和对外页面加载频率
+
+主要功能：
+1. 优先级通道 - 交互请求、详情预取、缓存预热依次排队，高优先级先获得浏览器
+2. 令牌桶限流 - 按SECURITY_CONFIG['RATE_LIMIT']和REQUEST_DELAY限制页面加载
+3. 准入控制 - 交互队列过长或预计等待过久时直接拒绝，由调用方返回429或过期缓存
+"""
+
+import math
+import time
+import logging
+import os
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import SEARCH_CONFIG, SECURITY_CONFIG, CRAWL_SCHEDULER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 优先级通道（按优先级从高到低排列）
+LANE_INTERACTIVE = 'interactive'
+LANE_PREFETCH = 'prefetch'
+LANE_WARMING = 'warming'
+LANES = (LANE_INTERACTIVE, LANE_PREFETCH, LANE_WARMING)
+
+
+class CrawlRejected(Exception):
+    """抓取请求被准入控制拒绝"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """令牌桶（非线程安全，由调度器加锁使用）"""
+
+    def __init__(self, rate, capacity):
+        """
+        初始化令牌桶
+
+        参数:
+            rate (float): 每秒补充的令牌数
+            capacity (float): 令牌桶容量
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now, tokens=1):
+        """获取凑足指定令牌数需要等待的秒数"""
+        self._refill(now)
+        if self.tokens >= tokens:
+            return 0
+        return (tokens - self.tokens) / self.rate
+
+    def consume(self, now, tokens=1):
+        """消耗令牌"""
+        self._refill(now)
+        self.tokens -= tokens
+
+    def fill_ratio(self, now):
+        """获取当前令牌占容量的比例"""
+        self._refill(now)
+        return self.tokens / self.capacity
+
+
+class CrawlScheduler:
+    """
+    浏览器抓取调度器
+
+    同一时间只有一个任务持有浏览器。释放时在等待者中选择优先级最高的通道，
+    同一通道内先到先得。后台通道只以非阻塞方式尝试，交互请求排队时不会被授予。
+    """
+
+    def __init__(self, config=None):
+        """
+        初始化调度器
+
+        参数:
+            config (dict): 调度配置，默认使用CRAWL_SCHEDULER_CONFIG
+        """
+        self.config = config or CRAWL_SCHEDULER_CONFIG
+        rate_limit = SECURITY_CONFIG['RATE_LIMIT']
+        self.request_delay = SEARCH_CONFIG['REQUEST_DELAY']
+
+        # 页面加载限流
+        self._buckets = [
+            TokenBucket(rate_limit['REQUESTS_PER_MINUTE'] / 60, rate_limit['REQUESTS_PER_MINUTE']),
+            TokenBucket(rate_limit['REQUESTS_PER_HOUR'] / 3600, rate_limit['REQUESTS_PER_HOUR']),
+        ]
+        self._rate_lock = threading.Lock()
+        self._last_page_load = 0
+
+        # 浏览器使用权
+        self._cond = threading.Condition()
+        self._queues = {lane: deque() for lane in LANES}
+        self._holder_lane = None
+        self._holder_thread = None
+        self._holder_depth = 0
+        self._acquired_at = 0
+        self._last_interactive_time = 0
+        self._avg_crawl_time = self.config['INITIAL_CRAWL_TIME']
+
+        # 统计信息
+        self.stats = {lane: {'granted': 0, 'rejected': 0, 'page_loads': 0} for lane in LANES}
+
+    # ==================== 浏览器使用权 ====================
+
+    def _next_ticket(self):
+        """获取下一个应被授予使用权的排队凭证"""
+        for lane in LANES:
+            if self._queues[lane]:
+                return self._queues[lane][0]
+        return None
+
+    def _check_admission(self, lane):
+        """交互请求的准入检查（调用方需持有条件锁）"""
+        waiting = len(self._queues[lane])
+        ahead = waiting + (1 if self._holder_lane else 0)
+        estimated_wait = ahead * self._avg_crawl_time + self.rate_limit_wait()
+
+        if waiting >= self.config['INTERACTIVE_MAX_QUEUE'] or estimated_wait > self.config['INTERACTIVE_MAX_WAIT']:
+            self.stats[lane]['rejected'] += 1
+            retry_after = max(1, math.ceil(estimated_wait))
+            logger.warning(f"抓取队列已满，拒绝请求: 排队 {waiting} 个，预计等待 {estimated_wait:.1f} 秒")
+            raise CrawlRejected("抓取请求过多，请稍后重试", retry_after)
+
+    def _has_headroom(self):
+        """令牌余量是否足够分给后台任务"""
+        now = time.monotonic()
+        with self._rate_lock:
+            return all(bucket.fill_ratio(now) >= self.config['BACKGROUND_RESERVE'] for bucket in self._buckets)
+
+    def acquire(self, lane, blocking=True):
+        """
+        获取浏览器使用权
+
+        参数:
+            lane (str): 优先级通道
+            blocking (bool): 是否阻塞等待
+
+        返回:
+            bool: 是否获得使用权（非阻塞时可能为False）
+
+        异常:
+            CrawlRejected: 交互请求未通过准入检查
+        """
+        current = threading.get_ident()
+
+        with self._cond:
+            # 同一线程重入
+            if self._holder_thread == current:
+                self._holder_depth += 1
+                return True
+
+            if lane == LANE_INTERACTIVE:
+                self._check_admission(lane)
+            elif not blocking and (self._holder_lane or self._next_ticket() or not self._has_headroom()):
+                return False
+
+            ticket = object()
+            self._queues[lane].append(ticket)
+            try:
+                while self._holder_lane or self._next_ticket() is not ticket:
+                    if not blocking:
+                        return False
+                    self._cond.wait()
+
+                self._holder_lane = lane
+                self._holder_thread = current
+                self._holder_depth = 1
+                self._acquired_at = time.monotonic()
+                self.stats[lane]['granted'] += 1
+                return True
+            finally:
+                self._queues[lane].remove(ticket)
+                self._cond.notify_all()
+
+    def release(self):
+        """释放浏览器使用权"""
+        with self._cond:
+            if self._holder_thread != threading.get_ident():
+                return
+
+            self._holder_depth -= 1
+            if self._holder_depth > 0:
+                return
+
+            if self._holder_lane == LANE_INTERACTIVE:
+                # 用指数移动平均估计单次抓取耗时，用于准入控制
+                elapsed = time.monotonic() - self._acquired_at
+                self._avg_crawl_time = 0.8 * self._avg_crawl_time + 0.2 * elapsed
+                self._last_interactive_time = time.time()
+
+            self._holder_lane = None
+            self._holder_thread = None
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, lane=LANE_INTERACTIVE):
+        """阻塞获取浏览器使用权的上下文"""
+        self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @contextmanager
+    def try_slot(self, lane):
+        """
+        非阻塞获取浏览器使用权的上下文
+        浏览器被占用、有更高优先级任务排队或令牌余量不足时产出False
+        """
+        acquired = self.acquire(lane, blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release()
+
+    def is_idle(self, idle_delay=0):
+        """
+        判断浏览器是否空闲
+
+        参数:
+            idle_delay (float): 最近一次交互请求结束后要求的空闲时间（秒）
+
+        返回:
+            bool: 没有任务持有或排队且已空闲足够时间时返回True
+        """
+        with self._cond:
+            return (self._holder_lane is None and
+                    not self._queues[LANE_INTERACTIVE] and
+                    time.time() - self._last_interactive_time >= idle_delay)
+
+    def queue_depth(self, lane=LANE_INTERACTIVE):
+        """获取通道中排队的任务数"""
+        with self._cond:
+            return len(self._queues[lane])
+
+    # ==================== 页面加载限流 ====================
+
+    def rate_limit_wait(self):
+        """获取下一次页面加载需要等待的秒数"""
+        now = time.monotonic()
+        with self._rate_lock:
+            wait = max(bucket.wait_time(now) for bucket in self._buckets)
+            return max(wait, self._last_page_load + self.request_delay - now)
+
+    def throttle(self):
+        """在对外页面加载前调用，等待令牌并按请求间隔限速"""
+        lane = self._holder_lane or LANE_INTERACTIVE
+
+        while True:
+            with self._rate_lock:
+                now = time.monotonic()
+                wait = max(bucket.wait_time(now) for bucket in self._buckets)
+                wait = max(wait, self._last_page_load + self.request_delay - now)
+                if wait <= 0:
+                    for bucket in self._buckets:
+                        bucket.consume(now)
+                    self._last_page_load = now
+                    self.stats[lane]['page_loads'] += 1
+                    return
+
+            logger.debug(f"页面加载限流，等待 {wait:.2f} 秒")
+            time.sleep(wait)
+
+    def get_stats(self):
+        """获取调度统计信息"""
+        with self._cond:
+            return {
+                'holder': self._holder_lane,
+                'queue_depth': {lane: len(self._queues[lane]) for lane in LANES},
+                'avg_crawl_time': round(self._avg_crawl_time, 2),
+                'lanes': {lane: dict(stats) for lane, stats in self.stats.items()},
+            }
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+调试文件保存模块
+按策略保存搜索页面源码和截图，压缩和写盘在后台线程完成，不占用搜索耗时
+
+保存策略（DEBUG_ARTIFACTS_CONFIG['MODE']）：
+1. always - 每次搜索都保存
+2. sampled - 按SAMPLE_RATE比例抽样保存
+3. on_error - 只在搜索出错时保存
+任何模式下，出错时都会按ERROR_CONFIG保存错误截图和页面源码。
+
+页面源码以gzip压缩保存（截图本身已是PNG压缩格式，原样保存）。
+每次写入后按文件数、总大小和保留时间清理最旧的文件。
+"""
+
+import gzip
+import time
+import queue
+import random
+import logging
+import os
+import sys
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import DEBUG_ARTIFACTS_CONFIG, DIRECTORIES
+
+logger = logging.getLogger(__name__)
+
+MODE_ALWAYS = 'always'
+MODE_SAMPLED = 'sampled'
+MODE_ON_ERROR = 'on_error'
+
+
+class ArtifactWriter:
+    """
+    调试文件后台写入器
+
+    使用有界队列保存写入任务，队列满时直接丢弃新任务，保证搜索线程不会被磁盘写入阻塞。
+    """
+
+    def __init__(self, config=None, artifacts_dir=None):
+        """
+        初始化写入器
+
+        参数:
+            config (dict): 调试文件配置，默认使用DEBUG_ARTIFACTS_CONFIG
+            artifacts_dir (str): 保存目录，默认使用配置文件设置
+        """
+        self.config = config or DEBUG_ARTIFACTS_CONFIG
+        self.mode = self.config['MODE']
+        if self.mode not in (MODE_ALWAYS, MODE_SAMPLED, MODE_ON_ERROR):
+            raise ValueError(f"未知的调试文件保存模式: {self.mode}")
+
+        self.artifacts_dir = artifacts_dir or DIRECTORIES['ARTIFACTS_DIR']
+        self._queue = queue.Queue(maxsize=self.config['QUEUE_SIZE'])
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # 统计信息
+        self.stats = {'written': 0, 'dropped': 0, 'failed': 0, 'removed': 0, 'bytes_written': 0}
+
+    def should_capture(self):
+        """判断本次搜索是否保存调试文件（出错时另行保存，不受此限制）"""
+        if self.mode == MODE_ALWAYS:
+            return True
+        if self.mode == MODE_SAMPLED:
+            return self._random.random() < self.config['SAMPLE_RATE']
+        return False
+
+    def _start(self):
+        """按需启动写入线程"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='artifact-writer', daemon=True)
+            self._thread.start()
+
+    def submit_text(self, name, text):
+        """
+        提交文本文件（页面源码），按配置gzip压缩后保存
+
+        参数:
+            name (str): 文件名（不含压缩后缀）
+            text (str): 文件内容
+        """
+        if self.config['COMPRESS']:
+            self._submit(f"{name}.gz", text, compress=True)
+        else:
+            self._submit(name, text, compress=False)
+
+    def submit_bytes(self, name, data):
+        """
+        提交二进制文件（截图），原样保存
+
+        参数:
+            name (str): 文件名
+            data (bytes): 文件内容
+        """
+        self._submit(name, data, compress=False)
+
+    def _submit(self, name, data, compress):
+        if not data:
+            return
+        self._start()
+        try:
+            self._queue.put_nowait((name, data, compress))
+        except queue.Full:
+            self.stats['dropped'] += 1
+            logger.debug(f"调试文件写入队列已满，丢弃: {name}")
+
+    def flush(self, timeout=None):
+        """等待队列中的文件写完（用于关闭前）"""
+        deadline = time.time() + timeout if timeout else None
+        while self._queue.unfinished_tasks:
+            if deadline and time.time() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _run(self):
+        """写入线程主循环"""
+        while True:
+            name, data, compress = self._queue.get()
+            try:
+                self._write(name, data, compress)
+                self._enforce_budget()
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.warning(f"保存调试文件失败: {name} - {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, name, data, compress):
+        """写入单个文件（先写临时文件再重命名，避免留下不完整的文件）"""
+        os.makedirs(self.artifacts_dir, exist_ok=True)
+        path = os.path.join(self.artifacts_dir, name)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if compress:
+            data = gzip.compress(data, compresslevel=self.config['COMPRESS_LEVEL'])
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        self.stats['written'] += 1
+        self.stats['bytes_written'] += len(data)
+        logger.debug(f"已保存调试文件: {path}（{len(data)} 字节）")
+
+    def _enforce_budget(self):
+        """按保留时间、文件数和总大小删除最旧的文件"""
+        entries = []
+        for entry in os.scandir(self.artifacts_dir):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        cutoff = time.time() - self.config['MAX_AGE']
+        total_size = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for mtime, size, path in entries:
+            if mtime >= cutoff and count <= self.config['MAX_FILES'] and total_size <= self.config['MAX_TOTAL_SIZE']:
+                break
+            try:
+                os.remove(path)
+                self.stats['removed'] += 1
+            except OSError:
+                pass
+            count -= 1
+            total_size -= size
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+提取策略统计模块
+记录各提取策略和选择器在当前页面结构下的命中率，用于调整执行顺序
+
+实现说明：
+1. 得分 - 每次执行的产出（有效笔记数 / 目标数量，最大为1）的指数移动平均
+2. 排序 - 按得分从高到低，得分相同时保持配置文件中的顺序
+3. 完整执行 - 每隔FULL_RUN_INTERVAL次搜索按配置顺序执行全部策略，
+   让排在后面、平时被跳过的策略也能更新得分，从而发现页面结构变化
+"""
+
+import json
+import time
+import logging
+import os
+import sys
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import ADAPTIVE_EXTRACTION_CONFIG, FILE_PATHS
+
+logger = logging.getLogger(__name__)
+
+# 统计分组
+GROUP_STRATEGY = 'strategy'
+GROUP_SELECTOR = 'selector'
+
+
+class ExtractionStats:
+    """提取策略和选择器的命中率统计"""
+
+    def __init__(self, config=None, snapshot_file=None):
+        """
+        初始化统计
+
+        参数:
+            config (dict): 自适应提取配置，默认使用ADAPTIVE_EXTRACTION_CONFIG
+            snapshot_file (str): 快照文件路径，默认使用配置文件设置
+        """
+        self.config = config or ADAPTIVE_EXTRACTION_CONFIG
+        self.snapshot_file = snapshot_file or FILE_PATHS['EXTRACTION_STATS_SNAPSHOT']
+
+        # 分组 -> {名称: {'score': 得分, 'runs': 执行次数}}
+        self._stats = {GROUP_STRATEGY: {}, GROUP_SELECTOR: {}}
+        self._searches = 0
+        self._lock = threading.Lock()
+
+        self.load_snapshot()
+
+    @property
+    def enabled(self):
+        return self.config['ENABLED']
+
+    def begin_search(self):
+        """
+        开始一次提取，判断本次是否需要完整执行
+
+        返回:
+            bool: 需要按配置顺序完整执行所有策略时返回True
+        """
+        with self._lock:
+            self._searches += 1
+            if not self.enabled:
+                return True
+            # 第一次搜索没有历史数据，也按完整执行处理
+            return self._searches == 1 or self._searches % self.config['FULL_RUN_INTERVAL'] == 0
+
+    def score(self, group, name):
+        """获取得分，没有历史记录时返回初始得分"""
+        entry = self._stats[group].get(name)
+        return entry['score'] if entry else self.config['INITIAL_SCORE']
+
+    def ordered(self, group, names):
+        """
+        按得分排列候选项
+
+        参数:
+            group (str): 统计分组
+            names (list): 按配置顺序排列的候选项
+
+        返回:
+            list: 按得分从高到低排列的候选项（得分相同时保持原顺序）
+        """
+        if not self.enabled:
+            return list(names)
+        with self._lock:
+            return sorted(names, key=lambda name: -self.score(group, name))
+
+    def record(self, group, name, valid_count, target):
+        """
+        记录一次执行结果
+
+        参数:
+            group (str): 统计分组
+            name (str): 策略名或选择器
+            valid_count (int): 产出的有效笔记数
+            target (int): 目标笔记数
+        """
+        sample = min(valid_count / target, 1.0) if target else float(valid_count > 0)
+        smoothing = self.config['SMOOTHING']
+
+        with self._lock:
+            entry = self._stats[group].get(name)
+            if entry is None:
+                self._stats[group][name] = {'score': sample, 'runs': 1}
+            else:
+                entry['score'] = (1 - smoothing) * entry['score'] + smoothing * sample
+                entry['runs'] += 1
+
+    def get_stats(self):
+        """获取统计信息"""
+        with self._lock:
+            return {
+                'searches': self._searches,
+                'strategies': {name: dict(entry) for name, entry in self._stats[GROUP_STRATEGY].items()},
+                'selectors': {name: dict(entry) for name, entry in self._stats[GROUP_SELECTOR].items()},
+            }
+
+    def save_snapshot(self):
+        """将统计原子写入快照文件"""
+        with self._lock:
+            snapshot = {
+                'saved_at': time.time(),
+                'searches': self._searches,
+                'stats': {group: {name: dict(entry) for name, entry in entries.items()}
+                          for group, entries in self._stats.items()},
+            }
+
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+            temp_file = f"{self.snapshot_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(temp_file, self.snapshot_file)
+            logger.debug(f"提取策略统计已保存: {self.snapshot_file}")
+        except Exception as e:
+            logger.warning(f"保存提取策略统计失败: {str(e)}")
+
+    def load_snapshot(self):
+        """从快照文件恢复统计"""
+        if not os.path.exists(self.snapshot_file):
+            return False
+
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+
+            with self._lock:
+                for group in self._stats:
+                    self._stats[group] = {
+                        name: {'score': float(entry['score']), 'runs': int(entry['runs'])}
+                        for name, entry in snapshot['stats'].get(group, {}).items()
+                    }
+                self._searches = snapshot.get('searches', 0)
+
+            logger.info(f"已恢复提取策略统计: {len(self._stats[GROUP_STRATEGY])} 个策略，"
+                        f"{len(self._stats[GROUP_SELECTOR])} 个选择器")
+            return True
+        except Exception as e:
+            logger.warning(f"加载提取策略统计失败: {str(e)}")
+            return False
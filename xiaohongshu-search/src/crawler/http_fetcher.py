@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTTP抓取模块
+不启动浏览器，直接请求搜索页并解析服务端渲染的初始状态JSON，一次搜索只需一次HTTP请求
+
+实现说明：
+1. 连接复用 - 使用带连接池的requests.Session，携带爬虫加载的cookie和与Chrome一致的User-Agent
+2. 解析 - 从页面中找到 window.__INITIAL_STATE__ 赋值，将JS的undefined替换为null后按JSON解析，
+   从 search.feeds 中取出笔记卡片（兼容Vue ref包装的 _rawValue/_value）
+3. 熔断 - 连续DISABLE_AFTER_FAILURES次没有得到笔记（被重定向到登录页、页面改为客户端渲染等）后，
+   暂停HTTP抓取RETRY_AFTER秒，期间直接使用Selenium，避免每次搜索多一次无效请求
+"""
+
+import re
+import json
+import time
+import logging
+import os
+import sys
+import threading
+from urllib.parse import quote
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import HTTP_FETCH_CONFIG, CRAWLER_CONFIG, URLS
+from src.crawler.note_detail import parse_count
+from src.crawler.note_model import Note
+
+logger = logging.getLogger(__name__)
+
+_STATE_PATTERN = re.compile(r'window\.__INITIAL_STATE__\s*=\s*')
+_SCRIPT_END_PATTERN = re.compile(r'</script>', re.IGNORECASE)
+# JS对象字面量中作为值出现的undefined
+_UNDEFINED_PATTERN = re.compile(r'(?<=[:\[,])\s*undefined(?=\s*[,}\]])')
+
+# 被重定向到这些页面说明cookie失效或触发了验证
+_BLOCKED_PATHS = ('/login', '/website-login', '/captcha')
+
+
+def _user_agent():
+    """取Chrome启动参数中的User-Agent，使HTTP请求与浏览器一致"""
+    for option in CRAWLER_CONFIG['CHROME_OPTIONS']:
+        if option.startswith('--user-agent='):
+            return option[len('--user-agent='):]
+    return 'Mozilla/5.0'
+
+
+def _unwrap(value):
+    """取出Vue ref包装的值"""
+    while isinstance(value, dict) and ('_rawValue' in value or '_value' in value):
+        value = value.get('_rawValue', value.get('_value'))
+    return value
+
+
+def parse_initial_state(page_source):
+    """
+    解析页面中的初始状态JSON
+
+    参数:
+        page_source (str): 页面源码
+
+    返回:
+        dict: 初始状态，页面中没有或无法解析时返回None
+    """
+    match = _STATE_PATTERN.search(page_source or '')
+    if not match:
+        return None
+
+    end = _SCRIPT_END_PATTERN.search(page_source, match.end())
+    script = page_source[match.end():end.start() if end else len(page_source)]
+    script = _UNDEFINED_PATTERN.sub('null', script)
+    try:
+        state, _ = json.JSONDecoder().raw_decode(script.strip())
+    except ValueError as e:
+        logger.warning(f"解析初始状态JSON失败: {str(e)}")
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def notes_from_state(state, max_results=None):
+    """
+    从初始状态中取出搜索结果笔记
+
+    参数:
+        state (dict): 初始状态
+        max_results (int): 最大结果数量，None表示不限制
+
+    返回:
+        list: 笔记列表，字段与Selenium抓取结果一致
+    """
+    search = _unwrap(state.get('search')) or {}
+    feeds = _unwrap(search.get('feeds')) or []
+
+    notes = []
+    for item in feeds:
+        item = _unwrap(item)
+        if not isinstance(item, dict) or item.get('modelType', 'note') != 'note':
+            continue
+        card = item.get('noteCard') or item.get('note_card') or {}
+        note_id = item.get('id') or card.get('noteId')
+        if not note_id:
+            continue
+
+        user = card.get('user') or {}
+        cover = card.get('cover') or {}
+        interact = card.get('interactInfo') or card.get('interact_info') or {}
+        title = (card.get('displayTitle') or card.get('title') or '').strip() or f"小红书笔记_{note_id}"
+
+        url = URLS['NOTE_DETAIL_URL_TEMPLATE'].format(note_id=note_id)
+        if item.get('xsecToken'):
+            url += f"?xsec_token={quote(item['xsecToken'])}&xsec_source=pc_search"
+
+        notes.append(Note(
+            id=note_id,
+            title=title[:100],
+            desc=(card.get('desc') or title)[:100],
+            author=user.get('nickname') or user.get('nickName') or user.get('nick_name') or "小红书用户",
+            cover=cover.get('urlDefault') or cover.get('url') or cover.get('urlPre') or "",
+            url=url,
+            likes=parse_count(str(interact.get('likedCount') or '')),
+            comments=parse_count(str(interact.get('commentCount') or '')),
+            collects=parse_count(str(interact.get('collectedCount') or '')),
+            shares=parse_count(str(interact.get('shareCount') or ''))
+        ))
+        if max_results and len(notes) >= max_results:
+            break
+    return notes
+
+
+class HttpFetcher:
+    """
+    搜索页HTTP抓取器
+
+    多个线程可以共用一个实例（requests.Session的连接池是线程安全的）。
+    """
+
+    def __init__(self, cookies=None, config=None):
+        """
+        初始化抓取器
+
+        参数:
+            cookies (list): Selenium格式的cookie列表（name、value、domain、path）
+            config (dict): HTTP抓取配置，默认使用HTTP_FETCH_CONFIG
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.config = config or HTTP_FETCH_CONFIG
+        self.base_url = self.config['BASE_URL']
+        self.timeout = (self.config['CONNECT_TIMEOUT'], self.config['READ_TIMEOUT'])
+
+        retry = Retry(total=self.config['MAX_RETRIES'], backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=self.config['POOL_SIZE'],
+                              pool_maxsize=self.config['POOL_SIZE'], max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': _user_agent(),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9',
+            'Referer': URLS['XIAOHONGSHU_BASE'] + '/',
+        })
+        self.set_cookies(cookies or [])
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._disabled_until = 0
+
+        # 统计信息
+        self.stats = {'requests': 0, 'parsed': 0, 'failures': 0, 'skipped': 0}
+
+    def set_cookies(self, cookies):
+        """用新的cookie替换会话中的cookie（整体替换cookie容器，进行中的请求不会看到一半新一半旧的cookie）"""
+        from requests.cookies import RequestsCookieJar
+
+        jar = RequestsCookieJar()
+        for cookie in cookies:
+            if cookie.get('name') and cookie.get('value') is not None:
+                jar.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+        self.session.cookies = jar
+
+    @property
+    def available(self):
+        """是否可以尝试HTTP抓取（连续失败后暂停一段时间）"""
+        if time.time() >= self._disabled_until:
+            return True
+        self.stats['skipped'] += 1
+        return False
+
+    def search_url(self, keyword):
+        """生成搜索页URL（BASE_URL指向替身服务器时替换域名）"""
+        url = URLS['SEARCH_URL_TEMPLATE'].format(keyword=quote(keyword))
+        return self.base_url + url[len(URLS['XIAOHONGSHU_BASE']):]
+
+    def fetch_search_page(self, keyword):
+        """
+        请求搜索页
+
+        参数:
+            keyword (str): 搜索关键词
+
+        返回:
+            str: 页面源码
+
+        异常:
+            requests.RequestException: 请求失败、响应状态码不是200或被重定向到登录/验证页
+        """
+        import requests
+
+        self.stats['requests'] += 1
+        response = self.session.get(self.search_url(keyword), timeout=self.timeout)
+        response.raise_for_status()
+        if any(path in response.url for path in _BLOCKED_PATHS):
+            raise requests.RequestException(f"被重定向到登录或验证页: {response.url}")
+        # 未声明编码时requests按ISO-8859-1解码，小红书页面为UTF-8
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            response.encoding = 'utf-8'
+        return response.text
+
+    def record_result(self, success):
+        """
+        记录一次抓取结果，连续失败达到DISABLE_AFTER_FAILURES次时暂停HTTP抓取
+
+        参数:
+            success (bool): 是否从页面中得到了笔记
+        """
+        with self._lock:
+            if success:
+                self.stats['parsed'] += 1
+                self._failures = 0
+                return
+            self.stats['failures'] += 1
+            self._failures += 1
+            if self._failures >= self.config['DISABLE_AFTER_FAILURES']:
+                self._failures = 0
+                self._disabled_until = time.time() + self.config['RETRY_AFTER']
+                logger.warning(f"HTTP抓取连续 {self.config['DISABLE_AFTER_FAILURES']} 次没有得到笔记，"
+                               f"暂停 {self.config['RETRY_AFTER']} 秒，期间使用Selenium")
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
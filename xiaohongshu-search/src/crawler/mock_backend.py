@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+模拟抓取后端
+按MOCK_DATA_CONFIG的设置代替小红书网站，用于压测和本地调试
+
+两种模式：
+1. data - 不启动浏览器，直接生成笔记数据，用于压测API层
+2. page - 浏览器访问本地模拟搜索页，完整执行页面加载和三种提取策略
+
+同一关键词生成的笔记固定不变，便于区分缓存命中和重新抓取的结果。
+render_initial_state_page 生成带服务端渲染初始状态JSON的搜索页，作为HTTP抓取的本地替身页面。
+"""
+
+import html
+import json
+import time
+import random
+import logging
+import hashlib
+import os
+import sys
+from pathlib import Path
+from string import Template
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import MOCK_DATA_CONFIG, DIRECTORIES, URLS
+from src.crawler.note_model import Note
+
+logger = logging.getLogger(__name__)
+
+MOCK_MODE_DATA = 'data'
+MOCK_MODE_PAGE = 'page'
+
+# 模拟笔记标题后缀和作者
+TITLE_SUFFIXES = [
+    '真实测评', '避坑指南', '开箱分享', '平价替代推荐', '新手入门攻略',
+    '使用一个月后的感受', '好物清单', '值不值得买', '细节图合集', '购买前必看',
+    '学生党预算方案', '全网最全对比', '日常搭配', '小众宝藏', '保姆级教程',
+]
+AUTHORS = [
+    '爱分享的小鹿', '测评君', '生活家阿木', '种草机', '省钱小能手',
+    '周末研究所', '好物观察员', '慢生活日记', '数码小白', '精致穷鬼',
+]
+
+
+def generate_mock_notes(keyword, count):
+    """
+    生成关键词对应的模拟笔记
+
+    参数:
+        keyword (str): 搜索关键词
+        count (int): 笔记数量
+
+    返回:
+        list: 笔记列表，字段与真实抓取结果一致
+    """
+    rng = random.Random(keyword)
+    notes = []
+    for i in range(count):
+        note_id = hashlib.md5(f"{keyword}:{i}".encode()).hexdigest()[:24]
+        title = f"{keyword}{TITLE_SUFFIXES[(i + rng.randrange(len(TITLE_SUFFIXES))) % len(TITLE_SUFFIXES)]}"
+        notes.append(Note(
+            id=note_id,
+            title=title,
+            desc=title,
+            author=rng.choice(AUTHORS),
+            cover="",
+            url=URLS['NOTE_DETAIL_URL_TEMPLATE'].format(note_id=note_id),
+            likes=rng.randint(100, 10000),
+            comments=rng.randint(10, 500),
+            collects=rng.randint(50, 2000),
+            shares=rng.randint(5, 200)
+        ))
+    return notes
+
+
+def render_initial_state_page(keyword, count):
+    """
+    生成带 window.__INITIAL_STATE__ 的模拟搜索页（HTTP抓取的本地替身页面）
+
+    状态结构与小红书网页一致：笔记卡片位于Vue ref包装的 search.feeds 中，并含有JS的undefined值。
+
+    参数:
+        keyword (str): 搜索关键词
+        count (int): 笔记数量
+
+    返回:
+        str: 页面HTML
+    """
+    feeds = []
+    for note in generate_mock_notes(keyword, count):
+        feeds.append({
+            'id': note['id'],
+            'modelType': 'note',
+            'xsecToken': f"mock{note['id'][:8]}",
+            'noteCard': {
+                'type': 'normal',
+                'displayTitle': note['title'],
+                'user': {'nickname': note['author'], 'userId': note['id'][::-1]},
+                'cover': {'urlDefault': note['cover']},
+                'interactInfo': {'liked': False, 'likedCount': str(note['likes'])},
+            },
+        })
+    state = {'global': {'appSettings': {}}, 'search': {'searchValue': keyword, 'feeds': {'_rawValue': feeds}}}
+    state_js = json.dumps(state, ensure_ascii=False).replace('"appSettings": {}', '"appSettings": undefined')
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(keyword)} - 小红书搜索</title></head>'
+            f'<body><div id="app"></div><script>window.__INITIAL_STATE__={state_js}</script></body></html>')
+
+
+class MockBackend:
+    """模拟抓取后端"""
+
+    def __init__(self, config=None):
+        """
+        初始化模拟后端
+
+        参数:
+            config (dict): 模拟配置，默认使用MOCK_DATA_CONFIG
+        """
+        self.config = config or MOCK_DATA_CONFIG
+        self.mode = self.config['MOCK_MODE']
+        if self.mode not in (MOCK_MODE_DATA, MOCK_MODE_PAGE):
+            raise ValueError(f"未知的模拟模式: {self.mode}")
+
+        self.pages_dir = os.path.join(DIRECTORIES['TEMP_DIR'], 'mock')
+        self._random = random.Random()
+
+        # 统计信息
+        self.stats = {'searches': 0, 'failures': 0, 'details': 0}
+
+        logger.info(f"已启用模拟抓取后端，模式: {self.mode}")
+
+    @property
+    def uses_browser(self):
+        """是否需要浏览器"""
+        return self.mode == MOCK_MODE_PAGE
+
+    def _simulate_request(self):
+        """模拟一次上游请求的延迟和成功率，返回是否成功"""
+        time.sleep(self.config['MOCK_DELAY'])
+        if self._random.random() < self.config['MOCK_SUCCESS_RATE']:
+            return True
+        self.stats['failures'] += 1
+        return False
+
+    def search(self, keyword, max_results, offset=0):
+        """
+        模拟搜索（data模式）
+
+        参数:
+            keyword (str): 搜索关键词
+            max_results (int): 最大结果数量
+            offset (int): 跳过前面已抓取过的笔记数（模拟增量补充抓取）
+
+        返回:
+            list: 笔记列表，模拟失败时返回空列表
+        """
+        self.stats['searches'] += 1
+        if not self._simulate_request():
+            logger.warning(f"模拟搜索失败: {keyword}")
+            return []
+        return generate_mock_notes(keyword, max_results)[offset:]
+
+    def search_page_url(self, keyword, max_results):
+        """
+        生成关键词的本地模拟搜索页（page模式）
+
+        参数:
+            keyword (str): 搜索关键词
+            max_results (int): 页面中的笔记数量
+
+        返回:
+            str: 模拟搜索页的file:// URL，模拟失败时页面中没有笔记
+        """
+        self.stats['searches'] += 1
+        notes = generate_mock_notes(keyword, max_results) if self._simulate_request() else []
+
+        with open(self.config['MOCK_PAGE'], 'r', encoding='utf-8') as f:
+            template = Template(f.read())
+
+        if notes:
+            note_items = '\n'.join(self._render_note_item(i, note) for i, note in enumerate(notes))
+        else:
+            note_items = '        <div class="empty">没有找到相关内容</div>'
+
+        os.makedirs(self.pages_dir, exist_ok=True)
+        page_path = os.path.join(self.pages_dir, f"search_{hashlib.md5(keyword.encode()).hexdigest()}.html")
+        with open(page_path, 'w', encoding='utf-8') as f:
+            f.write(template.safe_substitute(keyword=html.escape(keyword), note_items=note_items))
+
+        return Path(page_path).resolve().as_uri()
+
+    @staticmethod
+    def _render_note_item(index, note):
+        """渲染单条笔记卡片"""
+        note_path = f"/explore/{note['id']}"
+        return f'''        <section class="note-item" data-index="{index}">
+          <div>
+            <a class="cover ld mask" href="{note_path}"><img src="{note['cover']}" alt=""></a>
+            <div class="footer">
+              <a class="title" href="{note_path}"><span>{html.escape(note['title'])}</span></a>
+              <div class="card-bottom-wrapper">
+                <a class="author" href="/user/profile/{note['id']}"><span class="name">{html.escape(note['author'])}</span></a>
+                <span class="like-wrapper"><span class="count">{note['likes']}</span></span>
+              </div>
+            </div>
+          </div>
+        </section>'''
+
+    def note_detail(self, note_id, summary=None):
+        """
+        模拟获取笔记详情
+
+        参数:
+            note_id (str): 笔记ID
+            summary (Note): 搜索结果中的笔记摘要
+
+        返回:
+            Note: 笔记详情，模拟失败时返回None
+        """
+        self.stats['details'] += 1
+        if not self._simulate_request():
+            logger.warning(f"模拟获取笔记详情失败: {note_id}")
+            return None
+
+        summary = summary or {}
+        rng = random.Random(note_id)
+        title = summary.get('title') or f"小红书笔记_{note_id}"
+        desc = f"{title}\n这是模拟后端生成的笔记正文，用于压测和本地调试。"
+        return Note(
+            id=note_id,
+            title=title,
+            desc=desc,
+            author=summary.get('author') or rng.choice(AUTHORS),
+            cover=summary.get('cover', ''),
+            url=summary.get('url') or URLS['NOTE_DETAIL_URL_TEMPLATE'].format(note_id=note_id),
+            likes=summary.get('likes') or rng.randint(100, 10000),
+            comments=summary.get('comments') or rng.randint(10, 500),
+            collects=summary.get('collects') or rng.randint(50, 2000),
+            shares=summary.get('shares') or rng.randint(5, 200),
+            published=time.strftime('%Y-%m-%d', time.localtime(time.time() - rng.randint(0, 90) * 86400)),
+            content=html.escape(desc).replace('\n', '<br>')
+        )
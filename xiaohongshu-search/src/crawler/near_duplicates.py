@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+近似重复笔记检测模块
+合并不同策略提取到的同一张笔记卡片，以及内容几乎相同的转发笔记
+
+实现说明：
+1. 指纹 - 规范化后的标题和描述取字符n-gram，计算64位SimHash；封面URL去掉参数后单独比较
+2. 查找 - SimHash按BANDS分段建立索引，汉明距离不超过HAMMING_DISTANCE的指纹至少有一段相同，
+   只需比较同段的候选，查找开销与已索引笔记数无关
+3. 确认 - 候选再用n-gram集合的Jaccard相似度确认，避免SimHash误判；两条不同的真实笔记ID（转发）
+   需达到更高的REPOST_SIMILARITY_THRESHOLD，封面相同只在至少一方为临时ID时才算重复
+4. 占位封面 - 同一批笔记中属于多个真实ID或出现次数超过MAX_COVER_REPEATS的封面视为占位图，
+   本批笔记不按这些封面判断（历史索引只在查找本批笔记时忽略，不长期保留）
+5. 合并 - 优先保留带真实笔记ID和有效URL的一条，其余字段取更完整的值
+"""
+
+import re
+import hashlib
+import logging
+import os
+import sys
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from urllib.parse import urlsplit, urlunsplit
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import DEDUP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+
+# 提取失败时使用的占位值
+PLACEHOLDER_AUTHOR = '小红书用户'
+PLACEHOLDER_TITLE_PREFIX = '小红书笔记_'
+
+# 策略1/3在找不到链接时生成的临时ID，如 s1_0_3、s3_12
+_SYNTHETIC_ID_PATTERN = re.compile(r'^s\d+_')
+
+
+def is_synthetic_id(note_id):
+    """判断是否为提取策略生成的临时ID"""
+    return not note_id or bool(_SYNTHETIC_ID_PATTERN.match(note_id))
+
+
+def normalize_text(text):
+    """规范化文本：全半角统一、忽略大小写，只保留文字和数字"""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ''.join(ch for ch in text if ch.isalnum())
+
+
+def normalize_cover(url):
+    """规范化封面URL：去掉查询参数和锚点，无效地址返回空字符串"""
+    if not url or url.startswith(('data:', 'blob:')):
+        return ''
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+
+
+def shared_covers(notes, config=None):
+    """
+    找出一批笔记中的占位封面
+
+    参数:
+        notes (list): 笔记
+        config (dict): 去重配置，默认使用DEDUP_CONFIG
+
+    返回:
+        set: 属于多个真实笔记ID或出现次数超过MAX_COVER_REPEATS的规范化封面URL
+    """
+    config = config or DEDUP_CONFIG
+    counts = Counter()
+    real_ids = defaultdict(set)
+    for note in notes:
+        cover = normalize_cover(note.get('cover', ''))
+        if cover:
+            counts[cover] += 1
+            if not is_synthetic_id(note['id']):
+                real_ids[cover].add(note['id'])
+    return {cover for cover, count in counts.items()
+            if count > config['MAX_COVER_REPEATS'] or len(real_ids[cover]) > 1}
+
+
+def shingles(text, size):
+    """字符n-gram集合"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def simhash(features):
+    """计算特征集合的64位SimHash"""
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _richer_text(a, b):
+    """取两段文本中更完整的一段（占位标题视为空）"""
+    a = '' if (a or '').startswith(PLACEHOLDER_TITLE_PREFIX) else (a or '')
+    b = '' if (b or '').startswith(PLACEHOLDER_TITLE_PREFIX) else (b or '')
+    return a if len(a) >= len(b) else b
+
+
+def merge_notes(first, second):
+    """
+    合并两条重复笔记
+
+    参数:
+        first (Note): 先出现的笔记
+        second (Note): 后出现的笔记
+
+    返回:
+        Note: 合并后的笔记，ID和URL来自带真实ID的一条，其余字段取更完整的值
+    """
+    primary, other = first, second
+    first_synthetic, second_synthetic = is_synthetic_id(first['id']), is_synthetic_id(second['id'])
+    if first_synthetic != second_synthetic:
+        swap = first_synthetic
+    else:
+        # ID类型相同时才按是否有URL选择
+        swap = not first.get('url') and bool(second.get('url'))
+    if swap:
+        primary, other = second, first
+
+    merged = primary.copy()
+    merged['url'] = primary.get('url') or other.get('url', '')
+    merged['title'] = _richer_text(primary.get('title'), other.get('title')) or primary.get('title', '')
+    merged['desc'] = _richer_text(primary.get('desc'), other.get('desc')) or primary.get('desc', '')
+    merged['content'] = _richer_text(primary.get('content'), other.get('content'))
+    merged['cover'] = primary.get('cover') or other.get('cover', '')
+    merged['published'] = primary.get('published') or other.get('published', '')
+
+    if primary.get('author', PLACEHOLDER_AUTHOR) == PLACEHOLDER_AUTHOR and other.get('author'):
+        merged['author'] = other['author']
+    if len(other.get('images') or []) > len(primary.get('images') or []):
+        merged['images'] = other['images']
+    return merged
+
+
+class NearDuplicateIndex:
+    """
+    笔记指纹索引
+
+    按真实笔记ID、封面URL和SimHash分段三种方式索引，
+    容量有限时按加入顺序淘汰最早的笔记。调用方负责串行访问。
+    ignored_covers中的占位封面不参与索引和查找：构造时传入的对整个索引有效，
+    传给find、add、update、remember的只对该次调用有效。
+    """
+
+    def __init__(self, config=None, capacity=None, ignored_covers=()):
+        """
+        初始化索引
+
+        参数:
+            config (dict): 去重配置，默认使用DEDUP_CONFIG
+            capacity (int): 最多保存的笔记数，None表示不限制
+            ignored_covers (set): 不按封面判断重复的规范化封面URL（见shared_covers）
+        """
+        self.config = config or DEDUP_CONFIG
+        self.capacity = capacity
+        self.bands = self.config['BANDS']
+        self.band_bits = SIMHASH_BITS // self.bands
+        if self.config['HAMMING_DISTANCE'] >= self.bands:
+            raise ValueError("HAMMING_DISTANCE必须小于BANDS，否则分段索引会漏掉候选")
+
+        self._entries = OrderedDict()  # key -> (note, shingles, fingerprint, cover)
+        self._ids = {}
+        self._covers = {}
+        self._ignored_covers = frozenset(ignored_covers)
+        self._band_index = defaultdict(set)
+        self._next_key = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _fingerprint(self, note, ignored_covers=()):
+        """计算笔记的 (n-gram集合, SimHash, 规范化封面)，文本过短时SimHash为None，占位封面为空字符串"""
+        text = normalize_text(note.get('title', ''))
+        desc = normalize_text(note.get('desc', ''))
+        if desc and desc != text:
+            text += desc
+
+        grams = shingles(text, self.config['SHINGLE_SIZE'])
+        fingerprint = simhash(grams) if len(text) >= self.config['MIN_TEXT_LENGTH'] else None
+        cover = normalize_cover(note.get('cover', ''))
+        if cover in self._ignored_covers or cover in ignored_covers:
+            cover = ''
+        return grams, fingerprint, cover
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def _index(self, key, note, ignored_covers=()):
+        grams, fingerprint, cover = self._fingerprint(note, ignored_covers)
+        self._entries[key] = (note, grams, fingerprint, cover)
+        if not is_synthetic_id(note['id']):
+            self._ids[note['id']] = key
+        if cover:
+            self._covers[cover] = key
+        if fingerprint is not None:
+            for band_key in self._band_keys(fingerprint):
+                self._band_index[band_key].add(key)
+
+    def _unindex(self, key):
+        note, _, fingerprint, cover = self._entries.pop(key)
+        if self._ids.get(note['id']) == key:
+            del self._ids[note['id']]
+        if cover and self._covers.get(cover) == key:
+            del self._covers[cover]
+        if fingerprint is not None:
+            for band_key in self._band_keys(fingerprint):
+                bucket = self._band_index[band_key]
+                bucket.discard(key)
+                if not bucket:
+                    del self._band_index[band_key]
+
+    def _same_or_synthetic(self, note, key):
+        """两条笔记是否至少一方为临时ID或ID相同（否则为两条不同的真实笔记）"""
+        other_id = self._entries[key][0]['id']
+        return note['id'] == other_id or is_synthetic_id(note['id']) or is_synthetic_id(other_id)
+
+    def find(self, note, ignored_covers=()):
+        """
+        查找与笔记重复的已索引笔记
+
+        封面相同只在至少一方为临时ID时算重复；两条不同的真实笔记ID按文本相似度判断，
+        需达到REPOST_SIMILARITY_THRESHOLD（转发的笔记）
+
+        参数:
+            note (Note): 笔记
+            ignored_covers (set): 本次查找不按封面判断的规范化封面URL
+
+        返回:
+            int: 重复笔记的索引键，没有时返回None
+        """
+        if not is_synthetic_id(note['id']) and note['id'] in self._ids:
+            return self._ids[note['id']]
+
+        grams, fingerprint, cover = self._fingerprint(note, ignored_covers)
+        if cover and cover in self._covers and self._same_or_synthetic(note, self._covers[cover]):
+            return self._covers[cover]
+        if fingerprint is None:
+            return None
+
+        candidates = set()
+        for band_key in self._band_keys(fingerprint):
+            candidates.update(self._band_index.get(band_key, ()))
+
+        best_key, best_similarity = None, 0.0
+        for key in candidates:
+            _, other_grams, other_fingerprint, _ = self._entries[key]
+            if bin(fingerprint ^ other_fingerprint).count('1') > self.config['HAMMING_DISTANCE']:
+                continue
+            similarity = len(grams & other_grams) / len(grams | other_grams)
+            threshold = (self.config['SIMILARITY_THRESHOLD'] if self._same_or_synthetic(note, key)
+                         else self.config['REPOST_SIMILARITY_THRESHOLD'])
+            if similarity >= max(threshold, best_similarity):
+                best_key, best_similarity = key, similarity
+        return best_key
+
+    def get(self, key):
+        """获取索引键对应的笔记"""
+        return self._entries[key][0]
+
+    def add(self, note, ignored_covers=()):
+        """
+        加入新笔记
+
+        参数:
+            note (Note): 笔记
+            ignored_covers (set): 不索引的规范化封面URL
+
+        返回:
+            int: 新笔记的索引键
+        """
+        key = self._next_key
+        self._next_key += 1
+        self._index(key, note, ignored_covers)
+
+        if self.capacity is not None:
+            while len(self._entries) > self.capacity:
+                self._unindex(next(iter(self._entries)))
+        return key
+
+    def update(self, key, note, ignored_covers=()):
+        """用合并后的笔记替换已索引的笔记"""
+        self._unindex(key)
+        self._index(key, note, ignored_covers)
+
+    def remember(self, note, ignored_covers=()):
+        """加入或合并笔记（用于跨搜索的历史索引，ignored_covers为本批笔记的占位封面）"""
+        key = self.find(note, ignored_covers)
+        if key is None:
+            self.add(note, ignored_covers)
+        else:
+            self.update(key, merge_notes(self.get(key), note), ignored_covers)
+            self._entries.move_to_end(key)
+
+
+class NoteDeduplicator:
+    """
+    逐批加入笔记并合并重复，保持首次出现的顺序
+
+    每条笔记只查找和索引一次，提取过程中可以随时读取当前的去重结果
+    """
+
+    def __init__(self, config=None, ignored_covers=()):
+        """
+        参数:
+            config (dict): 去重配置，默认使用DEDUP_CONFIG
+            ignored_covers (set): 不按封面判断重复的规范化封面URL
+        """
+        self._index = NearDuplicateIndex(config, ignored_covers=ignored_covers)
+        self._merged = OrderedDict()
+
+    def __len__(self):
+        return len(self._merged)
+
+    def add(self, notes):
+        """加入一批笔记"""
+        for note in notes:
+            key = self._index.find(note)
+            if key is None:
+                self._merged[self._index.add(note)] = note
+            else:
+                self._merged[key] = merge_notes(self._merged[key], note)
+                self._index.update(key, self._merged[key])
+
+    def notes(self):
+        """当前的去重结果"""
+        return list(self._merged.values())
+
+
+def deduplicate_notes(notes, history=None, config=None):
+    """
+    合并重复和近似重复的笔记
+
+    参数:
+        notes (list): 各策略提取到的笔记（可能重复）
+        history (NearDuplicateIndex): 之前搜索结果的索引，用于将临时ID替换为真实笔记ID
+        config (dict): 去重配置，默认使用DEDUP_CONFIG
+
+    返回:
+        list: 去重后的笔记，保持首次出现的顺序
+    """
+    covers = shared_covers(notes, config)
+    deduplicator = NoteDeduplicator(config, ignored_covers=covers)
+    deduplicator.add(notes)
+
+    results = deduplicator.notes()
+    if history is None:
+        return results
+
+    # 本次没有找到真实ID的笔记，尝试从之前的搜索结果中补全（本批的占位封面只在本次忽略）
+    resolved = OrderedDict()
+    for note in results:
+        if is_synthetic_id(note['id']) or not note.get('url'):
+            key = history.find(note, covers)
+            if key is not None:
+                note = merge_notes(history.get(key), note)
+
+        if note['id'] in resolved:
+            resolved[note['id']] = merge_notes(resolved[note['id']], note)
+        else:
+            resolved[note['id']] = note
+
+    for note in resolved.values():
+        if not is_synthetic_id(note['id']):
+            history.remember(note, covers)
+
+    return list(resolved.values())
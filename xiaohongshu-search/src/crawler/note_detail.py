@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+小红书笔记详情模块
+提供笔记详情缓存和后台预取功能
+
+主要功能：
+1. 详情缓存 - 内存LRU + 磁盘文件两级缓存，独立的过期时间
+2. 后台预取 - 新搜索完成后在空闲时预取前N条笔记的详情
+"""
+
+import time
+import logging
+import hashlib
+import os
+import sys
+import queue
+import threading
+from collections import OrderedDict
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import DETAIL_CONFIG, DIRECTORIES
+from src.crawler.note_model import Note
+from src.utils.metrics import CACHE_REQUESTS
+from src.utils.serialization import read_file, write_file
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def parse_count(text):
+    """
+    解析页面上的计数文本
+
+    参数:
+        text (str): 计数文本，如 "1234"、"1.2万"、"3k"、"10w+"
+
+    返回:
+        int: 解析后的数值，无法解析时返回0
+    """
+    if not text:
+        return 0
+
+    text = text.strip().lower().rstrip('+')
+    multiplier = 1
+    if text.endswith('万') or text.endswith('w'):
+        multiplier = 10000
+        text = text[:-1]
+    elif text.endswith('k'):
+        multiplier = 1000
+        text = text[:-1]
+
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return 0
+
+
+class DetailCache:
+    """笔记详情缓存 - 内存LRU + 磁盘文件"""
+
+    def __init__(self, cache_dir=None, expire_time=None, memory_size=None):
+        """
+        初始化详情缓存
+
+        参数:
+            cache_dir (str): 磁盘缓存目录，默认使用配置文件设置
+            expire_time (int): 缓存过期时间（秒），默认使用配置文件设置
+            memory_size (int): 内存缓存条数上限，默认使用配置文件设置
+        """
+        self.cache_dir = cache_dir or DIRECTORIES['DETAILS_DIR']
+        self.expire_time = expire_time or DETAIL_CONFIG['CACHE_EXPIRE_TIME']
+        self.memory_size = memory_size or DETAIL_CONFIG['MEMORY_CACHE_SIZE']
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # 内存缓存: note_id -> (timestamp, detail)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_cache_path(self, note_id):
+        """获取详情缓存文件路径"""
+        cache_filename = f"note_{hashlib.md5(note_id.encode()).hexdigest()}.json"
+        return os.path.join(self.cache_dir, cache_filename)
+
+    def _remember(self, note_id, timestamp, detail):
+        """写入内存缓存并淘汰最久未使用的条目"""
+        with self._lock:
+            self._memory[note_id] = (timestamp, detail)
+            self._memory.move_to_end(note_id)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, note_id):
+        """查找未过期的详情，返回 (详情, 命中层级)，未命中时层级为None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(note_id)
+            if entry:
+                if now - entry[0] <= self.expire_time:
+                    self._memory.move_to_end(note_id)
+                    return entry[1], 'memory'
+                del self._memory[note_id]
+
+        cache_path = self._get_cache_path(note_id)
+        if not os.path.exists(cache_path):
+            return None, None
+
+        try:
+            cache = read_file(cache_path)
+
+            if now - cache['timestamp'] > self.expire_time:
+                logger.info(f"详情缓存已过期: {cache_path}")
+                return None, None
+
+            detail = Note.from_dict(cache['data'])
+            self._remember(note_id, cache['timestamp'], detail)
+            return detail, 'disk'
+        except Exception as e:
+            logger.error(f"加载详情缓存失败: {str(e)}")
+            return None, None
+
+    def get(self, note_id):
+        """
+        读取笔记详情
+
+        参数:
+            note_id (str): 笔记ID
+
+        返回:
+            Note: 未过期的笔记详情，不存在或已过期时返回None
+        """
+        detail, tier = self._lookup(note_id)
+
+        CACHE_REQUESTS.labels('detail_memory', 'hit' if tier == 'memory' else 'miss').inc()
+        if tier != 'memory':
+            CACHE_REQUESTS.labels('detail_disk', 'hit' if tier == 'disk' else 'miss').inc()
+
+        return detail
+
+    def contains(self, note_id):
+        """判断是否存在未过期的详情缓存（不计入命中统计）"""
+        return self._lookup(note_id)[0] is not None
+
+    def put(self, note_id, detail):
+        """
+        保存笔记详情
+
+        参数:
+            note_id (str): 笔记ID
+            detail (Note): 笔记详情
+        """
+        timestamp = time.time()
+        self._remember(note_id, timestamp, detail)
+
+        try:
+            cache_path = self._get_cache_path(note_id)
+            cache_data = {
+                'timestamp': timestamp,
+                'note_id': note_id,
+                'data': detail.to_dict()
+            }
+            write_file(cache_path, cache_data)
+            logger.info(f"笔记详情已缓存: {cache_path}")
+        except Exception as e:
+            logger.error(f"详情缓存保存失败: {str(e)}")
+
+
+class DetailPrefetcher:
+    """
+    笔记详情后台预取器
+
+    使用有界队列保存预取任务，队列满时直接丢弃新任务。
+    工作线程只在没有交互请求时占用浏览器，每处理完一条笔记都会重新让出，
+    因此交互搜索最多等待一次详情页加载。
+    """
+
+    def __init__(self, crawler, top_n=None, queue_size=None, idle_delay=None):
+        """
+        初始化预取器
+
+        参数:
+            crawler (XiaoHongShuCrawler): 爬虫实例
+            top_n (int): 每次搜索预取的笔记数量，默认使用配置文件设置
+            queue_size (int): 预取队列容量，默认使用配置文件设置
+            idle_delay (float): 开始预取前要求的空闲时间（秒），默认使用配置文件设置
+        """
+        self.crawler = crawler
+        self.top_n = top_n or DETAIL_CONFIG['PREFETCH_TOP_N']
+        self.idle_delay = idle_delay if idle_delay is not None else DETAIL_CONFIG['PREFETCH_IDLE_DELAY']
+        self._queue = queue.Queue(maxsize=queue_size or DETAIL_CONFIG['PREFETCH_QUEUE_SIZE'])
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # 统计信息
+        self.stats = {'submitted': 0, 'dropped': 0, 'fetched': 0, 'failed': 0, 'preempted': 0}
+        self.max_attempts = DETAIL_CONFIG['PREFETCH_MAX_ATTEMPTS']
+
+    def start(self):
+        """启动预取线程（重复调用无副作用）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='detail-prefetcher', daemon=True)
+        self._thread.start()
+        logger.info("笔记详情预取线程已启动")
+
+    def stop(self):
+        """停止预取线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def submit(self, notes):
+        """
+        提交一次搜索结果的预取任务
+
+        参数:
+            notes (list): 搜索结果笔记列表，只预取前top_n条
+        """
+        for note in notes[:self.top_n]:
+            note_id = note.get('id')
+            if not note_id or self.crawler.detail_cache.contains(note_id):
+                continue
+
+            with self._pending_lock:
+                if note_id in self._pending:
+                    continue
+                self._pending.add(note_id)
+
+            try:
+                self._queue.put_nowait((note_id, 1))
+                self.stats['submitted'] += 1
+            except queue.Full:
+                with self._pending_lock:
+                    self._pending.discard(note_id)
+                self.stats['dropped'] += 1
+                logger.debug(f"预取队列已满，丢弃任务: {note_id}")
+
+    def _run(self):
+        """预取线程主循环"""
+        while not self._stop_event.is_set():
+            try:
+                note_id, attempts = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            requeued = False
+            try:
+                if self._prefetch(note_id):
+                    requeued = self._requeue(note_id, attempts)
+            finally:
+                if not requeued:
+                    with self._pending_lock:
+                        self._pending.discard(note_id)
+                self._queue.task_done()
+
+    def _requeue(self, note_id, attempts):
+        """
+        被抢占的任务放回队尾，先处理队列中的其他笔记
+
+        返回:
+            bool: 已放回队列返回True；达到最大尝试次数或队列已满时放弃，返回False
+        """
+        self.stats['preempted'] += 1
+        if attempts >= self.max_attempts:
+            logger.debug(f"预取多次被交互请求抢占，放弃: {note_id}")
+            return False
+        try:
+            self._queue.put_nowait((note_id, attempts + 1))
+            return True
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+
+    def _prefetch(self, note_id):
+        """
+        等待空闲后预取单条笔记详情
+
+        返回:
+            bool: 浏览器被交互请求抢占、需要稍后重试时返回True
+        """
+        while not self._stop_event.is_set():
+            if self.crawler.detail_cache.contains(note_id):
+                return False
+
+            if self.crawler.is_idle(self.idle_delay):
+                result = self.crawler.prefetch_note_detail(note_id)
+                if result is None:
+                    return True
+                if result:
+                    self.stats['fetched'] += 1
+                else:
+                    self.stats['failed'] += 1
+                return False
+
+            self._stop_event.wait(self.idle_delay)
+        return False
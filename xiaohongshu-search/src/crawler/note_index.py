@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地笔记全文索引模块
+对所有抓取过的笔记建立SQLite FTS5索引，相关关键词已有足够笔记时不必再启动浏览器
+
+实现说明：
+1. 分词 - 中文按相邻两字切分（bigram），其他文字按单词切分，单词后的有区分意义的符号（如 C++、C# 的 + 和 #）
+   保留在词中，分好的词以空格连接后写入FTS5
+2. 增量更新 - 每次保存搜索缓存时按笔记ID覆盖写入，记录最后一次抓取到的时间；笔记与关键词的关联单独保存在
+   note_keywords表中，同一笔记被多个关键词抓取到时各有一行 (note_id, keyword, crawled_at)。
+   策略生成的临时ID（s1_、s3_）不是稳定的笔记标识，不写入索引
+3. 查询 - 查询词的所有分词都需出现，按BM25排序（标题权重更高），只返回未超过MAX_AGE的笔记
+4. 导出 - 每个 (笔记, 关键词) 关联一行，按 (crawled_at, 关联rowid) 顺序分批读取，
+   游标为最后一条的 "crawled_at_rowid"，使用独立的只读连接，导出期间不阻塞写入
+5. 结构版本 - 版本号记录在数据库的user_version中，分词规则变化时按笔记数据重建全文索引
+"""
+
+import json
+import math
+import re
+import time
+import logging
+import sqlite3
+import os
+import sys
+import threading
+import unicodedata
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import NOTE_INDEX_CONFIG, FILE_PATHS, QUERY_NORMALIZATION_CONFIG
+from src.crawler.near_duplicates import is_synthetic_id
+from src.crawler.note_model import Note
+
+logger = logging.getLogger(__name__)
+
+# 中日韩统一表意文字（扩展A、基本区、兼容区）
+_CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+# 单词后保留的符号，与关键词规范化保留的符号一致
+_SYMBOLS = QUERY_NORMALIZATION_CONFIG.get('KEEP_SYMBOLS', '')
+_TOKEN_PATTERN = re.compile(f'[{_CJK}]+|[^\\W{_CJK}_]+' + (f'[{re.escape(_SYMBOLS)}]*' if _SYMBOLS else ''))
+_CJK_PATTERN = re.compile(f'[{_CJK}]')
+_FTS_TOKENIZER = f"unicode61 tokenchars '{_SYMBOLS}'" if _SYMBOLS else 'unicode61'
+
+# 数据库结构版本（PRAGMA user_version），表结构或分词规则变化时递增
+SCHEMA_VERSION = 3
+
+# BM25列权重：标题、正文、作者
+_BM25_WEIGHTS = (3.0, 1.0, 0.5)
+
+
+def tokenize(text):
+    """
+    将文本切分为索引词
+
+    参数:
+        text (str): 原始文本
+
+    返回:
+        list: 中文为相邻两字，其他文字为单词（带其后保留的符号），全部规范化为小写
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text):
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def format_cursor(updated_at, rowid):
+    """生成导出游标"""
+    return f"{updated_at!r}_{rowid}"
+
+
+def parse_cursor(cursor):
+    """
+    解析导出游标
+
+    返回:
+        tuple: (更新时间, rowid)
+
+    异常:
+        ValueError: 游标格式无效
+    """
+    try:
+        updated_at, rowid = cursor.rsplit('_', 1)
+        return float(updated_at), int(rowid)
+    except (AttributeError, ValueError):
+        raise ValueError(f"无效的导出游标: {cursor}")
+
+
+class NoteIndex:
+    """笔记全文索引"""
+
+    def __init__(self, db_path=None, config=None):
+        """
+        初始化索引
+
+        参数:
+            db_path (str): 索引数据库路径，默认使用配置文件设置
+            config (dict): 索引配置，默认使用NOTE_INDEX_CONFIG
+        """
+        self.config = config or NOTE_INDEX_CONFIG
+        self.db_path = db_path or FILE_PATHS['NOTE_INDEX_DB']
+        self._lock = threading.Lock()
+        self._conn = None
+
+        # 统计信息
+        self.stats = {'answered': 0, 'insufficient': 0}
+
+        if self.config['ENABLED']:
+            self._open()
+
+    @property
+    def available(self):
+        return self._conn is not None
+
+    def _open(self):
+        """打开数据库并建表，SQLite不支持FTS5时禁用索引"""
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS notes (
+                    rowid INTEGER PRIMARY KEY,
+                    note_id TEXT UNIQUE NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS notes_updated_at ON notes(updated_at);
+                CREATE TABLE IF NOT EXISTS note_keywords (
+                    rowid INTEGER PRIMARY KEY,
+                    note_id TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    crawled_at REAL NOT NULL,
+                    UNIQUE (note_id, keyword)
+                );
+                CREATE INDEX IF NOT EXISTS note_keywords_crawled_at ON note_keywords(crawled_at);
+                CREATE INDEX IF NOT EXISTS note_keywords_keyword ON note_keywords(keyword, crawled_at);
+            """)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                self._migrate(conn, version)
+            self._conn = conn
+            self.prune()
+            logger.info(f"笔记全文索引已加载: {self.db_path}（{self.count()} 条笔记）")
+        except sqlite3.Error as e:
+            logger.warning(f"笔记全文索引不可用（需要支持FTS5的SQLite）: {str(e)}")
+            self._conn = None
+
+    @staticmethod
+    def _create_fts(conn):
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                title, body, author, tokenize="{_FTS_TOKENIZER}"
+            )
+        """)
+
+    @staticmethod
+    def _index_note(conn, rowid, note):
+        """写入一条笔记的全文索引"""
+        body = note.get('desc', '')
+        if note.get('content') and note['content'] != body:
+            body += ' ' + note['content']
+        conn.execute(
+            "INSERT INTO notes_fts (rowid, title, body, author) VALUES (?, ?, ?, ?)",
+            (rowid,
+             ' '.join(tokenize(note.get('title', ''))),
+             ' '.join(tokenize(body)),
+             ' '.join(tokenize(note.get('author', '')))))
+
+    def _migrate(self, conn, version):
+        """升级旧版本的数据库：删除临时ID的笔记，旧的keyword列迁移到note_keywords表，按笔记数据重建全文索引"""
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS notes_fts")
+            self._create_fts(conn)
+            rows = conn.execute("SELECT rowid, note_id, data FROM notes").fetchall()
+            synthetic = [(rowid,) for rowid, note_id, _ in rows if is_synthetic_id(note_id)]
+            conn.executemany("DELETE FROM notes WHERE rowid = ?", synthetic)
+
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+            if 'keyword' in columns:
+                conn.execute("""
+                    INSERT OR IGNORE INTO note_keywords (note_id, keyword, crawled_at)
+                    SELECT note_id, keyword, updated_at FROM notes WHERE keyword IS NOT NULL
+                """)
+
+            for rowid, note_id, data in rows:
+                if not is_synthetic_id(note_id):
+                    self._index_note(conn, rowid, json.loads(data))
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if rows:
+            logger.info(f"笔记全文索引已从版本 {version} 升级到 {SCHEMA_VERSION}，"
+                        f"重建了 {len(rows) - len(synthetic)} 条笔记的索引，删除了 {len(synthetic)} 条临时ID的笔记")
+
+    def add_notes(self, keyword, notes):
+        """
+        写入或更新笔记
+
+        参数:
+            keyword (str): 抓取到这些笔记的搜索关键词（规范关键词）
+            notes (list): 笔记列表，临时ID的笔记跳过
+        """
+        if not self.available or not notes:
+            return
+
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                for note in notes:
+                    note_id = note.get('id')
+                    if is_synthetic_id(note_id):
+                        continue
+
+                    row = self._conn.execute("SELECT rowid FROM notes WHERE note_id = ?", (note_id,)).fetchone()
+                    data = json.dumps(note.to_dict(), ensure_ascii=False)
+                    if row:
+                        rowid = row[0]
+                        self._conn.execute("UPDATE notes SET data = ?, updated_at = ? WHERE rowid = ?",
+                                           (data, now, rowid))
+                        self._conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (rowid,))
+                    else:
+                        rowid = self._conn.execute(
+                            "INSERT INTO notes (note_id, data, updated_at) VALUES (?, ?, ?)",
+                            (note_id, data, now)).lastrowid
+
+                    self._index_note(self._conn, rowid, note)
+                    self._conn.execute("""
+                        INSERT INTO note_keywords (note_id, keyword, crawled_at) VALUES (?, ?, ?)
+                        ON CONFLICT (note_id, keyword) DO UPDATE SET crawled_at = excluded.crawled_at
+                    """, (note_id, keyword, now))
+            logger.debug(f"笔记全文索引已更新: {keyword}，{len(notes)} 条笔记")
+        except sqlite3.Error as e:
+            logger.error(f"更新笔记全文索引失败: {str(e)}")
+
+    def search(self, query, limit, max_age=None):
+        """
+        全文检索笔记
+
+        参数:
+            query (str): 查询词
+            limit (int): 最大返回数量
+            max_age (float): 只返回在该时间（秒）内抓取到的笔记，None表示不限制
+
+        返回:
+            list: 按BM25相关度排序的笔记列表
+        """
+        tokens = tokenize(query)
+        if not self.available or not tokens:
+            return []
+
+        match = ' AND '.join('"{}"'.format(token.replace('"', '""')) for token in dict.fromkeys(tokens))
+        min_updated = time.time() - max_age if max_age else 0
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(f"""
+                    SELECT notes.data FROM notes_fts
+                    JOIN notes ON notes.rowid = notes_fts.rowid
+                    WHERE notes_fts MATCH ? AND notes.updated_at >= ?
+                    ORDER BY bm25(notes_fts, {', '.join(map(str, _BM25_WEIGHTS))})
+                    LIMIT ?
+                """, (match, min_updated, limit)).fetchall()
+            return [Note.from_dict(json.loads(row[0])) for row in rows]
+        except sqlite3.Error as e:
+            logger.error(f"笔记全文检索失败: {str(e)}")
+            return []
+
+    def answer(self, query, max_results):
+        """
+        尝试直接用索引回答搜索
+
+        参数:
+            query (str): 搜索关键词
+            max_results (int): 最大结果数量
+
+        返回:
+            list: 新鲜笔记数达到覆盖率要求时返回检索结果，否则返回None
+        """
+        notes = self.search(query, max_results, self.config['MAX_AGE'])
+        needed = max(1, math.ceil(max_results * self.config['MIN_COVERAGE']))
+        if len(notes) < needed:
+            self.stats['insufficient'] += 1
+            return None
+        self.stats['answered'] += 1
+        return notes
+
+    def iter_notes(self, keyword=None, start_time=None, end_time=None, since=None, limit=None):
+        """
+        按抓取时间顺序逐条读取笔记与关键词的关联（分批查询，内存占用与笔记总数无关）
+
+        同一笔记被多个关键词抓取到时每个关键词各有一行，笔记JSON都是最新的一份
+
+        参数:
+            keyword (str): 只导出该关键词（规范关键词）抓取到的笔记
+            start_time (float): 只导出在该时间及之后抓取到的关联
+            end_time (float): 只导出在该时间之前抓取到的关联
+            since (str): 增量导出游标，只导出该游标之后抓取到的关联
+            limit (int): 最多导出的行数
+
+        返回:
+            generator: (游标, 关键词, 抓取时间, 笔记JSON文本)，笔记JSON为库中原样保存的文本
+
+        异常:
+            ValueError: 游标格式无效
+        """
+        last_time, last_rowid = parse_cursor(since) if since else (float('-inf'), 0)
+        if not self.available:
+            return
+
+        conditions = ["(k.crawled_at > ? OR (k.crawled_at = ? AND k.rowid > ?))"]
+        params = []
+        if keyword:
+            conditions.append("k.keyword = ?")
+            params.append(keyword)
+        if start_time is not None:
+            conditions.append("k.crawled_at >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            conditions.append("k.crawled_at < ?")
+            params.append(end_time)
+        sql = (f"SELECT k.rowid, k.keyword, k.crawled_at, n.data FROM note_keywords k "
+               f"JOIN notes n ON n.note_id = k.note_id WHERE {' AND '.join(conditions)} "
+               f"ORDER BY k.crawled_at, k.rowid LIMIT ?")
+
+        batch_size = self.config['EXPORT_BATCH_SIZE']
+        remaining = limit
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            while remaining is None or remaining > 0:
+                size = batch_size if remaining is None else min(batch_size, remaining)
+                # 每批单独查询，不在两批之间保持读事务
+                rows = conn.execute(sql, [last_time, last_time, last_rowid] + params + [size]).fetchall()
+                for rowid, note_keyword, crawled_at, data in rows:
+                    yield format_cursor(crawled_at, rowid), note_keyword, crawled_at, data
+                if len(rows) < size:
+                    return
+                last_rowid, last_time = rows[-1][0], rows[-1][2]
+                if remaining is not None:
+                    remaining -= len(rows)
+        finally:
+            conn.close()
+
+    def count(self):
+        """获取索引中的笔记数"""
+        if not self.available:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def prune(self):
+        """删除超过保留时间的笔记"""
+        if not self.available:
+            return 0
+        cutoff = time.time() - self.config['RETENTION']
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM notes_fts WHERE rowid IN (SELECT rowid FROM notes WHERE updated_at < ?)", (cutoff,))
+            removed = self._conn.execute("DELETE FROM notes WHERE updated_at < ?", (cutoff,)).rowcount
+            self._conn.execute("DELETE FROM note_keywords WHERE crawled_at < ?", (cutoff,))
+        if removed:
+            logger.info(f"已从笔记全文索引中删除 {removed} 条过期笔记")
+        return removed
+
+    def close(self):
+        """关闭数据库连接"""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
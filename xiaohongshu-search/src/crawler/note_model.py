@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+笔记模型
+爬虫内部使用的笔记对象，字段与接口返回、缓存文件中的笔记dict相同，结果较多时内存占用更小
+
+实现说明：
+1. 存储 - 使用__slots__保存13个字段，没有每个对象的__dict__和dict的哈希表
+2. 共享 - 作者、发布时间等重复出现的字符串用sys.intern共享同一个对象；desc与title相同时共用title；
+   没有图片的笔记共用同一个空元组，图片列表保存为元组
+3. 兼容 - 支持 note['title']、note.get('title')、note['title'] = ... 等dict的读写方式，
+   已有的提取、去重、过滤和渲染代码不需要区分笔记对象和dict
+4. 边界 - 写入缓存、索引和接口响应时用to_dict转换为dict，读取缓存和索引时用from_dict转换回笔记对象
+"""
+
+import sys
+from operator import attrgetter
+
+NOTE_FIELDS = ('id', 'title', 'desc', 'author', 'cover', 'url', 'likes', 'comments', 'collects', 'shares',
+               'published', 'content', 'images')
+
+_FIELD_SET = frozenset(NOTE_FIELDS)
+# 在大量笔记间重复出现、值的种类有限的字段
+_INTERNED_FIELDS = frozenset(['author', 'published'])
+_values = attrgetter(*NOTE_FIELDS)
+
+EMPTY_IMAGES = ()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _images(value):
+    return tuple(value) if value else EMPTY_IMAGES
+
+
+class Note:
+    """
+    笔记
+
+    字段:
+        id, title, desc, author, cover, url: 字符串
+        likes, comments, collects, shares: 互动数
+        published, content: 发布时间和详情正文，搜索结果中为空字符串
+        images: 图片URL元组
+    """
+
+    __slots__ = NOTE_FIELDS
+
+    def __init__(self, id, title='', desc='', author='', cover='', url='', likes=0, comments=0, collects=0,
+                 shares=0, published='', content='', images=EMPTY_IMAGES):
+        self.id = id
+        self.title = title
+        self.desc = title if desc == title else desc
+        self.author = _intern(author)
+        self.cover = cover
+        self.url = url
+        self.likes = likes
+        self.comments = comments
+        self.collects = collects
+        self.shares = shares
+        self.published = _intern(published)
+        self.content = content
+        self.images = _images(images)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        从笔记dict创建（忽略未知字段，缺少的字段使用默认值）
+
+        参数:
+            data (dict): 笔记dict，至少包含id
+
+        返回:
+            Note: 笔记对象
+        """
+        return cls(**{name: data[name] for name in NOTE_FIELDS if name in data})
+
+    def to_dict(self):
+        """
+        转换为笔记dict（接口响应、缓存文件和索引使用的格式）
+
+        返回:
+            dict: 包含全部字段的dict，images为列表
+        """
+        data = dict(zip(NOTE_FIELDS, _values(self)))
+        data['images'] = list(self.images)
+        return data
+
+    def copy(self):
+        """浅复制"""
+        note = Note.__new__(Note)
+        for name, value in zip(NOTE_FIELDS, _values(self)):
+            setattr(note, name, value)
+        return note
+
+    # ---- 兼容dict的读写方式 ----
+
+    def __getitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        if key in _INTERNED_FIELDS:
+            value = _intern(value)
+        elif key == 'images':
+            value = _images(value)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def keys(self):
+        return NOTE_FIELDS
+
+    def __iter__(self):
+        return iter(NOTE_FIELDS)
+
+    def __len__(self):
+        return len(NOTE_FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, Note):
+            return _values(self) == _values(other)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Note(id={self.id!r}, title={self.title!r})"
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+搜索耗时预算模块
+请求线程按预算等待抓取线程，到期时取走已提取到的笔记返回，抓取线程继续完成并写入缓存
+
+实现说明：
+1. 预算分配 - 等待页面加载和滚动通过 budget() 申请时间，只使用预留提取时间之外的预算；
+   申请不到完整时长时记为已截短（cut_short）
+2. 发布 - 提取策略每执行完一个就发布一次当前的有效笔记，请求线程到期时返回最近一次发布的结果
+3. 提前返回 - 抓取被截短时，第一轮提取完成后立即交出部分结果（handoff），之后的补充抓取不再占用请求时间
+"""
+
+import time
+import logging
+import os
+import sys
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import SEARCH_DEADLINE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def clamp_timeout_ms(timeout_ms, config=None):
+    """
+    将请求的预算限制在配置范围内
+
+    参数:
+        timeout_ms (int): 请求的预算（毫秒），None时使用DEFAULT_TIMEOUT_MS
+
+    返回:
+        int: 预算（毫秒），None表示不限制
+    """
+    config = config or SEARCH_DEADLINE_CONFIG
+    if timeout_ms is None:
+        timeout_ms = config['DEFAULT_TIMEOUT_MS']
+    if timeout_ms is None:
+        return None
+    return max(config['MIN_TIMEOUT_MS'], min(int(timeout_ms), config['MAX_TIMEOUT_MS']))
+
+
+class SearchDeadline:
+    """一次搜索的耗时预算，由请求线程创建，抓取线程沿调用链传递"""
+
+    def __init__(self, timeout_ms, config=None):
+        """
+        初始化预算
+
+        参数:
+            timeout_ms (int): 预算（毫秒）
+            config (dict): 耗时预算配置，默认使用SEARCH_DEADLINE_CONFIG
+        """
+        self.config = config or SEARCH_DEADLINE_CONFIG
+        self.timeout_ms = timeout_ms
+        self.expires_at = time.monotonic() + timeout_ms / 1000
+        self.reserve = min(self.config['EXTRACTION_RESERVE_MS'], timeout_ms / 2) / 1000
+        self.cut_short = False
+
+        self._lock = threading.Lock()
+        self._base = []
+        self._notes = []
+        self._handed_off = False
+        self._finished = False
+        self._wake = threading.Event()
+
+    def remaining(self):
+        """剩余时间（秒）"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def budget(self, seconds):
+        """
+        申请一段等待时间（等待页面加载、滚动停顿等）
+
+        参数:
+            seconds (float): 需要的时长（秒）
+
+        返回:
+            float: 可以使用的时长，不超过剩余时间减去预留的提取时间
+        """
+        available = max(0.0, self.remaining() - self.reserve)
+        if seconds > available:
+            self.cut_short = True
+            return available
+        return seconds
+
+    def set_base(self, notes):
+        """设置已有的笔记（补充抓取时为已缓存的笔记），之后发布的笔记追加在其后"""
+        with self._lock:
+            self._base = list(notes)
+            self._notes = list(notes)
+
+    def publish(self, notes):
+        """发布当前已提取到的有效笔记"""
+        with self._lock:
+            known_ids = {note['id'] for note in self._base}
+            self._notes = self._base + [note for note in notes if note['id'] not in known_ids]
+
+    def handoff(self, notes=None):
+        """交出部分结果，请求线程不再等待"""
+        if notes is not None:
+            self.publish(notes)
+        self._handed_off = True
+        self._wake.set()
+
+    def finish(self):
+        """抓取线程完成（结果由调用方另行传递）"""
+        self._finished = True
+        self._wake.set()
+
+    @property
+    def handed_off(self):
+        return self._handed_off
+
+    @property
+    def notes(self):
+        with self._lock:
+            return list(self._notes)
+
+    def wait(self):
+        """
+        等待抓取完成、交出部分结果或预算用完
+
+        返回:
+            bool: 抓取已完成返回True
+        """
+        self._wake.wait(self.remaining())
+        return self._finished
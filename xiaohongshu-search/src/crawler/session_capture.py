@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+抓取录制模块
+录制Selenium搜索期间浏览器收到的文档、XHR和脚本响应，保存为HAR格式存档，
+供 benchmarks/replay_server.py 在本地回放，离线、可重复地测试页面就绪判断、提取策略和滚动加载
+
+实现说明：
+1. 事件来源 - 录制模式下浏览器开启performance日志（goog:loggingPrefs），搜索开始时清空日志，
+   结束后读取其中的Network事件，按requestId合并请求、响应和加载完成事件
+2. 响应内容 - 对RESOURCE_TYPES中的资源用CDP的Network.getResponseBody取回响应体，
+   超过MAX_BODY_SIZE的响应只记录元数据
+3. 时间 - 每条记录保存等待首字节（wait）和接收内容（receive）的耗时，以及相对第一个请求的开始时间（_offset），
+   回放服务器按原始耗时回放时使用
+4. 重定向 - 重定向的每一跳单独记录为一条，带Location头，没有响应体
+"""
+
+import json
+import time
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import CAPTURE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+HAR_VERSION = '1.2'
+CREATOR = {'name': 'xiaohongshu-search', 'version': '1'}
+
+
+def enable_performance_logging(chrome_options):
+    """让浏览器记录Network事件（创建浏览器前调用）"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def _iso_time(wall_time):
+    return datetime.fromtimestamp(wall_time, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _header_list(headers):
+    return [{'name': name, 'value': str(value)} for name, value in (headers or {}).items()]
+
+
+class SessionRecorder:
+    """一次搜索的录制器，调用方需持有浏览器"""
+
+    def __init__(self, driver, config=None):
+        """
+        初始化录制器
+
+        参数:
+            driver (WebDriver): 开启了performance日志的浏览器
+            config (dict): 录制配置，默认使用CAPTURE_CONFIG
+        """
+        self.driver = driver
+        self.config = config or CAPTURE_CONFIG
+        self.started_at = None
+
+    def start(self):
+        """
+        清空之前的performance日志，开始录制
+
+        返回:
+            bool: 浏览器没有开启performance日志（如接管的浏览器不是录制模式下创建的）时返回False
+        """
+        try:
+            self.driver.get_log('performance')
+        except Exception as e:
+            logger.warning(f"浏览器未开启performance日志，本次搜索不录制: {str(e)}")
+            return False
+        self.started_at = time.time()
+        return True
+
+    def _read_events(self):
+        """读取录制开始之后的Network事件"""
+        events = []
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            if message.get('method', '').startswith('Network.'):
+                events.append(message)
+        return events
+
+    def _response_body(self, request_id):
+        """取回响应体，返回 (文本, 是否base64编码)，取不到时返回 (None, False)"""
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception as e:
+            logger.debug(f"获取响应内容失败: {request_id} - {str(e)}")
+            return None, False
+        body = result.get('body', '')
+        if len(body) > self.config['MAX_BODY_SIZE']:
+            return None, False
+        return body, bool(result.get('base64Encoded'))
+
+    @staticmethod
+    def _entry(request, response, resource_type, started, wall_time, finished, first_started):
+        """组装一条HAR记录（不含响应体）"""
+        total_ms = max(0.0, (finished - started) * 1000) if finished else 0.0
+        timing = response.get('timing') or {}
+        wait_ms = timing.get('receiveHeadersEnd')
+        if wait_ms is None or wait_ms < 0:
+            wait_ms = total_ms
+        wait_ms = min(wait_ms, total_ms) if total_ms else wait_ms
+        headers = response.get('headers') or {}
+        location = next((value for name, value in headers.items() if name.lower() == 'location'), '')
+
+        entry = {
+            'startedDateTime': _iso_time(wall_time),
+            'time': round(total_ms, 3),
+            'request': {
+                'method': request.get('method', 'GET'),
+                'url': request.get('url', ''),
+                'httpVersion': response.get('protocol', ''),
+                'headers': _header_list(request.get('headers')),
+                'queryString': [],
+                'cookies': [],
+                'headersSize': -1,
+                'bodySize': len(request.get('postData') or ''),
+            },
+            'response': {
+                'status': response.get('status', 0),
+                'statusText': response.get('statusText', ''),
+                'httpVersion': response.get('protocol', ''),
+                'headers': _header_list(headers),
+                'cookies': [],
+                'content': {'size': 0, 'mimeType': response.get('mimeType', '')},
+                'redirectURL': location,
+                'headersSize': -1,
+                'bodySize': -1,
+            },
+            'cache': {},
+            'timings': {'send': 0, 'wait': round(wait_ms, 3), 'receive': round(max(0.0, total_ms - wait_ms), 3)},
+            '_resourceType': resource_type,
+            '_offset': round((started - first_started) * 1000, 3),
+        }
+        if request.get('postData') is not None:
+            entry['request']['postData'] = {
+                'mimeType': (request.get('headers') or {}).get('Content-Type', ''),
+                'text': request['postData'],
+            }
+        return entry
+
+    def collect(self, keyword=None, page_url=None):
+        """
+        读取录制结果
+
+        参数:
+            keyword (str): 搜索关键词，记录在存档中
+            page_url (str): 搜索页URL
+
+        返回:
+            dict: HAR格式的存档（log.entries按请求开始时间排序）
+        """
+        resource_types = set(self.config['RESOURCE_TYPES'])
+        requests = {}  # requestId -> 当前这一跳的请求信息
+        hops = []  # 已完成的重定向跳转
+        for event in self._read_events():
+            method, params = event['method'], event.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                previous = requests.get(request_id)
+                if previous and params.get('redirectResponse'):
+                    previous['response'] = params['redirectResponse']
+                    previous['finished'] = params.get('timestamp')
+                    hops.append(previous)
+                requests[request_id] = {
+                    'id': request_id,
+                    'request': params.get('request', {}),
+                    'type': params.get('type') or (previous or {}).get('type', 'Other'),
+                    'started': params.get('timestamp', 0),
+                    'wall_time': params.get('wallTime') or time.time(),
+                    'response': None,
+                    'finished': None,
+                    'final': True,
+                }
+            elif request_id in requests:
+                record = requests[request_id]
+                if method == 'Network.responseReceived':
+                    record['response'] = params.get('response', {})
+                    record['type'] = params.get('type', record['type'])
+                elif method == 'Network.loadingFinished':
+                    record['finished'] = params.get('timestamp')
+                elif method == 'Network.loadingFailed':
+                    record['failed'] = params.get('errorText', '')
+
+        for hop in hops:
+            hop['final'] = False
+        records = [r for r in hops + list(requests.values())
+                   if r['type'] in resource_types and r['response'] and not r.get('failed')]
+        records.sort(key=lambda r: r['started'])
+
+        entries = []
+        first_started = records[0]['started'] if records else 0
+        for record in records:
+            entry = self._entry(record['request'], record['response'], record['type'], record['started'],
+                                record['wall_time'], record['finished'], first_started)
+            # 重定向的中间跳转没有响应体；最后一跳加载完成才能取回响应体
+            if record['final'] and record['finished']:
+                body, base64_encoded = self._response_body(record['id'])
+                if body is not None:
+                    entry['response']['content']['text'] = body
+                    entry['response']['content']['size'] = len(body)
+                    if base64_encoded:
+                        entry['response']['content']['encoding'] = 'base64'
+            entries.append(entry)
+
+        started_at = self.started_at or time.time()
+        return {
+            'log': {
+                'version': HAR_VERSION,
+                'creator': CREATOR,
+                'pages': [{
+                    'id': 'page_1',
+                    'title': page_url or '',
+                    'startedDateTime': _iso_time(started_at),
+                    'pageTimings': {},
+                }],
+                'entries': entries,
+                '_keyword': keyword,
+            }
+        }
+
+
+def load_archive(path):
+    """
+    读取录制存档（.har 或 gzip压缩的 .har.gz）
+
+    返回:
+        dict: HAR格式的存档
+    """
+    import gzip
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    return json.loads(data)
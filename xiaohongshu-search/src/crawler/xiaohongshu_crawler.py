@@ -11,11 +11,15 @@ import json
 import random
 import time
 import logging
-import hashlib
 import os
 import sys
+import html
+import math
+import threading
+import contextvars
 import urllib.parse
 from urllib.parse import quote
+from collections import OrderedDict
 import re
 
 # 添加项目根目录到路径
@@ -24,34 +28,132 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 # 导入全局配置
 from config.config import (
     SEARCH_CONFIG, CRAWLER_CONFIG, EXTRACTION_STRATEGIES, 
-    DIRECTORIES, FILE_PATHS, URLS, ERROR_CONFIG,
-    get_config
+    DIRECTORIES, FILE_PATHS, URLS, ERROR_CONFIG, DETAIL_CONFIG, MOCK_DATA_CONFIG,
+    ADAPTIVE_EXTRACTION_CONFIG, DEDUP_CONFIG, NOTE_INDEX_CONFIG, INCREMENTAL_CRAWL_CONFIG, DEBUG_ARTIFACTS_CONFIG,
+    HTTP_FETCH_CONFIG, CAPTURE_CONFIG, HOT_KEYWORDS, get_config
+)
+from src.crawler.note_detail import DetailCache, DetailPrefetcher, parse_count
+from src.crawler.mock_backend import MockBackend
+from src.crawler.extraction_stats import ExtractionStats, GROUP_STRATEGY, GROUP_SELECTOR
+from src.crawler.near_duplicates import NearDuplicateIndex, NoteDeduplicator, deduplicate_notes
+from src.crawler.note_index import NoteIndex
+from src.crawler.note_model import Note
+from src.crawler.debug_artifacts import ArtifactWriter
+from src.crawler.http_fetcher import HttpFetcher, parse_initial_state, notes_from_state
+from src.crawler.search_deadline import SearchDeadline
+from src.crawler.session_capture import SessionRecorder, enable_performance_logging
+from src.utils.query_normalizer import clean_query, normalize_query, query_hash
+from src.utils.serialization import read_file, write_file
+from src.utils.cookie_manager import get_cookie_jar
+from src.utils.logging_setup import search_context, PER_ELEMENT
+from src.crawler.crawl_scheduler import (
+    CrawlScheduler, CrawlRejected, LANE_INTERACTIVE, LANE_PREFETCH, LANE_WARMING
+)
+from src.utils.metrics import (
+    SEARCH_PHASE_SECONDS, CACHE_REQUESTS, STRATEGY_RUNS, STRATEGY_NOTES, STRATEGY_SKIPS, EXTRACTED_NOTES
 )
 
-# 导入Selenium相关库
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+# Selenium相关库在第一次需要浏览器时才导入（见 load_selenium），只读缓存的请求不加载Selenium
+webdriver = Options = Service = By = WebDriverWait = EC = None
+TimeoutException = WebDriverException = None
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# cookie所属的域名，浏览器只有在该域名的页面上才能设置这些cookie
+_COOKIE_DOMAIN = 'xiaohongshu.com'
+
+
+def load_selenium():
+    """导入Selenium相关库（重复调用无副作用）"""
+    global webdriver, Options, Service, By, WebDriverWait, EC, TimeoutException, WebDriverException
+    if webdriver is not None:
+        return
+    
+    with SEARCH_PHASE_SECONDS.time('selenium_import'):
+        from selenium import webdriver as _webdriver
+        from selenium.webdriver.chrome.options import Options as _Options
+        from selenium.webdriver.chrome.service import Service as _Service
+        from selenium.webdriver.common.by import By as _By
+        from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+        from selenium.webdriver.support import expected_conditions as _EC
+        from selenium.common.exceptions import TimeoutException as _TimeoutException
+        from selenium.common.exceptions import WebDriverException as _WebDriverException
+    
+    Options, Service, By, WebDriverWait, EC = _Options, _Service, _By, _WebDriverWait, _EC
+    TimeoutException, WebDriverException = _TimeoutException, _WebDriverException
+    webdriver = _webdriver
+    logger.info("已加载Selenium")
+
+
+def create_chrome_driver(proxy=None, crawler_config=None, capture=None):
+    """
+    使用本地ChromeDriver启动Chrome浏览器
+
+    参数:
+        proxy (str): 代理服务器地址
+        crawler_config (dict): 爬虫配置，默认使用CRAWLER_CONFIG
+        capture (bool): 是否开启录制需要的performance日志，默认使用CAPTURE_CONFIG['ENABLED']
+
+    返回:
+        WebDriver: 浏览器实例
+
+    异常:
+        FileNotFoundError: 本地ChromeDriver不存在
+        WebDriverException: 浏览器启动失败
+    """
+    crawler_config = crawler_config or CRAWLER_CONFIG
+    load_selenium()
+
+    # 配置Chrome选项
+    chrome_options = Options()
+
+    # 添加配置文件中的Chrome选项
+    for option in crawler_config['CHROME_OPTIONS']:
+        chrome_options.add_argument(option)
+
+    # 设置窗口大小
+    width, height = crawler_config['WINDOW_SIZE']
+    chrome_options.add_argument(f'--window-size={width},{height}')
+
+    # 设置代理
+    if proxy:
+        chrome_options.add_argument(f'--proxy-server={proxy}')
+
+    # 反爬虫配置
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+
+    # 录制模式需要浏览器记录Network事件
+    if capture is None:
+        capture = CAPTURE_CONFIG['ENABLED']
+    if capture:
+        enable_performance_logging(chrome_options)
+
+    # 使用本地ChromeDriver
+    chromedriver_path = FILE_PATHS['CHROMEDRIVER_PATH']
+    if not os.path.exists(chromedriver_path):
+        raise FileNotFoundError(f"ChromeDriver不存在: {chromedriver_path}")
+
+    logger.info(f"使用本地ChromeDriver: {chromedriver_path}")
+    os.chmod(chromedriver_path, 0o755)
+    service = Service(chromedriver_path)
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
 class XiaoHongShuCrawler:
     """小红书爬虫类 - 使用全局配置和三种提取策略"""
     
-    def __init__(self, use_selenium=True, headless=None, proxy=None, cookies_file=None):
+    def __init__(self, use_selenium=True, headless=None, proxy=None, cookies_file=None, capture=None):
         """
         初始化爬虫
         
         参数:
-            use_selenium (bool): 是否使用Selenium
+            use_selenium (bool): 是否使用Selenium，False时先用HTTP抓取，没有得到笔记时再按配置改用Selenium
             headless (bool): 是否使用无头模式，None表示使用配置文件设置
             proxy (str): 代理服务器地址
             cookies_file (str): cookie文件路径
+            capture (bool): 是否录制Selenium搜索期间的响应，None表示使用CAPTURE_CONFIG['ENABLED']
         """
         # 使用全局配置
         self.config = get_config()
@@ -59,6 +161,12 @@ class XiaoHongShuCrawler:
         self.crawler_config = CRAWLER_CONFIG
         self.extraction_strategies = EXTRACTION_STRATEGIES
         
+        # 各策略和选择器的历史命中率，用于调整执行顺序
+        self.extraction_stats = ExtractionStats()
+        
+        # 之前搜索结果的指纹索引，用于合并近似重复笔记时补全真实笔记ID
+        self.note_history = NearDuplicateIndex(capacity=DEDUP_CONFIG['HISTORY_SIZE'])
+        
         # 初始化参数
         self.use_selenium = use_selenium if use_selenium is not None else self.crawler_config['USE_SELENIUM']
         self.headless = headless if headless is not None else self.crawler_config['HEADLESS']
@@ -75,8 +183,43 @@ class XiaoHongShuCrawler:
         # HTML回调函数
         self.html_callback = None
         
-        # 加载cookie
-        self.cookies = self._load_cookies()
+        # 抓取调度：交互请求优先获得浏览器，页面加载按SECURITY_CONFIG限流
+        self.scheduler = CrawlScheduler()
+        
+        # 抓取过的笔记的全文索引，缓存未命中时尝试直接回答
+        self.note_index = NoteIndex()
+        
+        # 页面源码和截图等调试文件，后台压缩写盘
+        self.artifact_writer = ArtifactWriter()
+        
+        # 录制模式：搜索期间的响应保存为HAR存档，供回放服务器离线回放
+        self.capture = capture if capture is not None else CAPTURE_CONFIG['ENABLED']
+        self.capture_writer = (ArtifactWriter(config=CAPTURE_CONFIG, artifacts_dir=DIRECTORIES['CAPTURES_DIR'])
+                               if self.capture else None)
+        
+        # 回放模式：浏览器打开回放服务器上的搜索页
+        self.replay_base_url = CAPTURE_CONFIG['REPLAY_BASE_URL']
+        
+        # 笔记详情缓存和后台预取
+        self.detail_cache = DetailCache()
+        self.detail_prefetcher = DetailPrefetcher(self)
+        self._note_summaries = OrderedDict()  # 搜索结果中的笔记摘要，用于定位详情页URL
+        
+        # 搜索缓存命中统计（warmed_hits为命中预热写入的缓存的次数）
+        self.cache_stats = {'hits': 0, 'misses': 0, 'warmed_hits': 0}
+        
+        # 模拟抓取后端（压测和本地调试用，不访问小红书）
+        self.mock_backend = MockBackend() if MOCK_DATA_CONFIG['ENABLE_MOCK'] else None
+        
+        # 共用的cookie管理器：cookie文件变化（如重新登录）时更新HTTP会话，并在下一次打开页面前写入浏览器
+        self.cookie_jar = get_cookie_jar(self.cookies_file)
+        self._cookies_pending = False
+        self.cookie_jar.subscribe(self._on_cookies_changed)
+        
+        # HTTP抓取：不启动浏览器直接解析搜索页的初始状态JSON，use_selenium=False或PREFER_HTTP时先尝试
+        self.http_fetcher = None
+        if not self.mock_backend and (not self.use_selenium or HTTP_FETCH_CONFIG['PREFER_HTTP']):
+            self.http_fetcher = HttpFetcher(self.cookies)
         
         logger.info("小红书爬虫初始化完成")
     
@@ -85,42 +228,87 @@ class XiaoHongShuCrawler:
         self.html_callback = callback_func
         logger.info("HTML存储回调函数已设置")
     
+    def is_idle(self, idle_delay=0):
+        """
+        判断浏览器是否空闲
+        
+        参数:
+            idle_delay (float): 最近一次交互请求结束后要求的空闲时间（秒）
+        
+        返回:
+            bool: 没有任务占用或排队且已空闲足够时间时返回True
+        """
+        return self.scheduler.is_idle(idle_delay)
+    
+    def _site_url(self, url):
+        """回放模式下将小红书页面URL替换为回放服务器上的同一路径"""
+        if self.replay_base_url and url.startswith(URLS['XIAOHONGSHU_BASE']):
+            return self.replay_base_url + url[len(URLS['XIAOHONGSHU_BASE']):]
+        return url
+    
+    def _load_page(self, url):
+        """经过调度器限流后加载页面"""
+        # 本地页面（模拟搜索页、回放服务器）不占用对外请求额度
+        if not url.startswith('file:') and not (self.replay_base_url and url.startswith(self.replay_base_url)):
+            self.scheduler.throttle()
+            self._apply_pending_cookies()
+        self.driver.get(url)
+    
     def _ensure_driver_initialized(self):
         """确保WebDriver已初始化"""
+        load_selenium()
         if self.driver is None:
-            return self._init_selenium()
+            with SEARCH_PHASE_SECONDS.time('driver_init'):
+                return self._init_selenium()
         return True
     
-    def _load_cookies(self):
-        """加载cookie"""
-        if not os.path.exists(self.cookies_file):
-            logger.warning(f"Cookie文件不存在: {self.cookies_file}")
-            return []
+    @property
+    def cookies(self):
+        """当前的cookie（由共用的cookie管理器维护）"""
+        return self.cookie_jar.cookies
+    
+    def _on_cookies_changed(self, cookies):
+        """
+        cookie管理器推送新cookie：立即更新HTTP会话；浏览器可能正被搜索使用，
+        只做标记，在下一次打开小红书页面前写入，不刷新页面也不重启浏览器
+        """
+        if self.http_fetcher:
+            self.http_fetcher.set_cookies(cookies)
+        self._cookies_pending = True
+        logger.info(f"收到新的cookie（{len(cookies)} 个），将在下一次打开页面时生效")
+    
+    def _apply_pending_cookies(self):
+        """将收到的新cookie写入浏览器（调用方需持有浏览器）"""
+        if not self._cookies_pending or self.driver is None or self.mock_backend:
+            return
         
         try:
-            with open(self.cookies_file, 'r', encoding='utf-8') as f:
-                cookies = json.load(f)
-            logger.info(f"成功加载Cookie文件: {self.cookies_file}, 包含 {len(cookies)} 个cookie")
-            return cookies
+            # 浏览器只能为当前页面所在的域名设置cookie，还没打开过小红书页面时留到之后再写入
+            if not (urllib.parse.urlsplit(self.driver.current_url).hostname or '').endswith(_COOKIE_DOMAIN):
+                return
+            self._cookies_pending = False
+            with SEARCH_PHASE_SECONDS.time('cookie_refresh'):
+                self.driver.delete_all_cookies()
+                for cookie in self.cookies:
+                    self._add_cookie(cookie)
+            logger.info("已将新的cookie写入浏览器")
         except Exception as e:
-            logger.error(f"加载Cookie文件失败: {str(e)}")
-            return []
+            logger.warning(f"将新的cookie写入浏览器失败: {str(e)}")
     
     def save_cookies(self, cookies_file=None):
-        """保存当前浏览器的cookie"""
+        """保存当前浏览器的cookie（写入共用的cookie文件时推送给所有爬虫实例）"""
         if not self._ensure_driver_initialized():
             logger.error("WebDriver初始化失败，无法保存cookie")
             return False
         
-        file_path = cookies_file or self.cookies_file
-        cookies_dir = os.path.dirname(file_path)
-        os.makedirs(cookies_dir, exist_ok=True)
-        
         try:
             cookies = self.driver.get_cookies()
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(cookies, f, ensure_ascii=False, indent=2)
-            logger.info(f"成功保存 {len(cookies)} 个cookie到: {file_path}")
+            if cookies_file:
+                get_cookie_jar(cookies_file).save(cookies)
+            else:
+                self.cookie_jar.save(cookies)
+            # 本浏览器已经是这些cookie
+            self._cookies_pending = False
             return True
         except Exception as e:
             logger.error(f"保存cookie失败: {str(e)}")
@@ -130,46 +318,7 @@ class XiaoHongShuCrawler:
         """初始化Selenium WebDriver"""
         try:
             logger.info("正在初始化Selenium...")
-            
-            # 配置Chrome选项
-            chrome_options = Options()
-            
-            # 添加配置文件中的Chrome选项
-            for option in self.crawler_config['CHROME_OPTIONS']:
-                chrome_options.add_argument(option)
-            
-            # 设置窗口大小
-            width, height = self.crawler_config['WINDOW_SIZE']
-            chrome_options.add_argument(f'--window-size={width},{height}')
-            
-            # 设置代理
-            if self.proxy:
-                chrome_options.add_argument(f'--proxy-server={self.proxy}')
-            
-            # 反爬虫配置
-            chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            # 使用本地ChromeDriver
-            chromedriver_path = FILE_PATHS['CHROMEDRIVER_PATH']
-            if os.path.exists(chromedriver_path):
-                logger.info(f"使用本地ChromeDriver: {chromedriver_path}")
-                os.chmod(chromedriver_path, 0o755)
-                service = Service(chromedriver_path)
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            else:
-                logger.error(f"ChromeDriver不存在: {chromedriver_path}")
-                return False
-            
-            # 隐藏WebDriver特征
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            logger.info("Chrome浏览器已成功启动")
-            
-            # 添加cookie
-            if self.cookies:
-                self._add_cookies()
-            
+            self._setup_driver(create_chrome_driver(self.proxy, self.crawler_config, self.capture))
             logger.info("Selenium初始化成功")
             return True
             
@@ -177,23 +326,90 @@ class XiaoHongShuCrawler:
             logger.error(f"Selenium初始化失败: {str(e)}")
             return False
     
+    def _setup_driver(self, driver):
+        """接管已启动的浏览器：隐藏WebDriver特征并添加cookie"""
+        self.driver = driver
+        
+        # 隐藏WebDriver特征
+        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        
+        logger.info("Chrome浏览器已成功启动")
+        
+        # 添加cookie（模拟后端和回放模式不访问小红书，不需要cookie）
+        if self.cookies and not self.mock_backend and not self.replay_base_url:
+            self._add_cookies()
+    
+    def attach_driver(self, driver):
+        """
+        使用外部已启动的浏览器（如启动检查时验证过的浏览器），避免再启动一个Chrome
+        
+        参数:
+            driver (WebDriver): 浏览器实例
+        
+        返回:
+            bool: 接管成功返回True；已有浏览器时关闭传入的浏览器并返回False
+        """
+        with self.scheduler.slot(LANE_WARMING):
+            if self.driver is not None:
+                driver.quit()
+                return False
+            
+            try:
+                load_selenium()
+                with SEARCH_PHASE_SECONDS.time('driver_init'):
+                    self._setup_driver(driver)
+                logger.info("已接管启动检查时创建的浏览器")
+                return True
+            except Exception as e:
+                logger.error(f"接管浏览器失败: {str(e)}")
+                self.driver = None
+                driver.quit()
+                return False
+    
+    def prewarm(self, keyword=None):
+        """
+        启动预热：启动浏览器、添加cookie并打开一次搜索页，使第一个搜索请求不必等待浏览器启动
+        
+        参数:
+            keyword (str): 预热时打开的搜索关键词，默认使用第一个热门关键词
+        
+        返回:
+            bool: 预热成功返回True
+        """
+        if self.mock_backend and not self.mock_backend.uses_browser:
+            return True
+        
+        with self.scheduler.slot(LANE_WARMING):
+            if not self._ensure_driver_initialized():
+                return False
+            
+            # 模拟搜索页是本地文件，打开前不需要预热
+            if self.mock_backend:
+                return True
+            
+            keyword = keyword or HOT_KEYWORDS[0]
+            try:
+                with SEARCH_PHASE_SECONDS.time('navigation'):
+                    self._load_page(self._site_url(URLS['SEARCH_URL_TEMPLATE'].format(keyword=quote(keyword))))
+                logger.info(f"浏览器预热完成，已打开搜索页: {keyword}")
+                return True
+            except Exception as e:
+                logger.warning(f"打开预热搜索页失败: {str(e)}")
+                return False
+    
     def _add_cookies(self):
         """添加cookie到浏览器"""
         try:
             logger.info("尝试添加cookie...")
-            self.driver.get("https://www.xiaohongshu.com")
+            self._load_page(URLS['XIAOHONGSHU_BASE'])
             time.sleep(3)
             
+            self._cookies_pending = False
             for cookie in self.cookies:
-                try:
-                    # 移除可能导致问题的字段
-                    cookie_clean = {k: v for k, v in cookie.items() 
-                                  if k in ['name', 'value', 'domain', 'path', 'secure']}
-                    self.driver.add_cookie(cookie_clean)
-                except Exception as e:
-                    logger.warning(f"添加cookie失败: {cookie.get('name', '未知')} - {str(e)}")
+                self._add_cookie(cookie)
             
             # 刷新页面使cookie生效
+            self.scheduler.throttle()
             self.driver.refresh()
             time.sleep(5)
             logger.info("已添加cookie并刷新页面")
@@ -201,26 +417,53 @@ class XiaoHongShuCrawler:
         except Exception as e:
             logger.error(f"添加cookie过程出错: {str(e)}")
     
+    def _add_cookie(self, cookie):
+        """向浏览器添加一个cookie"""
+        try:
+            # 移除可能导致问题的字段
+            cookie_clean = {k: v for k, v in cookie.items() 
+                          if k in ['name', 'value', 'domain', 'path', 'secure']}
+            self.driver.add_cookie(cookie_clean)
+        except Exception as e:
+            logger.warning(f"添加cookie失败: {cookie.get('name', '未知')} - {str(e)}")
+    
     def _get_cache_path(self, keyword):
         """获取缓存文件路径"""
-        cache_filename = f"search_{hashlib.md5(keyword.encode()).hexdigest()}.json"
+        cache_filename = f"search_{query_hash(keyword)}.json"
         return os.path.join(self.cache_dir, cache_filename)
     
-    def _save_to_cache(self, keyword, data):
-        """保存数据到缓存"""
+    def _save_to_cache(self, keyword, data, source='search', crawl_state=None, timestamp=None, new_notes=None):
+        """
+        保存数据到缓存
+        
+        参数:
+            keyword (str): 搜索关键词
+            data (list): 笔记列表
+            source (str): 数据来源，'search'为交互搜索，'warmer'为后台预热
+            crawl_state (dict): 抓取进度，用于之后的增量补充抓取
+            timestamp (float): 缓存时间，补充抓取时沿用原缓存的时间，默认为当前时间
+            new_notes (list): 本次新抓取到的笔记（写入全文索引），默认为全部笔记
+        """
         try:
             cache_path = self._get_cache_path(keyword)
             cache_data = {
-                'timestamp': time.time(),
+                'timestamp': timestamp or time.time(),
                 'keyword': keyword,
-                'data': data
+                'source': source,
+                'crawl_state': crawl_state,
+                'data': [note.to_dict() for note in data]
             }
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            with SEARCH_PHASE_SECONDS.time('cache_save'):
+                write_file(cache_path, cache_data)
             logger.info(f"数据已缓存: {cache_path}")
             
+            # 增量更新全文索引
+            with SEARCH_PHASE_SECONDS.time('index_update'):
+                self.note_index.add_notes(normalize_query(keyword), data if new_notes is None else new_notes)
+            
             # 同时生成HTML结果页面
-            self._generate_result_html(keyword, data)
+            with SEARCH_PHASE_SECONDS.time('html_render'):
+                self._generate_result_html(keyword, data)
             
         except Exception as e:
             logger.error(f"缓存保存失败: {str(e)}")
@@ -233,7 +476,7 @@ class XiaoHongShuCrawler:
             os.makedirs(results_dir, exist_ok=True)
             
             # 生成HTML文件名
-            html_filename = f"search_{hashlib.md5(keyword.encode()).hexdigest()}.html"
+            html_filename = f"search_{query_hash(keyword)}.html"
             html_path = os.path.join(results_dir, html_filename)
             
             # 生成HTML内容
@@ -247,7 +490,7 @@ class XiaoHongShuCrawler:
             
             # 如果设置了回调函数，将HTML内容传递给服务器
             if self.html_callback:
-                html_hash = hashlib.md5(keyword.encode()).hexdigest()
+                html_hash = query_hash(keyword)
                 self.html_callback(html_hash, html_content)
                 logger.info(f"HTML内容已通过回调函数传递: {html_hash}")
             
@@ -587,29 +830,113 @@ class XiaoHongShuCrawler:
         
         return html_template
     
-    def _load_from_cache(self, keyword, max_age=None):
-        """从缓存加载数据"""
+    def _read_cache_entry(self, keyword):
+        """读取缓存文件（不检查是否过期），不存在或读取失败时返回None"""
         cache_path = self._get_cache_path(keyword)
         if not os.path.exists(cache_path):
             return None
         
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache = json.load(f)
-            
-            # 检查缓存是否过期
-            max_age = max_age or self.search_config['CACHE_EXPIRE_TIME']
-            if time.time() - cache['timestamp'] > max_age:
-                logger.info(f"缓存已过期: {cache_path}")
-                return None
-            
-            logger.info(f"从缓存加载数据: {cache_path}")
-            return cache['data']
+            cache = read_file(cache_path)
+            cache['data'] = [Note.from_dict(note) for note in cache['data']]
+            return cache
         except Exception as e:
             logger.error(f"加载缓存失败: {str(e)}")
             return None
     
-    def search(self, keyword, max_results=None, use_cache=None):
+    def _load_cache_entry(self, keyword, max_age=None):
+        """加载未过期的缓存条目（包含时间戳和来源信息）"""
+        cache = self._read_cache_entry(keyword)
+        if not cache:
+            return None
+        
+        # 检查缓存是否过期
+        max_age = max_age or self.search_config['CACHE_EXPIRE_TIME']
+        if time.time() - cache['timestamp'] > max_age:
+            logger.info(f"缓存已过期: {self._get_cache_path(keyword)}")
+            return None
+        
+        logger.info(f"从缓存加载数据: {self._get_cache_path(keyword)}")
+        return cache
+    
+    def _load_from_cache(self, keyword, max_age=None):
+        """从缓存加载数据"""
+        cache = self._load_cache_entry(keyword, max_age)
+        return cache['data'] if cache else None
+    
+    def get_stale_results(self, keyword, max_results=None):
+        """
+        获取关键词的缓存结果（忽略过期时间），用于抓取被拒绝时降级返回
+        
+        参数:
+            keyword (str): 搜索关键词
+            max_results (int): 最大结果数量
+        
+        返回:
+            list: 笔记列表，没有缓存时返回空列表
+        """
+        cache = self._read_cache_entry(keyword)
+        if not cache or not cache['data']:
+            return []
+        return cache['data'][:max_results] if max_results else cache['data']
+    
+    def get_cache_age(self, keyword):
+        """
+        获取关键词缓存的年龄
+        
+        参数:
+            keyword (str): 搜索关键词
+        
+        返回:
+            float: 距离上次缓存写入的秒数，没有缓存时返回None
+        """
+        cache = self._read_cache_entry(keyword)
+        if not cache:
+            return None
+        return time.time() - cache['timestamp']
+    
+    def search_within(self, keyword, timeout_ms, max_results=None, use_cache=None, use_index=None):
+        """
+        在耗时预算内搜索：到期时返回已提取到的有效笔记，抓取在后台继续完成并写入缓存
+        
+        参数:
+            keyword (str): 搜索关键词
+            timeout_ms (int): 耗时预算（毫秒）
+            max_results (int): 最大结果数量，默认使用配置文件设置
+            use_cache (bool): 是否使用缓存，默认使用配置文件设置
+            use_index (bool): 缓存未命中时是否尝试用本地全文索引回答
+        
+        返回:
+            tuple: (笔记列表, 是否为部分结果)
+        
+        异常:
+            CrawlRejected: 需要抓取但抓取队列已满
+        """
+        deadline = SearchDeadline(timeout_ms)
+        outcome = {}
+        
+        def run():
+            try:
+                outcome['notes'] = self.search(keyword, max_results, use_cache, use_index, deadline=deadline)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                deadline.finish()
+        
+        # 抓取线程沿用请求的上下文（日志关联ID）
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(run,), name='deadline-search', daemon=True).start()
+        
+        if deadline.wait():
+            if 'error' in outcome:
+                raise outcome['error']
+            return outcome['notes'], False
+        
+        notes = deadline.notes[:max_results or self.search_config['DEFAULT_MAX_RESULTS']]
+        logger.info(f"搜索耗时预算 {timeout_ms}ms 已用完，返回 {len(notes)} 条部分结果，抓取在后台继续: {keyword}")
+        return notes, True
+    
+    def search(self, keyword, max_results=None, use_cache=None, use_index=None, deadline=None):
         """
         搜索小红书笔记
         
@@ -617,66 +944,354 @@ class XiaoHongShuCrawler:
             keyword (str): 搜索关键词
             max_results (int): 最大结果数量，默认使用配置文件设置
             use_cache (bool): 是否使用缓存，默认使用配置文件设置
+            use_index (bool): 缓存未命中时是否尝试用本地全文索引回答，默认在使用缓存时按配置文件设置
+            deadline (SearchDeadline): 耗时预算（由search_within创建），抓取时按预算缩短等待并发布中间结果
         
         返回:
             list: 笔记列表
+        
+        异常:
+            CrawlRejected: 需要抓取但抓取队列已满
         """
-        if not keyword:
-            logger.error("搜索关键词不能为空")
-            return []
+        with search_context(keyword):
+            if not keyword:
+                logger.error("搜索关键词不能为空")
+                return []
+            
+            # 写法不同的同一关键词共用缓存和索引（缓存键在内部规范化），抓取使用用户的原始写法
+            keyword = clean_query(keyword)
+            
+            # 使用配置文件的默认值
+            max_results = max_results or self.search_config['DEFAULT_MAX_RESULTS']
+            use_cache = use_cache if use_cache is not None else self.search_config['USE_CACHE']
+            if use_index is None:
+                use_index = use_cache and NOTE_INDEX_CONFIG['ANSWER_FROM_INDEX']
+            
+            # 检查缓存
+            if use_cache:
+                cache_entry = self._load_cache_entry(keyword)
+                if cache_entry and cache_entry['data'] and self._needs_top_up(cache_entry, max_results):
+                    # 缓存的笔记不够，从上次抓取的位置继续补充
+                    CACHE_REQUESTS.labels('search', 'partial').inc()
+                    return self._top_up(keyword, cache_entry, max_results, deadline)
+                if cache_entry and cache_entry['data']:
+                    cached_data = cache_entry['data']
+                    logger.info(f"从缓存加载到 {len(cached_data)} 条笔记")
+                    self.cache_stats['hits'] += 1
+                    CACHE_REQUESTS.labels('search', 'hit').inc()
+                    if cache_entry.get('source') == 'warmer':
+                        self.cache_stats['warmed_hits'] += 1
+                    self._remember_note_summaries(cached_data)
+                    return cached_data[:max_results]
+                self.cache_stats['misses'] += 1
+                CACHE_REQUESTS.labels('search', 'miss').inc()
+            
+            # 本地全文索引中已有足够的新鲜笔记时直接返回，不启动浏览器
+            if use_index and self.note_index.available:
+                with SEARCH_PHASE_SECONDS.time('index_search'):
+                    indexed_notes = self.note_index.answer(keyword, max_results)
+                CACHE_REQUESTS.labels('index', 'hit' if indexed_notes else 'miss').inc()
+                if indexed_notes:
+                    logger.info(f"从本地全文索引返回 {len(indexed_notes)} 条笔记: {keyword}")
+                    self._generate_result_html(keyword, indexed_notes)
+                    self._remember_note_summaries(indexed_notes)
+                    return indexed_notes
+            
+            logger.info(f"开始搜索关键词: {keyword}")
+            
+            # 使用Selenium搜索
+            with self.scheduler.slot(LANE_INTERACTIVE):
+                notes, progress = self._crawl(keyword, max_results, deadline=deadline)
+            
+            # 保存到缓存
+            if notes:
+                logger.info(f"搜索成功，找到 {len(notes)} 条笔记")
+                self._save_to_cache(keyword, notes, crawl_state=self._build_crawl_state(notes, progress, max_results))
+                self._remember_note_summaries(notes)
+                self._prefetch_details(notes)
+            else:
+                logger.warning(f"搜索未找到任何结果")
+            
+            return notes[:max_results]
+    
+    def _needs_top_up(self, cache_entry, max_results):
+        """判断缓存是否需要增量补充抓取"""
+        if not INCREMENTAL_CRAWL_CONFIG['ENABLED'] or len(cache_entry['data']) >= max_results:
+            return False
+        # 旧版本缓存没有抓取进度；上次已滚动到底部时再抓取也不会有更多结果
+        crawl_state = cache_entry.get('crawl_state')
+        return bool(crawl_state) and not crawl_state.get('exhausted')
+    
+    def _top_up(self, keyword, cache_entry, max_results, deadline=None):
+        """
+        增量补充抓取：从上次抓取的位置继续，只抓取缓存中缺少的笔记并合并到缓存
         
-        # 使用配置文件的默认值
-        max_results = max_results or self.search_config['DEFAULT_MAX_RESULTS']
-        use_cache = use_cache if use_cache is not None else self.search_config['USE_CACHE']
+        参数:
+            keyword (str): 搜索关键词（clean_query整理后的原始写法）
+            cache_entry (dict): 未过期的缓存条目
+            max_results (int): 请求的结果数量
+            deadline (SearchDeadline): 耗时预算
         
-        # 检查缓存
-        if use_cache:
-            cached_data = self._load_from_cache(keyword)
-            if cached_data:
-                logger.info(f"从缓存加载到 {len(cached_data)} 条笔记")
-                return cached_data[:max_results]
+        返回:
+            list: 合并后的笔记列表
+        
+        异常:
+            CrawlRejected: 抓取队列已满
+        """
+        cached_data = cache_entry['data']
+        if deadline:
+            # 预算用完时至少返回已缓存的笔记
+            deadline.set_base(cached_data)
+        logger.info(f"缓存中只有 {len(cached_data)} 条笔记，补充抓取至 {max_results} 条: {keyword}")
+        
+        with self.scheduler.slot(LANE_INTERACTIVE):
+            new_notes, progress = self._crawl(keyword, max_results, previous=cache_entry, deadline=deadline)
+        
+        merged = cached_data + new_notes
+        logger.info(f"补充抓取到 {len(new_notes)} 条新笔记，合计 {len(merged)} 条")
+        self._save_to_cache(
+            keyword, merged,
+            source=cache_entry.get('source', 'search'),
+            crawl_state=self._build_crawl_state(merged, progress, max_results),
+            timestamp=cache_entry['timestamp'],
+            new_notes=new_notes
+        )
+        self._remember_note_summaries(merged)
+        self._prefetch_details(new_notes)
+        return merged[:max_results]
+    
+    @staticmethod
+    def _build_crawl_state(notes, progress, max_results):
+        """
+        生成缓存中保存的抓取进度
+        
+        参数:
+            notes (list): 缓存的全部笔记
+            progress (dict): 本次抓取的 {'scroll_depth': 滚动次数, 'reached_end': 是否已到页面底部}
+            max_results (int): 本次请求的结果数量
         
-        logger.info(f"开始搜索关键词: {keyword}")
+        返回:
+            dict: 抓取进度
+        """
+        last_note_id = next((note['id'] for note in reversed(notes) if note['id'].isalnum()), '')
+        scroll_depth = progress['scroll_depth']
+        return {
+            'scroll_depth': scroll_depth,
+            'last_note_id': last_note_id,
+            'notes_per_scroll': round(len(notes) / (scroll_depth + 1), 2),
+            'exhausted': progress['reached_end'] and len(notes) < max_results,
+        }
+    
+    def _prefetch_details(self, notes):
+        """后台预取笔记详情"""
+        if DETAIL_CONFIG['PREFETCH_ENABLED'] and notes:
+            self.detail_prefetcher.start()
+            self.detail_prefetcher.submit(
+                [note for note in notes if self._is_detail_url(note.get('url', ''))]
+            )
+    
+    def warm_keyword(self, keyword, max_results=None):
+        """
+        后台预热关键词缓存（仅在浏览器空闲时执行）
         
-        # 使用Selenium搜索
-        notes = self._search_with_selenium(keyword, max_results)
+        已有缓存（如经过补充抓取）的笔记数更多时按已有笔记数抓取；重新抓取到的笔记仍少于已有笔记时，
+        已有的其余笔记追加在后面，滚动深度取两次中较大的一个，刷新后的缓存不会变少
         
-        # 保存到缓存
-        if notes:
-            logger.info(f"搜索成功，找到 {len(notes)} 条笔记")
-            self._save_to_cache(keyword, notes)
+        参数:
+            keyword (str): 搜索关键词
+            max_results (int): 最大结果数量，默认使用配置文件设置
+        
+        返回:
+            bool: 预热成功返回True，失败返回False；浏览器被占用时返回None
+        """
+        with search_context(keyword):
+            keyword = clean_query(keyword)
+            previous = self._read_cache_entry(keyword)
+            known_notes = previous['data'] if previous else []
+            max_results = max(max_results or self.search_config['DEFAULT_MAX_RESULTS'], len(known_notes))
+            
+            with self.scheduler.try_slot(LANE_WARMING) as acquired:
+                if not acquired:
+                    return None
+                
+                logger.info(f"后台预热关键词缓存: {keyword}（{max_results} 条）")
+                notes, progress = self._crawl(keyword, max_results)
+            
+            if not notes:
+                logger.warning(f"预热未找到任何结果: {keyword}")
+                return False
+            
+            if len(notes) < len(known_notes):
+                is_known = self._known_note_filter(notes)
+                notes = (notes + [note for note in known_notes if not is_known(note)])[:max_results]
+                previous_depth = (previous.get('crawl_state') or {}).get('scroll_depth', 0)
+                progress = dict(progress, scroll_depth=max(progress['scroll_depth'], previous_depth))
+            
+            self._save_to_cache(keyword, notes, source='warmer',
+                                crawl_state=self._build_crawl_state(notes, progress, max_results))
+            self._remember_note_summaries(notes)
+            return True
+    
+    def _crawl(self, keyword, max_results, previous=None, deadline=None):
+        """
+        抓取搜索结果（调用方需持有浏览器锁）
+        
+        参数:
+            keyword (str): 搜索关键词
+            max_results (int): 最大结果数量
+            previous (dict): 补充抓取时为已有的缓存条目，从其抓取进度继续，并去掉已抓取过的笔记
+            deadline (SearchDeadline): 耗时预算
+        
+        返回:
+            tuple: (新抓取到的笔记列表, {'scroll_depth': 滚动次数, 'reached_end': 是否已到页面底部})
+        """
+        known_notes = previous['data'] if previous else []
+        known_ids = {note['id'] for note in known_notes}
+        is_known = self._known_note_filter(known_notes)
+        if self.mock_backend and not self.mock_backend.uses_browser:
+            notes = self.mock_backend.search(keyword, max_results, offset=len(known_notes))
+            progress = {'scroll_depth': 0, 'reached_end': False}
         else:
-            logger.warning(f"搜索未找到任何结果")
+            # HTTP抓取一次请求就能拿到第一页笔记，没有得到新笔记时再启动浏览器
+            notes = self._search_with_http(keyword, max_results, known_ids) if self.http_fetcher else None
+            progress = {'scroll_depth': 0, 'reached_end': False}
+            if notes is None and (self.use_selenium or HTTP_FETCH_CONFIG['FALLBACK_TO_SELENIUM']):
+                notes, progress = self._search_with_selenium(
+                    keyword, max_results,
+                    resume_state=previous.get('crawl_state') if previous else None,
+                    known_count=len(known_notes),
+                    is_known=is_known,
+                    deadline=deadline
+                )
+            notes = notes or []
         
-        return notes[:max_results]
+        if is_known:
+            notes = [note for note in notes if not is_known(note)]
+        return notes, progress
     
-    def _search_with_selenium(self, keyword, max_results):
-        """使用Selenium搜索"""
+    @staticmethod
+    def _known_note_filter(known_notes):
+        """
+        生成判断笔记是否已缓存的函数（补充抓取时使用）
+        
+        启用近似重复检测时按笔记指纹判断，策略1/3生成临时ID的笔记也能对应到已缓存的同一张卡片
+        
+        参数:
+            known_notes (list): 已缓存的笔记
+        
+        返回:
+            callable: 参数为笔记，已缓存时返回True；没有已缓存的笔记时返回None
+        """
+        if not known_notes:
+            return None
+        if not DEDUP_CONFIG['ENABLED']:
+            known_ids = {note['id'] for note in known_notes}
+            return lambda note: note['id'] in known_ids
+        
+        index = NearDuplicateIndex()
+        for note in known_notes:
+            index.add(note)
+        return lambda note: index.find(note) is not None
+    
+    def _search_with_http(self, keyword, max_results, known_ids=()):
+        """
+        不启动浏览器，请求搜索页并解析初始状态JSON
+        
+        参数:
+            keyword (str): 搜索关键词
+            max_results (int): 最大结果数量
+            known_ids (set): 已缓存的笔记ID（补充抓取时）
+        
+        返回:
+            list: 未缓存过的笔记；HTTP抓取暂停、失败或没有新笔记时返回None，由调用方改用Selenium
+        """
+        if not self.http_fetcher.available:
+            return None
+        
+        page_source = None
+        try:
+            # 本地替身服务器不占用对外请求额度
+            if self.http_fetcher.base_url == URLS['XIAOHONGSHU_BASE']:
+                self.scheduler.throttle()
+            with SEARCH_PHASE_SECONDS.time('http_fetch'):
+                page_source = self.http_fetcher.fetch_search_page(keyword)
+            with SEARCH_PHASE_SECONDS.time('http_parse'):
+                state = parse_initial_state(page_source)
+                notes = notes_from_state(state, len(known_ids) + max_results) if state else []
+        except Exception as e:
+            logger.warning(f"HTTP抓取搜索页失败: {str(e)}")
+            notes = []
+        
+        self.http_fetcher.record_result(bool(notes))
+        if not notes:
+            if page_source and ERROR_CONFIG['SAVE_ERROR_PAGE_SOURCE']:
+                self.artifact_writer.submit_text(f"http_empty_search_{query_hash(keyword)}_{int(time.time())}.html", page_source)
+            logger.info(f"HTTP抓取未得到笔记，改用浏览器: {keyword}")
+            return None
+        
+        # 初始状态中的笔记都有真实ID，只按ID去重；记入历史索引，用于补全之后浏览器抓取时的临时ID
+        notes = list(OrderedDict((note['id'], note) for note in notes).values())
+        if DEDUP_CONFIG['ENABLED']:
+            for note in notes:
+                self.note_history.remember(note)
+        new_notes = [note for note in notes if note['id'] not in known_ids]
+        logger.info(f"HTTP抓取到 {len(notes)} 条笔记（{len(new_notes)} 条未缓存）: {keyword}")
+        return new_notes or None
+    
+    def _search_with_selenium(self, keyword, max_results, resume_state=None, known_count=0, is_known=None,
+                              deadline=None):
+        """
+        使用Selenium搜索
+        
+        参数:
+            keyword (str): 搜索关键词
+            max_results (int): 最大结果数量
+            resume_state (dict): 上次抓取的进度，提供时先快进到上次的滚动位置，再只为缺少的笔记继续滚动
+            known_count (int): 已缓存的笔记数，补充抓取时只提取缺少的 max_results - known_count 条
+            is_known (callable): 判断笔记是否已缓存，提取时跳过已缓存的卡片
+            deadline (SearchDeadline): 耗时预算，等待页面加载和滚动只使用预算内的时间；
+                因此被截短时先交出第一轮提取的结果，再在后台继续滚动和提取
+        
+        返回:
+            tuple: (笔记列表, 抓取进度)
+        """
+        progress = {'scroll_depth': 0, 'reached_end': False}
         if not self._ensure_driver_initialized():
             logger.error("WebDriver初始化失败")
-            return []
+            return [], progress
 
         notes = []
-        search_url = URLS['SEARCH_URL_TEMPLATE'].format(keyword=quote(keyword))
+        page_source = None
+        if self.mock_backend:
+            search_url = self.mock_backend.search_page_url(keyword, max_results)
+        else:
+            search_url = self._site_url(URLS['SEARCH_URL_TEMPLATE'].format(keyword=quote(keyword)))
+        
+        recorder = SessionRecorder(self.driver) if self.capture_writer else None
+        if recorder and not recorder.start():
+            recorder = None
         
         try:
             logger.info(f"开始使用Selenium搜索: {keyword}")
             logger.info(f"搜索URL: {search_url}")
             logger.info(f"使用三种提取策略")
             
-            self.driver.get(search_url)
+            with SEARCH_PHASE_SECONDS.time('navigation'):
+                self._load_page(search_url)
             
-            # 等待页面加载 - 增加等待时间确保内容充分加载
-            time.sleep(12)
-            
-            # 等待特定元素出现，确保页面加载完成
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    lambda driver: len(driver.find_elements(By.TAG_NAME, "a")) > 10
-                )
-                logger.info("页面元素加载完成")
-            except TimeoutException:
-                logger.warning("等待页面元素加载超时，继续执行")
+            with SEARCH_PHASE_SECONDS.time('readiness_wait'):
+                # 等待页面加载 - 增加等待时间确保内容充分加载（本地模拟页面无需等待）
+                if not self.mock_backend:
+                    time.sleep(deadline.budget(12) if deadline else 12)
+                
+                # 等待特定元素出现，确保页面加载完成
+                try:
+                    WebDriverWait(self.driver, deadline.budget(10) if deadline else 10).until(
+                        lambda driver: len(driver.find_elements(By.TAG_NAME, "a")) > 10
+                    )
+                    logger.info("页面元素加载完成")
+                except TimeoutException:
+                    logger.warning("等待页面元素加载超时，继续执行")
             
             # 记录页面信息
             current_url = self.driver.current_url
@@ -684,48 +1299,96 @@ class XiaoHongShuCrawler:
             logger.info(f"当前页面URL: {current_url}")
             logger.info(f"页面标题: {page_title}")
             
-            # 保存页面源码
-            page_source = self.driver.page_source
-            page_source_path = os.path.join(self.cache_dir, f"page_source_{hashlib.md5(keyword.encode()).hexdigest()}.html")
-            with open(page_source_path, 'w', encoding='utf-8') as f:
-                f.write(page_source)
-            logger.info(f"已保存页面源码: {page_source_path}")
+            # 页面DOM只序列化一次，反爬虫检测和调试文件共用
+            with SEARCH_PHASE_SECONDS.time('page_source'):
+                page_source = self.driver.page_source
+            capture = self.artifact_writer.should_capture()
+            artifact_name = f"search_{query_hash(keyword)}_{int(time.time())}"
+            if capture:
+                self.artifact_writer.submit_text(f"{artifact_name}.html", page_source)
+                logger.info(f"页面源码已提交后台保存: {artifact_name}")
             
             # 处理可能的弹窗或反爬虫机制
-            self._handle_anti_crawler()
+            with SEARCH_PHASE_SECONDS.time('anti_crawler'):
+                self._handle_anti_crawler(page_source)
             
             # 滚动页面加载更多内容
-            self._scroll_page()
+            with SEARCH_PHASE_SECONDS.time('scroll'):
+                if resume_state:
+                    progress = self._resume_scroll(resume_state, max_results - known_count, deadline)
+                else:
+                    scroll_depth, reached_end = self._scroll_page(deadline=deadline)
+                    progress = {'scroll_depth': scroll_depth, 'reached_end': reached_end}
             
-            # 保存搜索结果截图
-            screenshot_path = os.path.join(self.cache_dir, f"search_{hashlib.md5(keyword.encode()).hexdigest()}.png")
-            self.driver.save_screenshot(screenshot_path)
-            logger.info(f"已保存搜索结果截图: {screenshot_path}")
+            # 保存搜索结果截图（截图在内存中获取，写盘在后台完成）
+            if capture and DEBUG_ARTIFACTS_CONFIG['SAVE_SCREENSHOT']:
+                with SEARCH_PHASE_SECONDS.time('screenshot'):
+                    self.artifact_writer.submit_bytes(f"{artifact_name}.png", self.driver.get_screenshot_as_png())
             
             # 使用三种策略提取笔记
-            notes = self._extract_notes_with_strategies(keyword, max_results)
+            target = max_results - known_count
+            notes = self._extract_notes_with_strategies(keyword, target, deadline, is_known)
+            
+            # 等待和滚动被预算截短：先交出部分结果，再不受预算限制地继续滚动并重新提取，完整结果写入缓存
+            if deadline and deadline.cut_short and len(notes) < target and not progress['reached_end']:
+                deadline.handoff(notes)
+                logger.info(f"耗时预算内提取到 {len(notes)} 条笔记，已返回部分结果，后台继续抓取: {keyword}")
+                with SEARCH_PHASE_SECONDS.time('scroll'):
+                    scroll_depth, reached_end = self._scroll_page()
+                progress = {'scroll_depth': progress['scroll_depth'] + scroll_depth, 'reached_end': reached_end}
+                notes = self._extract_notes_with_strategies(keyword, target, is_known=is_known)
+            
+            # 没有提取到笔记时按出错处理，保存已获取的页面源码便于排查
+            if not notes and not capture and ERROR_CONFIG['SAVE_ERROR_PAGE_SOURCE']:
+                self.artifact_writer.submit_text(f"empty_{artifact_name}.html", page_source)
+                logger.info(f"未提取到笔记，页面源码已提交后台保存: empty_{artifact_name}")
             
-            return notes
+            return notes, progress
         
         except Exception as e:
             logger.error(f"Selenium搜索出错: {str(e)}")
             
-            # 保存错误页面信息
+            # 保存错误页面信息（任何保存模式下都会保存）
+            error_name = f"error_{int(time.time())}"
             if ERROR_CONFIG['SAVE_ERROR_SCREENSHOTS']:
                 try:
-                    error_screenshot_path = os.path.join(self.cache_dir, f"error_{int(time.time())}.png")
-                    self.driver.save_screenshot(error_screenshot_path)
-                    logger.info(f"已保存错误页面截图: {error_screenshot_path}")
+                    self.artifact_writer.submit_bytes(f"{error_name}.png", self.driver.get_screenshot_as_png())
+                    logger.info(f"错误页面截图已提交后台保存: {error_name}")
+                except:
+                    pass
+            if ERROR_CONFIG['SAVE_ERROR_PAGE_SOURCE']:
+                try:
+                    self.artifact_writer.submit_text(f"{error_name}.html", page_source or self.driver.page_source)
                 except:
                     pass
             
-            return []
+            return [], progress
+        
+        finally:
+            if recorder:
+                self._save_capture(recorder, keyword, search_url)
+    
+    def _save_capture(self, recorder, keyword, search_url):
+        """读取录制结果并提交后台保存（调用方需持有浏览器）"""
+        try:
+            with SEARCH_PHASE_SECONDS.time('capture'):
+                archive = recorder.collect(keyword, search_url)
+            name = f"capture_{query_hash(keyword)}_{int(time.time())}.har"
+            self.capture_writer.submit_text(name, json.dumps(archive, ensure_ascii=False))
+            logger.info(f"已录制 {len(archive['log']['entries'])} 个响应，存档已提交后台保存: {name}")
+        except Exception as e:
+            logger.warning(f"保存录制结果失败: {str(e)}")
     
-    def _handle_anti_crawler(self):
-        """处理反爬虫机制"""
+    def _handle_anti_crawler(self, page_source=None):
+        """
+        处理反爬虫机制
+        
+        参数:
+            page_source (str): 已获取的页面源码，避免再次序列化DOM
+        """
         try:
             # 检查是否有登录提示或验证码
-            page_text = self.driver.page_source.lower()
+            page_text = (page_source if page_source is not None else self.driver.page_source).lower()
             if any(keyword in page_text for keyword in ['登录', 'login', '验证', 'captcha']):
                 logger.warning("检测到反爬虫机制或登录要求")
             
@@ -752,58 +1415,180 @@ class XiaoHongShuCrawler:
         except Exception as e:
             logger.warning(f"处理反爬虫机制时出错: {str(e)}")
     
-    def _scroll_page(self):
-        """滚动页面以加载更多内容"""
+    def _scroll_page(self, scroll_count=None, scroll_pause_time=None, until_note_id=None, deadline=None):
+        """
+        滚动页面以加载更多内容
+        
+        参数:
+            scroll_count (int): 最多滚动次数，默认使用配置文件设置
+            scroll_pause_time (float): 每次滚动后的停顿时间（秒），默认使用配置文件设置
+            until_note_id (str): 页面中出现该笔记的链接后停止滚动
+            deadline (SearchDeadline): 耗时预算，剩余预算不够一次完整停顿时停止滚动
+        
+        返回:
+            tuple: (实际滚动次数, 是否已到页面底部)
+        """
+        scroll_count = self.crawler_config['SCROLL_COUNT'] if scroll_count is None else scroll_count
+        scroll_pause_time = scroll_pause_time or self.crawler_config['SCROLL_PAUSE_TIME']
+        end_checks = INCREMENTAL_CRAWL_CONFIG['END_OF_PAGE_CHECKS']
+        scrolls = 0
+        unchanged = 0
+        
         try:
             logger.info("开始滚动页面以加载内容")
-            scroll_count = self.crawler_config['SCROLL_COUNT']
-            scroll_pause_time = self.crawler_config['SCROLL_PAUSE_TIME']
+            height = self.driver.execute_script("return document.body.scrollHeight;")
             
             for i in range(scroll_count):
+                if until_note_id and self.driver.find_elements(By.CSS_SELECTOR, f"a[href*='{until_note_id}']"):
+                    logger.info(f"已滚动到上次抓取的最后一条笔记: {until_note_id}")
+                    break
+                if deadline and deadline.budget(scroll_pause_time) < scroll_pause_time:
+                    logger.info(f"耗时预算不足，滚动 {scrolls} 次后停止")
+                    break
+                
                 # 滚动到页面底部
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
                 time.sleep(scroll_pause_time)
+                scrolls += 1
                 logger.info(f"第{i+1}次滚动完成")
+                
+                # 页面高度连续不变说明没有更多内容
+                new_height = self.driver.execute_script("return document.body.scrollHeight;")
+                unchanged = unchanged + 1 if new_height == height else 0
+                height = new_height
+                if unchanged >= end_checks:
+                    logger.info("页面高度不再变化，已到达搜索结果底部")
+                    return scrolls, True
         
         except Exception as e:
             logger.warning(f"滚动页面时出错: {str(e)}")
+        
+        return scrolls, False
     
-    def _extract_notes_with_strategies(self, keyword, max_results):
-        """使用三种策略提取笔记"""
+    def _resume_scroll(self, resume_state, missing, deadline=None):
+        """
+        从上次抓取的位置继续滚动
+        
+        先用较短的停顿快进到上次的滚动深度（出现上次的最后一条笔记即停止），
+        再按历史的每次滚动新增笔记数估算缺少的笔记需要的滚动次数
+        
+        参数:
+            resume_state (dict): 上次抓取的进度
+            missing (int): 缺少的笔记数
+            deadline (SearchDeadline): 耗时预算
+        
+        返回:
+            dict: 本次抓取的进度
+        """
+        config = INCREMENTAL_CRAWL_CONFIG
+        notes_per_scroll = resume_state.get('notes_per_scroll') or config['DEFAULT_NOTES_PER_SCROLL']
+        extra_scrolls = min(config['MAX_EXTRA_SCROLLS'], max(1, math.ceil(missing / notes_per_scroll)))
+        
+        depth = resume_state.get('scroll_depth', 0)
+        logger.info(f"快进到上次的滚动深度: {depth}，之后额外滚动 {extra_scrolls} 次")
+        fast_forward, reached_end = self._scroll_page(depth, config['FAST_FORWARD_PAUSE'],
+                                                      resume_state.get('last_note_id') or None, deadline)
+        if reached_end:
+            return {'scroll_depth': fast_forward, 'reached_end': True}
+        
+        scrolls, reached_end = self._scroll_page(extra_scrolls, deadline=deadline)
+        return {'scroll_depth': fast_forward + scrolls, 'reached_end': reached_end}
+    
+    def _extract_notes_with_strategies(self, keyword, max_results, deadline=None, is_known=None):
+        """
+        使用三种策略提取笔记
+        
+        补充抓取时max_results为缺少的笔记数，is_known判断笔记是否已缓存：策略1、2跳过已缓存的卡片后才计入处理上限，
+        各策略的结果和最终结果都去掉已缓存的笔记
+        
+        策略按历史命中率排列，去重后的有效笔记数达到max_results后跳过剩余策略（各策略的笔记提取后
+        逐批加入同一个去重索引，不重复计算已加入的笔记）；
+        每隔FULL_RUN_INTERVAL次搜索按配置顺序完整执行一次，以发现页面结构变化。
+        各策略的命中率按其最多能提取的笔记数 min(处理上限, max_results) 计算
+        有耗时预算时每个策略执行完都发布一次当前的有效笔记，预算到期时请求直接返回已发布的笔记
+        """
         logger.info("=== 开始使用三种提取策略 ===")
         
+        full_run = self.extraction_stats.begin_search()
+        early_stop = not full_run and ADAPTIVE_EXTRACTION_CONFIG['EARLY_STOP']
+        
+        max_elements = self._strategy_limit('STRATEGY_1', 'MAX_ELEMENTS_PER_SELECTOR', max_results)
+        max_links = self._strategy_limit('STRATEGY_2', 'MAX_LINKS_TO_PROCESS', max_results)
+        
+        # 策略名 -> (配置项, 显示名称, 提取函数, 最多能提取的笔记数)
+        strategies = {
+            'strategy1': ('STRATEGY_1', '策略1',
+                          lambda: self._extract_strategy_1(adaptive=not full_run, max_elements=max_elements,
+                                                           skip=is_known),
+                          min(max_elements, max_results)),
+            'strategy2': ('STRATEGY_2', '策略2', lambda: self._extract_strategy_2(max_links, skip=is_known),
+                          min(max_links, max_results)),
+            'strategy3': ('STRATEGY_3', '策略3', lambda: self._extract_strategy_3(keyword), max_results),
+        }
+        enabled = [name for name, (config_key, _, _, _) in strategies.items()
+                   if self.extraction_strategies[config_key]['ENABLED']]
+        ranked = self.extraction_stats.ordered(GROUP_STRATEGY, enabled)
+        order = enabled if full_run else ranked
+        logger.info(f"策略执行顺序: {' -> '.join(order)}（{'完整执行' if full_run else '按历史命中率'}）")
+        
         all_notes = []
         strategy_results = {}
+        running = NoteDeduplicator() if DEDUP_CONFIG['ENABLED'] else None
+        
+        for position, name in enumerate(order):
+            config_key, label, extract, expected = strategies[name]
+            with SEARCH_PHASE_SECONDS.time(name):
+                notes = extract()
+                if is_known:
+                    notes = [note for note in notes if not is_known(note)]
+            all_notes.extend(notes)
+            strategy_results[name] = len(notes)
+            self.extraction_stats.record(GROUP_STRATEGY, name, self._count_valid_notes(notes), expected)
+            logger.info(f"{label} - {self.extraction_strategies[config_key]['NAME']}，提取到 {len(notes)} 条笔记")
+            if running is not None:
+                running.add(notes)
+            
+            remaining = order[position + 1:]
+            publish = deadline and not deadline.handed_off
+            if publish or (early_stop and remaining):
+                current = self._valid_notes(running.notes() if running is not None else all_notes)
+                if publish:
+                    deadline.publish(current[:max_results])
+                valid_count = len(current)
+                if early_stop and remaining and valid_count >= max_results:
+                    for skipped in remaining:
+                        STRATEGY_SKIPS.labels(skipped).inc()
+                    logger.info(f"已提取到 {valid_count} 条有效笔记，跳过: {', '.join(remaining)}")
+                    break
         
-        # 策略1: CSS选择器方法
-        if self.extraction_strategies['STRATEGY_1']['ENABLED']:
-            strategy1_notes = self._extract_strategy_1()
-            all_notes.extend(strategy1_notes)
-            strategy_results['strategy1'] = len(strategy1_notes)
-            logger.info(f"策略1 - {self.extraction_strategies['STRATEGY_1']['NAME']}，提取到 {len(strategy1_notes)} 条笔记")
-        
-        # 策略2: URL模式匹配方法
-        if self.extraction_strategies['STRATEGY_2']['ENABLED']:
-            strategy2_notes = self._extract_strategy_2()
-            all_notes.extend(strategy2_notes)
-            strategy_results['strategy2'] = len(strategy2_notes)
-            logger.info(f"策略2 - {self.extraction_strategies['STRATEGY_2']['NAME']}，提取到 {len(strategy2_notes)} 条笔记")
-        
-        # 策略3: DOM结构分析方法
-        if self.extraction_strategies['STRATEGY_3']['ENABLED']:
-            strategy3_notes = self._extract_strategy_3(keyword)
-            all_notes.extend(strategy3_notes)
-            strategy_results['strategy3'] = len(strategy3_notes)
-            logger.info(f"策略3 - {self.extraction_strategies['STRATEGY_3']['NAME']}，提取到 {len(strategy3_notes)} 条笔记")
-        
-        # 去重处理
-        unique_notes = self._deduplicate_notes(all_notes)
-        
-        # URL验证和过滤 - 删除没有有效URL的笔记
-        valid_notes = self._filter_notes_with_valid_urls(unique_notes)
+        if full_run and ranked:
+            new_ranked = self.extraction_stats.ordered(GROUP_STRATEGY, enabled)
+            if new_ranked[0] != ranked[0]:
+                logger.info(f"页面结构可能已变化，命中率最高的策略由 {ranked[0]} 变为 {new_ranked[0]}")
+        self.extraction_stats.save_snapshot()
+        
+        with SEARCH_PHASE_SECONDS.time('dedup_filter'):
+            # 去重处理
+            unique_notes = self._deduplicate_notes(all_notes)
+            
+            # URL验证和过滤 - 删除没有有效URL的笔记
+            valid_notes = self._filter_notes_with_valid_urls(unique_notes)
+            
+            # 历史索引可能把临时ID补全为已缓存笔记的真实ID
+            if is_known:
+                valid_notes = [note for note in valid_notes if not is_known(note)]
         
         final_notes = valid_notes[:max_results]
         
+        # 记录各策略产出和各阶段笔记数
+        for strategy, count in strategy_results.items():
+            STRATEGY_RUNS.labels(strategy).inc()
+            STRATEGY_NOTES.labels(strategy).inc(count)
+        EXTRACTED_NOTES.labels('raw').inc(len(all_notes))
+        EXTRACTED_NOTES.labels('unique').inc(len(unique_notes))
+        EXTRACTED_NOTES.labels('valid').inc(len(valid_notes))
+        EXTRACTED_NOTES.labels('returned').inc(len(final_notes))
+        
         logger.info("=== 搜索完成 ===")
         for strategy, count in strategy_results.items():
             logger.info(f"{strategy}结果: {count} 条")
@@ -813,47 +1598,88 @@ class XiaoHongShuCrawler:
         
         return final_notes
     
-    def _extract_strategy_1(self):
-        """策略1: CSS选择器方法"""
+    def _strategy_limit(self, config_key, limit_key, max_results):
+        """策略1、2的处理上限，启用SCALE_LIMITS时至少为max_results，使提前结束可以生效"""
+        limit = self.extraction_strategies[config_key][limit_key]
+        if ADAPTIVE_EXTRACTION_CONFIG['SCALE_LIMITS']:
+            return max(limit, max_results)
+        return limit
+    
+    def _valid_notes(self, notes):
+        """按ID去重并去掉URL无效的笔记（用于发布中间结果，不输出过滤日志）"""
+        unique = OrderedDict()
+        for note in notes:
+            if note['id'] not in unique and self._is_valid_note_url(note.get('url', '').strip()):
+                unique[note['id']] = note
+        return list(unique.values())
+    
+    def _count_valid_notes(self, notes):
+        """统计按ID去重后URL有效的笔记数（不输出过滤日志）"""
+        return len(self._valid_notes(notes))
+    
+    def _extract_strategy_1(self, adaptive=False, max_elements=None, skip=None):
+        """
+        策略1: CSS选择器方法
+        
+        参数:
+            adaptive (bool): 是否按历史命中率排列选择器，False时按配置顺序尝试
+            max_elements (int): 每个选择器最多处理的元素数，默认为MAX_ELEMENTS_PER_SELECTOR
+            skip (callable): 判断笔记是否应跳过（已缓存），跳过的元素不计入max_elements
+        """
         logger.info(f"--- 开始执行策略1: {self.extraction_strategies['STRATEGY_1']['NAME']} ---")
         
         notes = []
         selectors = self.extraction_strategies['STRATEGY_1']['SELECTORS']
-        max_elements = self.extraction_strategies['STRATEGY_1']['MAX_ELEMENTS_PER_SELECTOR']
+        max_elements = max_elements or self.extraction_strategies['STRATEGY_1']['MAX_ELEMENTS_PER_SELECTOR']
+        ordered_selectors = self.extraction_stats.ordered(GROUP_SELECTOR, selectors) if adaptive else selectors
         
-        for i, selector in enumerate(selectors):
+        for selector in ordered_selectors:
+            i = selectors.index(selector)
             try:
                 logger.info(f"尝试选择器 {i+1}: {selector}")
                 elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                 logger.info(f"找到 {len(elements)} 个元素")
                 
+                skipped = 0
                 if elements:
-                    for j, element in enumerate(elements[:max_elements]):
+                    for j, element in enumerate(elements):
+                        if j - skipped >= max_elements:
+                            break
                         try:
                             note = self._extract_note_from_element(element, f"s1_{i}_{j}")
-                            if note:
+                            if note and skip and skip(note):
+                                skipped += 1
+                            elif note:
                                 notes.append(note)
-                                logger.info(f"成功提取笔记: {note['title'][:30]}...")
+                                logger.debug(f"成功提取笔记: {note['title'][:30]}...", extra=PER_ELEMENT)
                         except Exception as e:
-                            logger.warning(f"处理元素时出错: {str(e)}")
-                    
-                    if notes:
-                        logger.info(f"策略1成功，使用选择器: {selector}")
-                        break
+                            logger.warning(f"处理元素时出错: {str(e)}", extra=PER_ELEMENT)
+                
+                self.extraction_stats.record(GROUP_SELECTOR, selector, self._count_valid_notes(notes), max_elements)
+                if notes or skipped:
+                    logger.info(f"策略1成功，使用选择器: {selector}")
+                    break
                         
             except Exception as e:
+                self.extraction_stats.record(GROUP_SELECTOR, selector, 0, max_elements)
                 logger.warning(f"选择器 '{selector}' 出错: {str(e)}")
         
         logger.info(f"--- 策略1完成，共提取 {len(notes)} 条笔记 ---")
         return notes
     
-    def _extract_strategy_2(self):
-        """策略2: URL模式匹配方法"""
+    def _extract_strategy_2(self, max_links=None, skip=None):
+        """
+        策略2: URL模式匹配方法
+        
+        参数:
+            max_links (int): 最多处理的链接数，默认为MAX_LINKS_TO_PROCESS
+            skip (callable): 判断笔记是否应跳过（已缓存），链接中的笔记ID已缓存时不计入max_links
+        """
         logger.info(f"--- 开始执行策略2: {self.extraction_strategies['STRATEGY_2']['NAME']} ---")
         
         notes = []
         url_patterns = self.extraction_strategies['STRATEGY_2']['URL_PATTERNS']
-        max_links = self.extraction_strategies['STRATEGY_2']['MAX_LINKS_TO_PROCESS']
+        max_links = max_links or self.extraction_strategies['STRATEGY_2']['MAX_LINKS_TO_PROCESS']
         
         try:
             # 获取所有链接
@@ -880,9 +1706,14 @@ class XiaoHongShuCrawler:
             
             # 处理链接 - 提前获取所有需要的属性避免stale element reference
             link_data = []
-            for link in unique_links[:max_links]:
+            for link in unique_links:
+                if len(link_data) >= max_links:
+                    break
                 try:
                     href = link.get_attribute("href")
+                    # 已缓存的笔记不占用处理上限（提取后还会再按完整内容判断一次）
+                    if href and skip and skip(Note(id=self._extract_note_id_from_url(href) or '', url=href)):
+                        continue
                     if href:
                         # 提前获取所有需要的数据
                         link_text = link.text.strip()
@@ -892,7 +1723,7 @@ class XiaoHongShuCrawler:
                             'element': link
                         })
                 except Exception as e:
-                    logger.warning(f"获取链接属性时出错: {str(e)}")
+                    logger.warning(f"获取链接属性时出错: {str(e)}", extra=PER_ELEMENT)
                     continue
             
             # 处理提取到的链接数据
@@ -905,10 +1736,10 @@ class XiaoHongShuCrawler:
                         note = self._extract_note_from_link_data(data, f"s2_{i}", note_id)
                         if note:
                             notes.append(note)
-                            logger.info(f"从链接提取笔记: {note['title'][:30]}...")
+                            logger.debug(f"从链接提取笔记: {note['title'][:30]}...", extra=PER_ELEMENT)
                     
                 except Exception as e:
-                    logger.warning(f"处理链接时出错: {str(e)}")
+                    logger.warning(f"处理链接时出错: {str(e)}", extra=PER_ELEMENT)
         
         except Exception as e:
             logger.error(f"策略2执行出错: {str(e)}")
@@ -916,6 +1747,11 @@ class XiaoHongShuCrawler:
         logger.info(f"--- 策略2完成，共提取 {len(notes)} 条笔记 ---")
         return notes
     
+    @staticmethod
+    def _xpath_keyword(keyword):
+        """XPath单引号字符串不能包含单引号，关键词含单引号时使用其中最长的一段"""
+        return max(keyword.split("'"), key=len) if "'" in keyword else keyword
+    
     def _extract_strategy_3(self, keyword):
         """策略3: DOM结构分析方法"""
         logger.info(f"--- 开始执行策略3: {self.extraction_strategies['STRATEGY_3']['NAME']} ---")
@@ -930,7 +1766,7 @@ class XiaoHongShuCrawler:
             keyword_elements = []
             for query in xpath_queries:
                 try:
-                    formatted_query = query.format(keyword=keyword)
+                    formatted_query = query.format(keyword=self._xpath_keyword(keyword))
                     elements = self.driver.find_elements(By.XPATH, formatted_query)
                     logger.info(f"XPath '{formatted_query}' 找到 {len(elements)} 个元素")
                     keyword_elements.extend(elements)
@@ -966,11 +1802,11 @@ class XiaoHongShuCrawler:
                                 note = self._extract_note_from_element(parent, f"s3_{i}")
                                 if note:
                                     notes.append(note)
-                                    logger.info(f"从DOM分析提取笔记: {note['title'][:30]}...")
+                                    logger.debug(f"从DOM分析提取笔记: {note['title'][:30]}...", extra=PER_ELEMENT)
                                     break
                     
                 except Exception as e:
-                    logger.warning(f"分析元素父容器时出错: {str(e)}")
+                    logger.warning(f"分析元素父容器时出错: {str(e)}", extra=PER_ELEMENT)
         
         except Exception as e:
             logger.error(f"策略3执行出错: {str(e)}")
@@ -1012,26 +1848,23 @@ class XiaoHongShuCrawler:
                         note_id = extracted_id
                     break
             
-            note = {
-                "id": note_id,
-                "title": title,
-                "desc": title,
-                "author": "小红书用户",
-                "cover": cover_url,
-                "url": note_url,
-                "likes": random.randint(100, 10000),
-                "comments": random.randint(10, 500),
-                "collects": random.randint(50, 2000),
-                "shares": random.randint(5, 200),
-                "published": "",
-                "content": "",
-                "images": []
-            }
+            note = Note(
+                id=note_id,
+                title=title,
+                desc=title,
+                author="小红书用户",
+                cover=cover_url,
+                url=note_url,
+                likes=random.randint(100, 10000),
+                comments=random.randint(10, 500),
+                collects=random.randint(50, 2000),
+                shares=random.randint(5, 200)
+            )
             
             return note
             
         except Exception as e:
-            logger.warning(f"从元素提取笔记信息失败: {str(e)}")
+            logger.warning(f"从元素提取笔记信息失败: {str(e)}", extra=PER_ELEMENT)
             return None
     
     def _extract_note_from_link_data(self, link_data, element_id, note_id):
@@ -1060,26 +1893,23 @@ class XiaoHongShuCrawler:
                 # 如果获取图片失败，继续处理其他信息
                 pass
             
-            note = {
-                "id": note_id,
-                "title": title,
-                "desc": title,
-                "author": "小红书用户",
-                "cover": cover_url,
-                "url": href,
-                "likes": random.randint(100, 10000),
-                "comments": random.randint(10, 500),
-                "collects": random.randint(50, 2000),
-                "shares": random.randint(5, 200),
-                "published": "",
-                "content": "",
-                "images": []
-            }
+            note = Note(
+                id=note_id,
+                title=title,
+                desc=title,
+                author="小红书用户",
+                cover=cover_url,
+                url=href,
+                likes=random.randint(100, 10000),
+                comments=random.randint(10, 500),
+                collects=random.randint(50, 2000),
+                shares=random.randint(5, 200)
+            )
             
             return note
             
         except Exception as e:
-            logger.warning(f"从链接数据提取笔记信息失败: {str(e)}")
+            logger.warning(f"从链接数据提取笔记信息失败: {str(e)}", extra=PER_ELEMENT)
             return None
 
     def _extract_note_from_link(self, link_element, element_id, note_id):
@@ -1111,26 +1941,23 @@ class XiaoHongShuCrawler:
             except:
                 pass
             
-            note = {
-                "id": note_id,
-                "title": title,
-                "desc": title,
-                "author": "小红书用户",
-                "cover": cover_url,
-                "url": href,
-                "likes": random.randint(100, 10000),
-                "comments": random.randint(10, 500),
-                "collects": random.randint(50, 2000),
-                "shares": random.randint(5, 200),
-                "published": "",
-                "content": "",
-                "images": []
-            }
+            note = Note(
+                id=note_id,
+                title=title,
+                desc=title,
+                author="小红书用户",
+                cover=cover_url,
+                url=href,
+                likes=random.randint(100, 10000),
+                comments=random.randint(10, 500),
+                collects=random.randint(50, 2000),
+                shares=random.randint(5, 200)
+            )
             
             return note
             
         except Exception as e:
-            logger.warning(f"从链接提取笔记信息失败: {str(e)}")
+            logger.warning(f"从链接提取笔记信息失败: {str(e)}", extra=PER_ELEMENT)
             return None
     
     def _extract_note_id_from_url(self, url):
@@ -1157,7 +1984,7 @@ class XiaoHongShuCrawler:
             return url.split('/')[-1].split('?')[0]
             
         except Exception as e:
-            logger.warning(f"提取笔记ID失败: {str(e)}")
+            logger.warning(f"提取笔记ID失败: {str(e)}", extra=PER_ELEMENT)
             return None
     
     def _is_likely_note_container(self, element):
@@ -1181,7 +2008,12 @@ class XiaoHongShuCrawler:
             return False
     
     def _deduplicate_notes(self, notes):
-        """去重笔记"""
+        """去重笔记（启用近似重复检测时合并同一卡片和内容几乎相同的笔记）"""
+        if DEDUP_CONFIG['ENABLED']:
+            unique_notes = deduplicate_notes(notes, self.note_history)
+            logger.info(f"近似重复检测合并了 {len(notes) - len(unique_notes)} 条笔记")
+            return unique_notes
+        
         seen_ids = set()
         unique_notes = []
         
@@ -1205,7 +2037,7 @@ class XiaoHongShuCrawler:
                 valid_notes.append(note)
             else:
                 removed_count += 1
-                logger.debug(f"移除无效URL的笔记: {note.get('title', '未知标题')[:30]}... - URL: {url}")
+                logger.debug(f"移除无效URL的笔记: {note.get('title', '未知标题')[:30]}... - URL: {url}", extra=PER_ELEMENT)
         
         if removed_count > 0:
             logger.info(f"已移除 {removed_count} 条无效URL的笔记")
@@ -1247,34 +2079,168 @@ class XiaoHongShuCrawler:
         
         # 对于策略1提取的其他URL，暂时放宽验证（如果长度合理）
         if len(url) > 10 and not url.startswith('data:') and not url.startswith('blob:'):
-            logger.debug(f"放宽验证通过的URL: {url}")
+            logger.debug(f"放宽验证通过的URL: {url}", extra=PER_ELEMENT)
             return True
         
         # 其他情况视为无效
         return False
     
-    def get_note_detail(self, note_id):
-        """获取笔记详情"""
+    def _remember_note_summaries(self, notes):
+        """记录搜索结果中的笔记摘要，详情页使用其中的URL和封面"""
+        limit = DETAIL_CONFIG['MEMORY_CACHE_SIZE'] * 4
+        for note in notes:
+            note_id = note.get('id')
+            if not note_id:
+                continue
+            self._note_summaries[note_id] = note
+            self._note_summaries.move_to_end(note_id)
+        while len(self._note_summaries) > limit:
+            self._note_summaries.popitem(last=False)
+    
+    def _is_detail_url(self, url):
+        """判断URL是否为可直接打开的笔记详情页"""
+        return bool(url) and any(pattern in url for pattern in ['/explore/', '/discovery/item/'])
+    
+    def get_note_detail(self, note_id, use_cache=None):
+        """
+        获取笔记详情
+        
+        参数:
+            note_id (str): 笔记ID
+            use_cache (bool): 是否使用详情缓存，默认使用配置文件设置
+        
+        返回:
+            Note: 笔记详情，获取失败时返回None
+        
+        异常:
+            CrawlRejected: 需要抓取但抓取队列已满
+        """
         if not note_id:
             logger.error("笔记ID不能为空")
             return None
         
-        # 模拟数据，实际应用中需要根据具体API实现
-        return {
-            "id": note_id,
-            "title": "模拟笔记详情",
-            "content": "<p>这是笔记的详细内容，包含了产品的使用体验、优缺点分析等。</p>",
-            "images": [
-                f"https://via.placeholder.com/800x600/fe2c55/ffffff?text=详情图片1",
-                f"https://via.placeholder.com/800x600/fe2c55/ffffff?text=详情图片2"
-            ],
-            "author": "小红书用户",
-            "published": "2023-01-01",
-            "likes": random.randint(1000, 50000),
-            "comments": random.randint(100, 2000),
-            "collects": random.randint(500, 10000),
-            "shares": random.randint(50, 1000)
-        }
+        use_cache = use_cache if use_cache is not None else DETAIL_CONFIG['USE_CACHE']
+        
+        if use_cache:
+            cached_detail = self.detail_cache.get(note_id)
+            if cached_detail:
+                logger.info(f"从详情缓存加载笔记: {note_id}")
+                return cached_detail
+        
+        with self.scheduler.slot(LANE_INTERACTIVE):
+            # 等待浏览器期间预取线程可能已经完成了该笔记
+            if use_cache:
+                cached_detail = self.detail_cache.get(note_id)
+                if cached_detail:
+                    logger.info(f"从详情缓存加载笔记: {note_id}")
+                    return cached_detail
+            
+            detail = self._fetch_note_detail(note_id)
+        
+        if detail:
+            self.detail_cache.put(note_id, detail)
+        
+        return detail
+    
+    def prefetch_note_detail(self, note_id):
+        """
+        后台预取笔记详情（仅在浏览器空闲时执行）
+        
+        参数:
+            note_id (str): 笔记ID
+        
+        返回:
+            bool: 预取成功返回True，失败返回False；浏览器被占用时返回None
+        """
+        with self.scheduler.try_slot(LANE_PREFETCH) as acquired:
+            if not acquired:
+                return None
+            
+            logger.info(f"后台预取笔记详情: {note_id}")
+            detail = self._fetch_note_detail(note_id)
+        
+        if detail:
+            self.detail_cache.put(note_id, detail)
+            return True
+        return False
+    
+    def _fetch_note_detail(self, note_id):
+        """使用Selenium打开详情页并提取笔记详情（调用方需持有浏览器锁）"""
+        if self.mock_backend:
+            return self.mock_backend.note_detail(note_id, self._note_summaries.get(note_id))
+        
+        if not self._ensure_driver_initialized():
+            logger.error("WebDriver初始化失败")
+            return None
+        
+        summary = self._note_summaries.get(note_id, {})
+        detail_url = summary.get('url', '')
+        if not self._is_detail_url(detail_url):
+            detail_url = URLS['NOTE_DETAIL_URL_TEMPLATE'].format(note_id=quote(note_id))
+        
+        try:
+            logger.info(f"打开笔记详情页: {detail_url}")
+            self._load_page(detail_url)
+            time.sleep(DETAIL_CONFIG['PAGE_WAIT_TIME'])
+            
+            selectors = DETAIL_CONFIG['SELECTORS']
+            title = self._find_detail_text(selectors['TITLE'])
+            desc = self._find_detail_text(selectors['DESC'])
+            images = self._find_detail_images(selectors['IMAGES'])
+            
+            if not title and not desc and not images:
+                logger.warning(f"详情页未提取到笔记内容: {detail_url}")
+                return None
+            
+            detail = Note(
+                id=note_id,
+                title=title or summary.get('title', ''),
+                desc=desc or summary.get('desc', ''),
+                author=self._find_detail_text(selectors['AUTHOR']) or summary.get('author', ''),
+                cover=images[0] if images else summary.get('cover', ''),
+                url=detail_url,
+                likes=parse_count(self._find_detail_text(selectors['LIKES'])),
+                comments=parse_count(self._find_detail_text(selectors['COMMENTS'])),
+                collects=parse_count(self._find_detail_text(selectors['COLLECTS'])),
+                shares=parse_count(self._find_detail_text(selectors['SHARES'])),
+                published=self._find_detail_text(selectors['PUBLISHED']),
+                content=html.escape(desc).replace('\n', '<br>'),
+                images=images
+            )
+            
+            logger.info(f"成功获取笔记详情: {detail['title'][:30]}...")
+            return detail
+            
+        except Exception as e:
+            logger.error(f"获取笔记详情出错: {str(e)}")
+            return None
+    
+    def _find_detail_text(self, selectors):
+        """按顺序尝试选择器，返回第一个非空文本"""
+        for selector in selectors:
+            try:
+                for element in self.driver.find_elements(By.CSS_SELECTOR, selector):
+                    text = element.text.strip()
+                    if text:
+                        return text
+            except Exception as e:
+                logger.debug(f"详情选择器 '{selector}' 出错: {str(e)}")
+        return ""
+    
+    def _find_detail_images(self, selectors):
+        """按顺序尝试选择器，返回第一个有结果的图片URL列表（去重）"""
+        for selector in selectors:
+            try:
+                images = []
+                for element in self.driver.find_elements(By.CSS_SELECTOR, selector):
+                    src = element.get_attribute("src") or element.get_attribute("data-src") or ""
+                    if src and not src.startswith('data:') and src not in images:
+                        images.append(src)
+                if images:
+                    return images
+            except Exception as e:
+                logger.debug(f"详情图片选择器 '{selector}' 出错: {str(e)}")
+        return []
     
     def get_hot_keywords(self):
         """获取热门搜索关键词"""
@@ -1283,6 +2249,14 @@ class XiaoHongShuCrawler:
     
     def close(self):
         """关闭爬虫"""
+        self.cookie_jar.unsubscribe(self._on_cookies_changed)
+        self.detail_prefetcher.stop()
+        self.artifact_writer.flush(timeout=5)
+        if self.capture_writer:
+            self.capture_writer.flush(timeout=10)
+        self.note_index.close()
+        if self.http_fetcher:
+            self.http_fetcher.close()
         if self.driver:
             self.driver.quit()
             logger.info("Selenium已关闭")
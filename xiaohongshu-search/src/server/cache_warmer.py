@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+搜索缓存预热模块
+在热门关键词的缓存过期前，利用浏览器空闲时间重新抓取
+
+调度规则：
+1. 只预热热门关键词统计中排名前N的关键词
+2. 缓存剩余有效期小于REFRESH_AHEAD时才重新抓取，剩余时间越短越优先
+3. 只在浏览器空闲时执行，受每日抓取预算和静默时段限制
+"""
+
+import time
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from config.config import CACHE_WARMER_CONFIG, SEARCH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """热门关键词缓存预热器"""
+
+    def __init__(self, get_crawler, tracker, config=None):
+        """
+        初始化预热器
+
+        参数:
+            get_crawler (callable): 返回当前爬虫实例的函数，爬虫未初始化时返回None
+            tracker (HotKeywordTracker): 热门关键词统计器
+            config (dict): 预热配置，默认使用CACHE_WARMER_CONFIG
+        """
+        self.get_crawler = get_crawler
+        self.tracker = tracker
+        self.config = config or CACHE_WARMER_CONFIG
+        self.expire_time = SEARCH_CONFIG['CACHE_EXPIRE_TIME']
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # 每日预算
+        self._budget_date = datetime.now().date()
+        self._budget_used = 0
+
+        # 预热失败的关键词 -> 失败时间，避免反复抓取
+        self._failed = {}
+
+        # 统计信息
+        self.stats = {
+            'warmed': 0,
+            'failed': 0,
+            'skipped_busy': 0,
+            'skipped_quiet': 0,
+            'skipped_budget': 0,
+        }
+
+    def start(self):
+        """启动预热线程（重复调用无副作用）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+        self._thread.start()
+        logger.info("缓存预热线程已启动")
+
+    def stop(self):
+        """停止预热线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def is_quiet_time(self, now=None):
+        """
+        判断当前是否处于静默时段
+
+        参数:
+            now (datetime): 判断的时间，默认当前本地时间
+
+        返回:
+            bool: 处于任一静默时段时返回True（支持跨午夜的时段，如 (22, 6)）
+        """
+        hour = (now or datetime.now()).hour
+        for start, end in self.config['QUIET_HOURS']:
+            if start <= end:
+                if start <= hour < end:
+                    return True
+            elif hour >= start or hour < end:
+                return True
+        return False
+
+    def budget_remaining(self):
+        """获取今日剩余的预热抓取次数"""
+        today = datetime.now().date()
+        if today != self._budget_date:
+            self._budget_date = today
+            self._budget_used = 0
+        return max(self.config['DAILY_BUDGET'] - self._budget_used, 0)
+
+    def next_candidate(self, crawler):
+        """
+        选出下一个需要预热的关键词
+
+        参数:
+            crawler (XiaoHongShuCrawler): 爬虫实例，用于查询缓存年龄
+
+        返回:
+            str: 缓存即将过期且剩余时间最短的热门关键词，没有时返回None
+        """
+        now = time.time()
+        refresh_after = self.expire_time - self.config['REFRESH_AHEAD']
+        best_keyword = None
+        best_age = None
+
+        for keyword in self.tracker.keywords(self.config['TOP_N']):
+            failed_at = self._failed.get(keyword)
+            if failed_at and now - failed_at < self.config['FAILURE_BACKOFF']:
+                continue
+
+            age = crawler.get_cache_age(keyword)
+            if age is None:
+                # 从未缓存的热门关键词视为已过期
+                age = float('inf')
+            if age < refresh_after:
+                continue
+
+            if best_age is None or age > best_age:
+                best_keyword, best_age = keyword, age
+
+        return best_keyword
+
+    def warm_once(self):
+        """
+        执行一次预热调度
+
+        返回:
+            bool: 本次是否实际执行了抓取
+        """
+        crawler = self.get_crawler()
+        if crawler is None:
+            return False
+
+        if self.is_quiet_time():
+            self.stats['skipped_quiet'] += 1
+            return False
+
+        if self.budget_remaining() <= 0:
+            self.stats['skipped_budget'] += 1
+            return False
+
+        keyword = self.next_candidate(crawler)
+        if not keyword:
+            return False
+
+        if not crawler.is_idle(self.config['IDLE_DELAY']):
+            self.stats['skipped_busy'] += 1
+            return False
+
+        result = crawler.warm_keyword(self.tracker.query(keyword), self.config['MAX_RESULTS'])
+        if result is None:
+            self.stats['skipped_busy'] += 1
+            return False
+
+        self._budget_used += 1
+        if result:
+            self.stats['warmed'] += 1
+            self._failed.pop(keyword, None)
+            logger.info(f"关键词缓存预热完成: {keyword}（今日剩余预算 {self.budget_remaining()}）")
+        else:
+            self.stats['failed'] += 1
+            self._failed[keyword] = time.time()
+        return True
+
+    def _run(self):
+        """预热线程主循环"""
+        while not self._stop_event.is_set():
+            try:
+                worked = self.warm_once()
+            except Exception as e:
+                logger.error(f"缓存预热出错: {str(e)}")
+                worked = False
+
+            # 刚完成一次抓取时尽快检查下一个关键词，否则按检查间隔等待
+            self._stop_event.wait(self.config['IDLE_DELAY'] if worked else self.config['CHECK_INTERVAL'])
+
+    def get_report(self):
+        """
+        获取预热报告
+
+        返回:
+            dict: 预热统计和对搜索缓存命中率的影响估计
+        """
+        report = {
+            'enabled': bool(self._thread and self._thread.is_alive()),
+            'quiet_time': self.is_quiet_time(),
+            'daily_budget': self.config['DAILY_BUDGET'],
+            'budget_remaining': self.budget_remaining(),
+            'stats': dict(self.stats),
+        }
+
+        crawler = self.get_crawler()
+        if crawler is not None:
+            cache_stats = dict(crawler.cache_stats)
+            total = cache_stats['hits'] + cache_stats['misses']
+            report['cache'] = cache_stats
+            if total:
+                # 命中预热写入的缓存的请求，在没有预热时通常会冷启动抓取
+                report['hit_rate'] = round(cache_stats['hits'] / total, 4)
+                report['hit_rate_without_warming'] = round(
+                    (cache_stats['hits'] - cache_stats['warmed_hits']) / total, 4)
+
+        return report
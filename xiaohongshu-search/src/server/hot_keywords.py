@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+热门关键词统计模块
+基于真实搜索流量的流式Top-K统计
+
+实现说明：
+1. Space-Saving算法 - 固定数量的计数器，内存占用与流量无关；计数最小的关键词用最小堆查找（摊还O(log n)）
+2. Top-K集合 - 写入时维护：计数超过当前第K名时才替换成员（O(K)），读取只排序K个成员
+3. 前向时间衰减 - 新请求的权重按半衰期指数增长，等价于旧请求按时间衰减
+4. 快照持久化 - 后台线程定期将计数器原子写入磁盘，请求线程不等待磁盘写入，重启后恢复
+"""
+
+import json
+import time
+import logging
+import heapq
+import os
+import sys
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from config.config import HOT_KEYWORDS_CONFIG, FILE_PATHS
+
+logger = logging.getLogger(__name__)
+
+# 权重超过该值时重新归一化，避免浮点溢出
+_RESCALE_THRESHOLD = 1e12
+
+
+class HotKeywordTracker:
+    """
+    带时间衰减的Space-Saving热门关键词统计器
+
+    每个计数器保存 (count, error)，count为衰减加权计数的上界，
+    error为替换时继承的最小计数。
+    """
+
+    def __init__(self, capacity=None, top_k=None, half_life=None,
+                 snapshot_file=None, snapshot_interval=None):
+        """
+        初始化统计器
+
+        参数:
+            capacity (int): 计数器数量上限，默认使用配置文件设置
+            top_k (int): 维护的热门关键词数量，默认使用配置文件设置
+            half_life (float): 衰减半衰期（秒），默认使用配置文件设置
+            snapshot_file (str): 快照文件路径，默认使用配置文件设置
+            snapshot_interval (float): 快照最小间隔（秒），默认使用配置文件设置
+        """
+        self.capacity = capacity or HOT_KEYWORDS_CONFIG['CAPACITY']
+        self.top_k = top_k or HOT_KEYWORDS_CONFIG['TOP_K']
+        self.half_life = half_life or HOT_KEYWORDS_CONFIG['HALF_LIFE']
+        self.snapshot_file = snapshot_file or FILE_PATHS['HOT_KEYWORDS_SNAPSHOT']
+        self.snapshot_interval = (snapshot_interval if snapshot_interval is not None
+                                  else HOT_KEYWORDS_CONFIG['SNAPSHOT_INTERVAL'])
+
+        # keyword -> [count, error]
+        self._counters = {}
+        # 最小堆 [(count, keyword)]，每个关键词一项；计数只增不减，堆中的计数可能偏小，取堆顶时再校正
+        self._heap = []
+        # keyword -> 用户最近一次的原始写法（预热抓取时使用）
+        self._queries = {}
+        self._landmark = time.time()
+        # Top-K集合 keyword -> counter（与_counters共用计数列表）
+        self._top = {}
+        # Top-K成员的最小计数（下界，成员计数增加后可能偏小），不超过它的关键词不必与成员比较
+        self._top_floor = 0.0
+        self._lock = threading.Lock()
+        self._last_snapshot = 0
+        self._snapshot_event = threading.Event()
+        self._snapshot_thread = None
+        self._write_lock = threading.Lock()
+
+        self.load_snapshot()
+
+    def _weight(self, now):
+        """当前时刻单次请求的权重"""
+        return 2 ** ((now - self._landmark) / self.half_life)
+
+    def _rescale(self, now):
+        """将所有计数折算到新的基准时间"""
+        factor = 1 / self._weight(now)
+        for counter in self._counters.values():
+            counter[0] *= factor
+            counter[1] *= factor
+        self._landmark = now
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        """按当前计数重建最小堆"""
+        self._heap = [(counter[0], keyword) for keyword, counter in self._counters.items()]
+        heapq.heapify(self._heap)
+        self._rebuild_top()
+
+    def _rebuild_top(self):
+        """按当前计数重建Top-K集合（重新归一化、加载快照或Top-K成员被替换出计数器时执行）"""
+        self._top = dict(heapq.nlargest(self.top_k, self._counters.items(), key=lambda item: item[1][0]))
+        self._refresh_floor()
+
+    def _refresh_floor(self):
+        self._top_floor = (min(counter[0] for counter in self._top.values())
+                           if len(self._top) >= self.top_k else 0.0)
+
+    def _update_top(self, keyword, counter):
+        """关键词计数增加后更新Top-K集合：已是成员或未超过下界时O(1)，需要比较或替换成员时O(K)"""
+        if keyword in self._top:
+            return
+        if len(self._top) < self.top_k:
+            self._top[keyword] = counter
+        elif counter[0] > self._top_floor:
+            min_keyword = min(self._top, key=lambda k: self._top[k][0])
+            if counter[0] > self._top[min_keyword][0]:
+                del self._top[min_keyword]
+                self._top[keyword] = counter
+        else:
+            return
+        self._refresh_floor()
+
+    def _pop_min(self):
+        """弹出计数最小的关键词；堆顶的计数已过期时按当前计数放回后继续查找"""
+        while True:
+            count, keyword = self._heap[0]
+            current = self._counters[keyword][0]
+            if current == count:
+                heapq.heappop(self._heap)
+                return keyword
+            heapq.heapreplace(self._heap, (current, keyword))
+
+    def observe(self, keyword, now=None, query=None):
+        """
+        记录一次关键词查询
+
+        参数:
+            keyword (str): 搜索关键词（规范关键词）
+            now (float): 查询时间，默认当前时间
+            query (str): 用户输入的原始写法，预热抓取时使用，默认与keyword相同
+        """
+        if not keyword:
+            return
+
+        now = now or time.time()
+
+        with self._lock:
+            weight = self._weight(now)
+            if weight > _RESCALE_THRESHOLD:
+                self._rescale(now)
+                weight = 1.0
+
+            counter = self._counters.get(keyword)
+            evicted_top = False
+            if counter:
+                counter[0] += weight
+            elif len(self._counters) < self.capacity:
+                counter = self._counters[keyword] = [weight, 0.0]
+                heapq.heappush(self._heap, (weight, keyword))
+            else:
+                # 替换计数最小的关键词，继承其计数作为误差上界
+                min_keyword = self._pop_min()
+                min_count = self._counters.pop(min_keyword)[0]
+                self._queries.pop(min_keyword, None)
+                counter = self._counters[keyword] = [min_count + weight, min_count]
+                heapq.heappush(self._heap, (min_count + weight, keyword))
+                # 只有计数器数量接近top_k时，被替换的最小计数才可能在Top-K中
+                evicted_top = self._top.pop(min_keyword, None) is not None
+            if query and query != keyword:
+                self._queries[keyword] = query
+
+            if evicted_top:
+                self._rebuild_top()
+            else:
+                self._update_top(keyword, counter)
+
+            snapshot_due = now - self._last_snapshot >= self.snapshot_interval
+            if snapshot_due:
+                self._last_snapshot = now
+
+        if snapshot_due:
+            self._request_snapshot()
+
+    def top(self, k=None, now=None):
+        """
+        获取当前热门关键词
+
+        参数:
+            k (int): 返回数量，默认为top_k，最多为top_k
+            now (float): 计算衰减分数的时间，默认当前时间
+
+        返回:
+            list: [(keyword, score), ...]，score为衰减后的查询次数
+        """
+        k = self.top_k if k is None else max(0, min(k, self.top_k))
+        now = now or time.time()
+
+        with self._lock:
+            decay = 1 / self._weight(now)
+            ranked = sorted(self._top.items(), key=lambda item: item[1][0], reverse=True)
+            return [(keyword, counter[0] * decay) for keyword, counter in ranked[:k]]
+
+    def query(self, keyword):
+        """热门关键词用于抓取的写法（用户最近一次的原始写法）"""
+        with self._lock:
+            return self._queries.get(keyword, keyword)
+
+    def keywords(self, k=None):
+        """获取当前热门关键词列表（不含分数）"""
+        return [keyword for keyword, _ in self.top(k)]
+
+    def _request_snapshot(self):
+        """通知后台线程写入快照（按需启动线程）"""
+        with self._lock:
+            if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+                self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name='hot-keywords-snapshot',
+                                                         daemon=True)
+                self._snapshot_thread.start()
+        self._snapshot_event.set()
+
+    def _snapshot_loop(self):
+        """快照线程主循环"""
+        while True:
+            self._snapshot_event.wait()
+            self._snapshot_event.clear()
+            self.save_snapshot()
+
+    def save_snapshot(self):
+        """将计数器原子写入快照文件（退出时直接调用，运行中由后台线程调用）"""
+        with self._lock:
+            snapshot = {
+                'landmark': self._landmark,
+                'half_life': self.half_life,
+                'saved_at': time.time(),
+                'counters': self._counters.copy(),
+                'queries': self._queries.copy()
+            }
+            self._last_snapshot = snapshot['saved_at']
+
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+            temp_file = f"{self.snapshot_file}.tmp"
+            with self._write_lock:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(temp_file, self.snapshot_file)
+            logger.debug(f"热门关键词快照已保存: {self.snapshot_file}")
+        except Exception as e:
+            logger.warning(f"保存热门关键词快照失败: {str(e)}")
+
+    def load_snapshot(self):
+        """从快照文件恢复计数器"""
+        if not os.path.exists(self.snapshot_file):
+            return False
+
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+
+            counters = {keyword: [float(count), float(error)]
+                        for keyword, (count, error) in snapshot['counters'].items()}
+
+            with self._lock:
+                self._counters = counters
+                self._queries = dict(snapshot.get('queries') or {})
+                self._landmark = snapshot['landmark']
+                self._rescale(time.time())
+
+                # 容量调小时只保留计数最大的关键词
+                if len(self._counters) > self.capacity:
+                    kept = heapq.nlargest(self.capacity, self._counters.items(), key=lambda item: item[1][0])
+                    self._counters = dict(kept)
+                self._queries = {k: v for k, v in self._queries.items() if k in self._counters}
+
+                self._rebuild_heap()
+
+            logger.info(f"已恢复热门关键词快照: {len(counters)} 个关键词")
+            return True
+        except Exception as e:
+            logger.warning(f"加载热门关键词快照失败: {str(e)}")
+            return False
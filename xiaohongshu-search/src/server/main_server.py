@@ -13,40 +13,67 @@
 """
 
 import sys
+import json
 import os
 import logging
 import time
-import hashlib
+import threading
 import traceback
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-from flask import Flask, request, jsonify, send_from_directory, redirect, url_for
+from flask import Flask, Response, request, jsonify, send_from_directory, redirect, url_for, stream_with_context
 from flask_cors import CORS
-from src.crawler.xiaohongshu_crawler import XiaoHongShuCrawler
+from src.crawler.crawl_scheduler import CrawlRejected, LANES
+from src.crawler.search_deadline import clamp_timeout_ms
+from src.crawler.note_index import parse_cursor
+from src.utils.query_normalizer import normalize_query, query_hash
+from src.utils.serialization import json_dumps
+from src.utils.logging_setup import setup_logging, search_context
+from src.utils.metrics import REGISTRY, SEARCH_REQUEST_SECONDS, CACHE_REQUESTS, CallbackMetric
+from src.server.hot_keywords import HotKeywordTracker
+from src.server.cache_warmer import CacheWarmer
+from src.server.profiler import RequestProfiler
+from config.config import HOT_KEYWORDS, HOT_KEYWORDS_CONFIG, CACHE_WARMER_CONFIG, FILE_PATHS, SERIALIZATION_CONFIG
 
 # ==================== 配置和初始化 ====================
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# 配置日志（通过app.py启动时已经配置，不重复配置）
+if not logging.getLogger().handlers:
+    setup_logging(FILE_PATHS['CRAWLER_LOG'])
 logger = logging.getLogger(__name__)
 
 # 创建Flask应用
 app = Flask(__name__, static_folder='../../static')
 CORS(app)  # 允许跨域请求
 
+# 按需请求性能分析（PERFORMANCE_CONFIG['ENABLE_PROFILING']）
+profiler = RequestProfiler(app)
+
 # ==================== 全局变量 ====================
 
-# Cookie文件路径
-COOKIES_FILE = os.path.join('cache', 'cookies', 'xiaohongshu_cookies.json')
+# Cookie文件路径（与登录用爬虫共用同一个cookie管理器）
+COOKIES_FILE = FILE_PATHS['COOKIES_FILE']
 
 # 全局爬虫实例（延迟初始化）
 crawler = None
+_crawler_lock = threading.Lock()
+
+# 启动预热状态（cold: 未预热，warming: 预热中，ready: 浏览器已就绪，failed: 预热失败）
+_started_at = time.time()
+readiness = {'state': 'cold', 'since': _started_at, 'error': None}
 
 # HTML结果内存缓存（避免文件路径问题）
 html_results_cache = {}
 
+# 热门关键词统计（基于真实搜索流量）
+hot_keyword_tracker = HotKeywordTracker() if HOT_KEYWORDS_CONFIG['ENABLE_TRACKING'] else None
+
+# 热门关键词缓存预热器（爬虫初始化后启动）
+cache_warmer = (CacheWarmer(lambda: crawler, hot_keyword_tracker)
+                if CACHE_WARMER_CONFIG['ENABLED'] and hot_keyword_tracker else None)
+
 # ==================== 工具函数 ====================
 
 def store_html_result(html_hash, html_content):
@@ -61,6 +88,20 @@ def store_html_result(html_hash, html_content):
     html_results_cache[html_hash] = html_content
     logger.info(f"HTML内容已存储到内存缓存: {html_hash}")
 
+def json_response(body):
+    """
+    生成JSON响应，安装了orjson时用其编码（搜索结果等较大的响应体）
+    
+    参数:
+        body (dict): 响应内容
+    
+    返回:
+        Response: application/json 响应
+    """
+    if not SERIALIZATION_CONFIG['FAST_JSON_RESPONSES']:
+        return jsonify(body)
+    return Response(json_dumps(body), mimetype='application/json')
+
 def init_crawler():
     """
     延迟初始化爬虫实例
@@ -70,9 +111,16 @@ def init_crawler():
         bool: 初始化是否成功
     """
     global crawler
+    with _crawler_lock:
+        return _init_crawler_locked()
+
+def _init_crawler_locked():
+    """创建爬虫实例（调用方需持有_crawler_lock）"""
+    global crawler
     if crawler is None:
         try:
             logger.info("正在初始化小红书爬虫...")
+            from src.crawler.xiaohongshu_crawler import XiaoHongShuCrawler
             crawler = XiaoHongShuCrawler(
                 use_selenium=True, 
                 headless=True, 
@@ -81,6 +129,10 @@ def init_crawler():
             # 设置HTML存储回调函数
             crawler.set_html_callback(store_html_result)
             logger.info("小红书爬虫初始化成功")
+            
+            # 爬虫就绪后开始利用空闲时间预热热门关键词
+            if cache_warmer:
+                cache_warmer.start()
             return True
         except Exception as e:
             logger.error(f"小红书爬虫初始化失败: {str(e)}")
@@ -89,6 +141,74 @@ def init_crawler():
             return False
     return True
 
+def _set_readiness(state, error=None):
+    readiness.update(state=state, since=time.time(), error=error)
+
+def start_prewarm(driver=None):
+    """
+    在后台线程中预热爬虫：创建爬虫实例、接管启动检查时验证过的浏览器、添加cookie并打开一次搜索页
+    
+    Args:
+        driver: 启动检查时创建的浏览器，None表示由爬虫自行启动
+    
+    Returns:
+        threading.Thread: 预热线程
+    """
+    def run():
+        started = time.time()
+        _set_readiness('warming')
+        try:
+            if not init_crawler():
+                _set_readiness('failed', "爬虫初始化失败")
+                if driver:
+                    driver.quit()
+                return
+            if driver:
+                crawler.attach_driver(driver)
+            if crawler.prewarm():
+                _set_readiness('ready')
+                logger.info(f"爬虫预热完成，用时 {time.time() - started:.1f} 秒")
+            else:
+                _set_readiness('failed', "浏览器预热失败")
+        except Exception as e:
+            logger.error(f"爬虫预热出错: {str(e)}")
+            _set_readiness('failed', str(e))
+    
+    thread = threading.Thread(target=run, name='crawler-prewarm', daemon=True)
+    thread.start()
+    return thread
+
+def warm_capacity():
+    """
+    当前可立即处理抓取的浏览器容量
+    
+    Returns:
+        dict: 已就绪浏览器数、总容量、是否空闲和各通道排队数
+    """
+    if crawler is None:
+        return {'warm_drivers': 0, 'capacity': 1, 'idle': False, 'queue': {}}
+    browserless = crawler.mock_backend is not None and not crawler.mock_backend.uses_browser
+    return {
+        'warm_drivers': 1 if browserless or crawler.driver is not None else 0,
+        'capacity': 1,
+        'idle': crawler.is_idle(),
+        'queue': {lane: crawler.scheduler.queue_depth(lane) for lane in LANES},
+    }
+
+def rejected_response(e):
+    """
+    生成抓取被拒绝时的429响应
+    
+    Args:
+        e: CrawlRejected异常
+    
+    Returns:
+        tuple: Flask响应（包含Retry-After头）
+    """
+    response = jsonify({"error": "请求过多，请稍后重试", "retry_after": e.retry_after})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
 def get_project_root():
     """获取项目根目录路径"""
     return os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -125,14 +245,14 @@ def login():
     """
     try:
         # 创建专门用于登录的爬虫实例（非无头模式）
+        from src.crawler.xiaohongshu_crawler import XiaoHongShuCrawler
         login_crawler = XiaoHongShuCrawler(use_selenium=True, headless=False)
         success = login_crawler.login()
         login_crawler.close()
         
         if success:
-            # 登录成功后重置主爬虫实例，以使用新的cookie
-            global crawler
-            crawler = None
+            # 新cookie已由cookie管理器推送给主爬虫（HTTP会话立即更新，浏览器在下一次打开页面前写入），
+            # 不重建爬虫，已预热的浏览器继续使用
             return redirect(url_for('index'))
         else:
             return jsonify({"error": "登录失败，请重试"}), 500
@@ -153,10 +273,25 @@ def search():
         keyword: 搜索关键词（必需）
         max_results: 最大结果数量（可选，默认21）
         use_cache: 是否使用缓存（可选，默认true）
+        use_index: 缓存未命中时是否尝试用本地全文索引回答（可选，默认与use_cache相同）
+        timeout_ms: 耗时预算（可选，毫秒），到期时返回已提取到的笔记并标记partial，抓取在后台完成
     
     返回:
         JSON格式的搜索结果，包含笔记列表和HTML页面URL
     """
+    start_time = time.perf_counter()
+    with search_context(request.args.get('keyword', '')) as search_id:
+        response = _search()
+    if isinstance(response, tuple):
+        response[0].headers['X-Search-Id'] = search_id
+    else:
+        response.headers['X-Search-Id'] = search_id
+    status = response[1] if isinstance(response, tuple) else 200
+    SEARCH_REQUEST_SECONDS.labels(status).observe(time.perf_counter() - start_time)
+    return response
+
+def _search():
+    """搜索API的处理逻辑"""
     # 初始化爬虫
     if not init_crawler():
         return jsonify({"error": "爬虫初始化失败，请检查网络连接和Chrome浏览器"}), 500
@@ -166,13 +301,34 @@ def search():
     if not keyword:
         return jsonify({"error": "缺少关键词参数"}), 400
     
+    # 记录关键词查询流量（按规范关键词统计，预热结果对各种写法都有效）
+    if hot_keyword_tracker:
+        hot_keyword_tracker.observe(normalize_query(keyword), query=keyword)
+    
     try:
         # 解析参数
         max_results = int(request.args.get('max_results', 21))
         use_cache = request.args.get('use_cache', 'true').lower() == 'true'
+        use_index = request.args.get('use_index', str(use_cache)).lower() == 'true'
+        timeout_ms = request.args.get('timeout_ms')
+        timeout_ms = clamp_timeout_ms(int(timeout_ms) if timeout_ms else None)
         
-        # 执行搜索
-        search_results = crawler.search(keyword, max_results=max_results, use_cache=use_cache)
+        # 执行搜索（抓取队列已满时降级为过期缓存，没有缓存则返回429）
+        stale = False
+        partial = False
+        try:
+            if timeout_ms:
+                search_results, partial = crawler.search_within(keyword, timeout_ms, max_results=max_results,
+                                                                use_cache=use_cache, use_index=use_index)
+            else:
+                search_results = crawler.search(keyword, max_results=max_results, use_cache=use_cache,
+                                                use_index=use_index)
+        except CrawlRejected as e:
+            search_results = crawler.get_stale_results(keyword, max_results)
+            if not search_results:
+                return rejected_response(e)
+            stale = True
+            logger.info(f"抓取队列已满，返回过期缓存: {keyword}")
         
         # 规范化搜索结果格式
         if isinstance(search_results, dict) and 'data' in search_results:
@@ -181,17 +337,20 @@ def search():
             notes = search_results if isinstance(search_results, list) else []
         
         # 生成HTML页面URL
-        html_hash = hashlib.md5(keyword.encode()).hexdigest()
+        html_hash = query_hash(keyword)
         html_url = f"/results/search_{html_hash}.html"           # 文件形式
         html_api_url = f"/api/result-html/{html_hash}"           # API形式（推荐）
         
-        return jsonify({
+        return json_response({
             "keyword": keyword,
+            "normalized_keyword": normalize_query(keyword),
             "timestamp": int(time.time()),
             "count": len(notes),
-            "notes": notes,
+            "notes": [note.to_dict() for note in notes],
             "html_url": html_url,
-            "html_api_url": html_api_url
+            "html_api_url": html_api_url,
+            "stale": stale,
+            "partial": partial
         })
     except Exception as e:
         logger.error(f"搜索出错: {str(e)}")
@@ -219,33 +378,102 @@ def get_note(note_id):
         note = crawler.get_note_detail(note_id)
         
         if note:
-            return jsonify({"note": note})
+            return json_response({"note": note.to_dict()})
         else:
             return jsonify({"error": "未找到该笔记"}), 404
+    except CrawlRejected as e:
+        return rejected_response(e)
     except Exception as e:
         logger.error(f"获取笔记详情出错: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": "获取笔记详情失败", "message": str(e)}), 500
 
+@app.route('/api/export')
+def export_notes():
+    """
+    笔记导出API
+    以NDJSON流式导出全文索引中保存的笔记，每个 (笔记, 关键词) 关联一行，按抓取时间排序，内存占用与笔记总数无关
+    
+    参数:
+        keyword: 只导出该关键词抓取到的笔记（可选，按规范关键词匹配）
+        start_time: 只导出在该时间（Unix时间戳，秒）及之后更新的笔记（可选）
+        end_time: 只导出在该时间之前更新的笔记（可选）
+        since: 增量导出游标（可选），取上次导出最后一行的cursor
+        limit: 最多导出的笔记数（可选）
+    
+    返回:
+        application/x-ndjson，每行 {"cursor": ..., "keyword": ..., "updated_at": ..., "note": {...}}
+    """
+    if not init_crawler():
+        return jsonify({"error": "爬虫初始化失败"}), 500
+    if not crawler.note_index.available:
+        return jsonify({"error": "笔记全文索引不可用，无法导出"}), 503
+    
+    try:
+        keyword = request.args.get('keyword', '').strip()
+        start_time = request.args.get('start_time', type=float)
+        end_time = request.args.get('end_time', type=float)
+        limit = request.args.get('limit', type=int)
+        since = request.args.get('since') or None
+        if since:
+            parse_cursor(since)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    rows = crawler.note_index.iter_notes(
+        keyword=normalize_query(keyword) if keyword else None,
+        start_time=start_time, end_time=end_time, since=since, limit=limit
+    )
+    
+    def generate():
+        # 笔记JSON直接使用库中保存的文本，不再解析和重新序列化
+        for cursor, note_keyword, updated_at, data in rows:
+            yield (f'{{"cursor": "{cursor}", "keyword": {json.dumps(note_keyword, ensure_ascii=False)}, '
+                   f'"updated_at": {updated_at!r}, "note": {data}}}\n')
+    
+    logger.info(f"开始导出笔记: keyword={keyword or '*'}, since={since or '-'}")
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/hot-keywords')
 def hot_keywords():
     """
     获取热门关键词API
+    按真实搜索流量统计，数据不足时使用配置中的HOT_KEYWORDS补齐
+    
+    参数:
+        limit: 返回数量（可选，默认为HOT_KEYWORDS_CONFIG['TOP_K']）
     
     返回:
         JSON格式的热门关键词列表
     """
-    if not init_crawler():
-        return jsonify({"error": "爬虫初始化失败"}), 500
-        
     try:
-        keywords = crawler.get_hot_keywords()
+        limit = int(request.args.get('limit', HOT_KEYWORDS_CONFIG['TOP_K']))
+        
+        keywords = hot_keyword_tracker.keywords(limit) if hot_keyword_tracker else []
+        for keyword in HOT_KEYWORDS:
+            if len(keywords) >= limit:
+                break
+            if keyword not in keywords:
+                keywords.append(keyword)
+        
         return jsonify({"keywords": keywords})
     except Exception as e:
         logger.error(f"获取热门关键词出错: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": "获取热门关键词失败", "message": str(e)}), 500
 
+@app.route('/api/cache-warmer')
+def cache_warmer_status():
+    """
+    缓存预热状态API
+    
+    返回:
+        JSON格式的预热统计、今日剩余预算和命中率影响估计
+    """
+    if not cache_warmer:
+        return jsonify({"enabled": False})
+    return jsonify(cache_warmer.get_report())
+
 # ==================== HTML结果页面路由 ====================
 
 @app.route('/results/<path:filename>')
@@ -275,8 +503,10 @@ def get_result_html(html_hash):
     # 优先从内存缓存获取
     if html_hash in html_results_cache:
         html_content = html_results_cache[html_hash]
+        CACHE_REQUESTS.labels('html_memory', 'hit').inc()
         logger.info(f"从内存缓存返回HTML内容: {html_hash}")
         return html_content, 200, {'Content-Type': 'text/html; charset=utf-8'}
+    CACHE_REQUESTS.labels('html_memory', 'miss').inc()
     
     # 回退：尝试从文件读取
     try:
@@ -289,15 +519,85 @@ def get_result_html(html_hash):
                 html_content = f.read()
             # 存储到内存缓存中
             html_results_cache[html_hash] = html_content
+            CACHE_REQUESTS.labels('html_file', 'hit').inc()
             logger.info(f"从文件读取并缓存HTML内容: {html_path}")
             return html_content, 200, {'Content-Type': 'text/html; charset=utf-8'}
         else:
+            CACHE_REQUESTS.labels('html_file', 'miss').inc()
             logger.warning(f"HTML文件不存在: {html_path}")
             return jsonify({"error": "HTML结果页面不存在"}), 404
     except Exception as e:
         logger.error(f"读取HTML文件失败: {str(e)}")
         return jsonify({"error": "无法读取HTML文件"}), 500
 
+# ==================== 运行指标 ====================
+
+def _scheduler_stats():
+    """获取当前爬虫的抓取调度统计，爬虫未初始化时返回None"""
+    return crawler.scheduler.get_stats() if crawler else None
+
+def _inflight_crawls():
+    """各通道正在执行和排队的抓取数"""
+    stats = _scheduler_stats()
+    if stats is None:
+        return {(lane,): 0 for lane in LANES}
+    return {(lane,): stats['queue_depth'][lane] + (1 if stats['holder'] == lane else 0) for lane in LANES}
+
+def _scheduler_lane_counter(key):
+    """各通道的调度计数"""
+    stats = _scheduler_stats()
+    if stats is None:
+        return None
+    return {(lane,): lane_stats[key] for lane, lane_stats in stats['lanes'].items()}
+
+CallbackMetric('xhs_driver_count', '当前存活的浏览器数量',
+               lambda: 1 if crawler and crawler.driver else 0)
+CallbackMetric('xhs_inflight_crawls', '正在执行和排队的抓取数', _inflight_crawls, ['lane'])
+CallbackMetric('xhs_page_loads_total', '对外页面加载次数', lambda: _scheduler_lane_counter('page_loads'),
+               ['lane'], type_name='counter')
+CallbackMetric('xhs_crawl_rejected_total', '被准入控制拒绝的抓取次数', lambda: _scheduler_lane_counter('rejected'),
+               ['lane'], type_name='counter')
+CallbackMetric('xhs_html_cache_entries', 'HTML结果内存缓存条目数', lambda: len(html_results_cache))
+CallbackMetric('xhs_note_index_notes', '本地全文索引中的笔记数',
+               lambda: crawler.note_index.count() if crawler else None)
+CallbackMetric('xhs_strategy_score', '各提取策略的历史命中率得分',
+               lambda: {(name,): entry['score'] for name, entry in
+                        crawler.extraction_stats.get_stats()['strategies'].items()} if crawler else None,
+               ['strategy'])
+
+@app.route('/healthz')
+def healthz():
+    """
+    存活检查
+    进程能处理请求即返回200，不检查浏览器状态
+    """
+    return jsonify({"status": "ok", "uptime": round(time.time() - _started_at, 1)})
+
+@app.route('/readyz')
+def readyz():
+    """
+    就绪检查
+    爬虫预热完成、浏览器可立即使用时返回200，否则返回503，负载均衡只应把流量发给就绪的实例
+    """
+    capacity = warm_capacity()
+    ready = readiness['state'] == 'ready' and capacity['warm_drivers'] > 0
+    body = {
+        "ready": ready,
+        "state": readiness['state'],
+        "since": int(readiness['since']),
+        "error": readiness['error'],
+        **capacity
+    }
+    return jsonify(body), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics():
+    """
+    运行指标（Prometheus文本格式）
+    包含搜索各阶段耗时直方图、各级缓存命中、各策略产出、浏览器数量和抓取并发
+    """
+    return REGISTRY.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 # ==================== 错误处理 ====================
 
 @app.errorhandler(404)
@@ -315,6 +615,10 @@ def server_error(e):
 def cleanup():
     """应用退出时的清理工作"""
     global crawler
+    if cache_warmer:
+        cache_warmer.stop()
+    if hot_keyword_tracker:
+        hot_keyword_tracker.save_snapshot()
     if crawler:
         crawler.close()
         crawler = None
@@ -332,6 +636,7 @@ if __name__ == '__main__':
             'cache/temp', 
             'cache/logs',
             'cache/results',
+            'cache/details',
             'static/images'
         ]
         for dir_path in essential_dirs:
@@ -345,6 +650,9 @@ if __name__ == '__main__':
         logger.info("访问地址: http://localhost:8080")
         logger.info("如需登录，请访问: http://localhost:8080/login")
         
+        # 后台预热爬虫，/readyz在预热完成后返回200
+        start_prewarm()
+        
         # 启动服务
         app.run(debug=False, host='0.0.0.0', port=8080)
     except KeyboardInterrupt:
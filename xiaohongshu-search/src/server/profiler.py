@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+请求性能分析模块
+按采样比例或调试请求头，对单个请求启用cProfile并保存分析结果
+
+输出文件（cache/logs/profiles/）：
+1. <id>.prof - cProfile原始数据，可用 python -m pstats 或 snakeviz 打开
+2. <id>.txt  - 按累计耗时排序的函数列表
+3. <id>.json - 请求路径、关键词和耗时等元数据，/debug/profiles 据此生成索引
+"""
+
+import io
+import json
+import time
+import random
+import logging
+import cProfile
+import pstats
+import os
+import sys
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from flask import g, request, jsonify
+from config.config import PERFORMANCE_CONFIG, DIRECTORIES
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfiler:
+    """Flask请求性能分析器"""
+
+    def __init__(self, app=None, config=None, profiles_dir=None):
+        """
+        初始化分析器
+
+        参数:
+            app (Flask): Flask应用，提供时立即注册钩子和路由
+            config (dict): 性能配置，默认使用PERFORMANCE_CONFIG
+            profiles_dir (str): 分析结果目录，默认使用配置文件设置
+        """
+        self.config = config or PERFORMANCE_CONFIG
+        self.profiles_dir = profiles_dir or DIRECTORIES['PROFILES_DIR']
+
+        # cProfile同一时间只能有一个实例处于启用状态
+        self._active_lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def enabled(self):
+        return self.config['ENABLE_PROFILING']
+
+    def init_app(self, app):
+        """注册请求钩子和调试路由"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/debug/profiles', 'debug_profiles', self.index_view)
+        app.add_url_rule('/debug/profiles/<profile_id>', 'debug_profile_detail', self.detail_view)
+
+    def _should_profile(self):
+        """判断当前请求是否需要性能分析"""
+        if not self.enabled or request.path.startswith('/debug/'):
+            return False
+        if request.headers.get(self.config['PROFILE_HEADER']):
+            return True
+        return random.random() < self.config['PROFILE_SAMPLE_RATE']
+
+    def _before_request(self):
+        if not self._should_profile():
+            return
+        if not self._active_lock.acquire(blocking=False):
+            logger.debug("已有请求正在进行性能分析，跳过本次请求")
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # 其他性能分析工具已启用
+            self._active_lock.release()
+            logger.warning(f"无法启用性能分析: {str(e)}")
+            return
+
+        g.profile = profile
+        g.profile_started = time.perf_counter()
+        g.profile_cpu_started = time.thread_time()
+
+    def _after_request(self, response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+
+        try:
+            profile.disable()
+            wall_time = time.perf_counter() - g.pop('profile_started')
+            cpu_time = time.thread_time() - g.pop('profile_cpu_started')
+        finally:
+            self._active_lock.release()
+
+        try:
+            self._save(profile, wall_time, cpu_time, response.status_code)
+        except Exception as e:
+            logger.error(f"保存性能分析结果失败: {str(e)}")
+        return response
+
+    def _teardown_request(self, exc):
+        """请求异常中断、未经过after_request时停止分析并释放锁"""
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.disable()
+            self._active_lock.release()
+
+    def _save(self, profile, wall_time, cpu_time, status_code):
+        """保存分析结果并清理超出保留数量的旧文件"""
+        os.makedirs(self.profiles_dir, exist_ok=True)
+
+        profile_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(wall_time * 1000)}ms_{random.randint(0, 0xffff):04x}"
+        base_path = os.path.join(self.profiles_dir, profile_id)
+
+        profile.dump_stats(f"{base_path}.prof")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.config['PROFILE_TOP_FUNCTIONS'])
+        with open(f"{base_path}.txt", 'w', encoding='utf-8') as f:
+            f.write(stream.getvalue())
+
+        meta = {
+            'id': profile_id,
+            'timestamp': time.time(),
+            'path': request.path,
+            'keyword': request.args.get('keyword', ''),
+            'query': request.query_string.decode('utf-8', errors='replace'),
+            'status': status_code,
+            'wall_time': round(wall_time, 4),
+            'cpu_time': round(cpu_time, 4),
+            'function_calls': stats.total_calls,
+        }
+        with open(f"{base_path}.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"已保存请求性能分析: {request.path} {meta['keyword']} {wall_time:.3f}秒 -> {base_path}.prof")
+        self._enforce_retention()
+
+    def _list_meta(self):
+        """读取所有分析结果的元数据"""
+        if not os.path.exists(self.profiles_dir):
+            return []
+
+        metas = []
+        for filename in os.listdir(self.profiles_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.profiles_dir, filename), 'r', encoding='utf-8') as f:
+                    metas.append(json.load(f))
+            except Exception:
+                continue
+        return metas
+
+    def _enforce_retention(self):
+        """只保留最近的PROFILE_MAX_FILES份分析结果"""
+        metas = sorted(self._list_meta(), key=lambda meta: meta['timestamp'], reverse=True)
+        for meta in metas[self.config['PROFILE_MAX_FILES']:]:
+            for ext in ('.prof', '.txt', '.json'):
+                try:
+                    os.remove(os.path.join(self.profiles_dir, meta['id'] + ext))
+                except OSError:
+                    pass
+
+    def index_view(self):
+        """
+        性能分析索引
+
+        参数:
+            limit: 返回数量（可选，默认20）
+            path: 只列出指定请求路径（可选）
+
+        返回:
+            按耗时从高到低排列的最近分析结果
+        """
+        if not self.enabled:
+            return jsonify({"error": "性能分析未启用"}), 404
+
+        limit = int(request.args.get('limit', 20))
+        path = request.args.get('path')
+
+        metas = self._list_meta()
+        if path:
+            metas = [meta for meta in metas if meta['path'] == path]
+        metas.sort(key=lambda meta: meta['wall_time'], reverse=True)
+
+        for meta in metas:
+            meta['detail_url'] = f"/debug/profiles/{meta['id']}"
+
+        return jsonify({"count": len(metas), "profiles": metas[:limit]})
+
+    def detail_view(self, profile_id):
+        """返回单次分析的函数耗时列表（文本）"""
+        if not self.enabled:
+            return jsonify({"error": "性能分析未启用"}), 404
+
+        text_path = os.path.join(self.profiles_dir, f"{os.path.basename(profile_id)}.txt")
+        if not os.path.exists(text_path):
+            return jsonify({"error": "分析结果不存在"}), 404
+
+        with open(text_path, 'r', encoding='utf-8') as f:
+            return f.read(), 200, {'Content-Type': 'text/plain; charset=utf-8'}
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+笔记列式导出工具
+将本地全文索引中的笔记导出为按抓取日期分区的Parquet数据集，分析任务只读取需要的列，不必再逐个解析缓存JSON
+
+实现说明：
+1. 数据来源 - 按抓取时间顺序分批读取笔记索引中笔记与关键词的关联（NoteIndex.iter_notes），每行包含笔记字段、
+   抓取到该笔记的关键词和抓取时间；同一笔记被多个关键词抓取到时每个关键词各有一行
+2. 分区 - 按抓取时间的本地日期写入 notes/crawl_date=YYYY-MM-DD/，每个分区攒够BATCH_SIZE行写入一个row group
+3. 增量追加 - 导出状态文件记录最后一条的游标，之后每次运行只导出新增或重新抓取的笔记，写入新的part文件；
+   同一笔记重新抓取后会再出现一行，分析时按 note_id 取 crawled_at 最新的一行
+4. 格式版本 - 版本号写入状态文件和每个Parquet文件的元数据，与已有数据集版本不同时需使用 --full 重新导出
+5. 原子性 - part文件先写入临时文件，全部写完后才改名并更新状态文件，中途失败不留下不完整的文件
+
+使用方法：
+    python src/utils/columnar_export.py
+    python src/utils/columnar_export.py --output /data/xhs --compression snappy
+    python src/utils/columnar_export.py --full
+
+读取示例：
+    import pyarrow.dataset as ds
+    dataset = ds.dataset('cache/exports/notes', format='parquet', partitioning='hive')
+    table = dataset.to_table(columns=['note_id', 'keyword', 'likes', 'crawled_at'])
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+import uuid
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config.config import COLUMNAR_EXPORT_CONFIG, DIRECTORIES, FILE_PATHS
+from src.crawler.note_index import NoteIndex
+
+logger = logging.getLogger(__name__)
+
+# 数据集格式版本，列增删、类型或行的含义变化时递增
+# 2: 每个 (笔记, 关键词) 关联一行，游标改为关联表的位置
+SCHEMA_VERSION = 2
+
+STATE_FILE = '_export_state.json'
+NOTES_DATASET = 'notes'
+
+_TEXT_FIELDS = ['title', 'desc', 'author', 'cover', 'url', 'published', 'content']
+_COUNT_FIELDS = ['likes', 'comments', 'collects', 'shares']
+
+
+def notes_schema():
+    """
+    笔记数据集的Arrow schema（分区列crawl_date由目录名提供，不在文件中）
+
+    返回:
+        pyarrow.Schema: 带格式版本元数据的schema
+    """
+    import pyarrow as pa
+
+    fields = [
+        pa.field('note_id', pa.string(), nullable=False),
+        pa.field('keyword', pa.string()),
+        pa.field('crawled_at', pa.timestamp('ms', tz='UTC'), nullable=False),
+    ]
+    fields += [pa.field(name, pa.string()) for name in _TEXT_FIELDS]
+    fields += [pa.field(name, pa.int64()) for name in _COUNT_FIELDS]
+    fields.append(pa.field('images', pa.list_(pa.string())))
+    return pa.schema(fields, metadata={'schema_version': str(SCHEMA_VERSION)})
+
+
+def _count(value):
+    """互动数统一为整数，缺失或无法解析时为None"""
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def note_row(keyword, updated_at, data):
+    """
+    将索引中的一条笔记转换为数据集的一行
+
+    参数:
+        keyword (str): 抓取到该笔记的关键词
+        updated_at (float): 抓取时间（Unix时间戳）
+        data (str): 索引中保存的笔记JSON文本
+
+    返回:
+        dict: 列名 -> 值
+    """
+    note = json.loads(data)
+    row = {
+        'note_id': note['id'],
+        'keyword': keyword,
+        'crawled_at': int(updated_at * 1000),
+    }
+    for name in _TEXT_FIELDS:
+        row[name] = note.get(name) or None
+    for name in _COUNT_FIELDS:
+        row[name] = _count(note.get(name))
+    row['images'] = [str(image) for image in note.get('images') or []]
+    return row
+
+
+class PartitionWriter:
+    """一个日期分区本次运行的part文件，按批写入row group"""
+
+    def __init__(self, directory, schema, batch_size, compression):
+        import pyarrow.parquet as pq
+
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        self.path = os.path.join(directory, name)
+        self.temp_path = os.path.join(directory, f".{name}.tmp")
+        self.schema = schema
+        self.batch_size = batch_size
+        self.rows = 0
+        self._buffer = {field: [] for field in schema.names}
+        self._writer = pq.ParquetWriter(self.temp_path, schema, compression=compression)
+
+    def add(self, row):
+        for field, values in self._buffer.items():
+            values.append(row[field])
+        self.rows += 1
+        if len(self._buffer['note_id']) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+
+        if not self._buffer['note_id']:
+            return
+        self._writer.write_batch(pa.RecordBatch.from_pydict(self._buffer, schema=self.schema))
+        self._buffer = {field: [] for field in self.schema.names}
+
+    def commit(self):
+        """写完剩余的行并将临时文件改名为正式的part文件"""
+        self.flush()
+        self._writer.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """放弃本次写入，删除临时文件"""
+        try:
+            self._writer.close()
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+
+def load_state(output_dir):
+    """读取导出状态，没有导出过时返回None"""
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(output_dir, state):
+    """原子写入导出状态"""
+    path = os.path.join(output_dir, STATE_FILE)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def export_notes(output_dir, db_path=None, batch_size=None, compression=None, full=False):
+    """
+    导出笔记索引到Parquet数据集
+
+    参数:
+        output_dir (str): 数据集目录
+        db_path (str): 笔记索引数据库路径，默认使用配置文件设置
+        batch_size (int): 每个row group的行数，默认使用COLUMNAR_EXPORT_CONFIG['BATCH_SIZE']
+        compression (str): 压缩算法，默认使用COLUMNAR_EXPORT_CONFIG['COMPRESSION']
+        full (bool): 删除已有数据集后全量导出
+
+    返回:
+        dict: 本次导出的统计（笔记数、各分区行数、游标）
+
+    异常:
+        ValueError: 已有数据集的格式版本与当前版本不同
+        FileNotFoundError: 笔记索引数据库不存在
+    """
+    import pyarrow  # noqa: F401  未安装时尽早报错，不创建任何文件
+
+    db_path = db_path or FILE_PATHS['NOTE_INDEX_DB']
+    batch_size = batch_size or COLUMNAR_EXPORT_CONFIG['BATCH_SIZE']
+    compression = compression or COLUMNAR_EXPORT_CONFIG['COMPRESSION']
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"笔记索引数据库不存在: {db_path}")
+
+    notes_dir = os.path.join(output_dir, NOTES_DATASET)
+    if full:
+        if os.path.isdir(notes_dir):
+            shutil.rmtree(notes_dir)
+        if os.path.exists(os.path.join(output_dir, STATE_FILE)):
+            os.remove(os.path.join(output_dir, STATE_FILE))
+
+    state = load_state(output_dir)
+    if state and state.get('schema_version') != SCHEMA_VERSION:
+        raise ValueError(f"已有数据集的格式版本为 {state.get('schema_version')}，当前版本为 {SCHEMA_VERSION}，"
+                         f"请使用 --full 重新导出或指定新的输出目录")
+    cursor = state['cursor'] if state else None
+
+    schema = notes_schema()
+    index = NoteIndex(db_path=db_path)
+    writers = {}
+    exported = 0
+    try:
+        for cursor, keyword, updated_at, data in index.iter_notes(since=cursor):
+            crawl_date = time.strftime('%Y-%m-%d', time.localtime(updated_at))
+            writer = writers.get(crawl_date)
+            if writer is None:
+                writer = writers[crawl_date] = PartitionWriter(
+                    os.path.join(notes_dir, f"crawl_date={crawl_date}"), schema, batch_size, compression)
+            writer.add(note_row(keyword, updated_at, data))
+            exported += 1
+
+        for writer in writers.values():
+            writer.commit()
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    finally:
+        index.close()
+
+    if exported or state is None:
+        save_state(output_dir, {
+            'schema_version': SCHEMA_VERSION,
+            'cursor': cursor,
+            'notes': (state['notes'] if state else 0) + exported,
+            'exported_at': time.time(),
+        })
+
+    return {
+        'notes': exported,
+        'partitions': {date: writer.rows for date, writer in sorted(writers.items())},
+        'cursor': cursor,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='笔记列式导出（Parquet）')
+    parser.add_argument('--output', default=DIRECTORIES['EXPORTS_DIR'], help='数据集目录')
+    parser.add_argument('--db', help='笔记索引数据库路径')
+    parser.add_argument('--batch-size', type=int, help='每个row group的行数')
+    parser.add_argument('--compression', choices=['zstd', 'snappy', 'gzip', 'none'], help='压缩算法')
+    parser.add_argument('--full', action='store_true', help='删除已有数据集后全量导出')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        result = export_notes(args.output, db_path=args.db, batch_size=args.batch_size,
+                              compression=args.compression, full=args.full)
+    except ImportError:
+        print("列式导出需要pyarrow，请先安装: pip install pyarrow", file=sys.stderr)
+        return 1
+    except (ValueError, FileNotFoundError) as e:
+        print(f"导出失败: {str(e)}", file=sys.stderr)
+        return 1
+
+    print("=" * 60)
+    print(f"笔记列式导出（{os.path.join(args.output, NOTES_DATASET)}）")
+    print("=" * 60)
+    print(f"本次导出: {result['notes']} 条笔记")
+    for date, rows in result['partitions'].items():
+        print(f"  crawl_date={date}: {rows} 行")
+    if result['cursor']:
+        print(f"导出游标: {result['cursor']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,26 +2,218 @@
 # -*- coding: utf-8 -*-
 
 """
-小红书cookie设置工具
-使用此脚本可以直接设置cookie值，无需通过浏览器登录
+小红书cookie管理模块
+所有爬虫实例共用的cookie管理器，以及直接设置cookie值的命令行工具（无需通过浏览器登录）
+
+实现说明：
+1. 共用 - get_cookie_jar() 按文件路径返回同一个CookieJar，爬虫、登录用爬虫和HTTP抓取器都从它读取cookie
+2. 原子写入 - 先写入临时文件再改名，其他进程和监视线程不会读到写了一半的文件
+3. 监视 - 后台线程每WATCH_INTERVAL秒检查文件的修改时间和大小，其他进程（登录工具、本脚本）写入后重新加载
+4. 推送 - cookie变化时通知所有订阅者，爬虫据此更新HTTP会话并在下一次打开页面前写入浏览器，
+   不需要重启浏览器或重新预热
 """
 
 import os
 import json
 import sys
 import logging
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config.config import COOKIE_CONFIG, FILE_PATHS
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+_jars = {}
+_jars_lock = threading.Lock()
+
+
+def get_cookie_jar(path=None):
+    """
+    获取cookie文件对应的共用管理器（第一次获取时加载文件并启动监视线程）
+
+    参数:
+        path (str): cookie文件路径，默认使用配置文件设置
+
+    返回:
+        CookieJar: 同一文件总是返回同一个实例
+    """
+    path = os.path.abspath(path or FILE_PATHS['COOKIES_FILE'])
+    with _jars_lock:
+        jar = _jars.get(path)
+        if jar is None:
+            jar = _jars[path] = CookieJar(path)
+            if COOKIE_CONFIG['WATCH_ENABLED']:
+                jar.start_watching()
+        return jar
+
+
+def _file_signature(path):
+    """文件的修改时间和大小，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class CookieJar:
+    """cookie文件管理器"""
+
+    def __init__(self, path, config=None):
+        """
+        初始化管理器并加载cookie文件
+
+        参数:
+            path (str): cookie文件路径
+            config (dict): cookie配置，默认使用COOKIE_CONFIG
+        """
+        self.path = path
+        self.config = config or COOKIE_CONFIG
+        self._lock = threading.Lock()
+        self._cookies = []
+        self._signature = None
+        self._subscribers = []
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+        # 统计信息（reloads为检测到文件变化后重新加载的次数）
+        self.stats = {'saves': 0, 'reloads': 0, 'errors': 0}
+
+        self.reload(notify=False)
+
+    @property
+    def cookies(self):
+        """当前的cookie列表（副本）"""
+        with self._lock:
+            return list(self._cookies)
+
+    def subscribe(self, callback):
+        """
+        订阅cookie变化
+
+        参数:
+            callback (callable): 变化时以新的cookie列表调用，在保存或监视线程中执行，应尽快返回
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """取消订阅"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify(self, cookies):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(list(cookies))
+            except Exception as e:
+                logger.error(f"推送cookie失败: {str(e)}")
+
+    def save(self, cookies):
+        """
+        原子写入cookie文件并推送给所有订阅者
+
+        参数:
+            cookies (list): Selenium格式的cookie列表
+
+        异常:
+            OSError: 文件写入失败
+        """
+        cookies = list(cookies)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cookies, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                os.replace(temp_path, self.path)
+                self._cookies = cookies
+                self._signature = _file_signature(self.path)
+                self.stats['saves'] += 1
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        logger.info(f"成功保存 {len(cookies)} 个cookie到: {self.path}")
+        self._notify(cookies)
+
+    def reload(self, notify=True):
+        """
+        文件变化时重新加载
+
+        参数:
+            notify (bool): 加载到新cookie时是否推送给订阅者
+
+        返回:
+            bool: 加载到了新的cookie
+        """
+        signature = _file_signature(self.path)
+        with self._lock:
+            if signature == self._signature:
+                return False
+            # 无论能否解析都记下本次的文件状态，文件损坏时不在每次检查时重复报错
+            self._signature = signature
+
+        if signature is None:
+            logger.warning(f"Cookie文件不存在: {self.path}")
+            return False
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+            if not isinstance(cookies, list):
+                raise ValueError("cookie文件内容应为列表")
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"加载Cookie文件失败: {str(e)}")
+            return False
+
+        with self._lock:
+            changed = cookies != self._cookies
+            self._cookies = cookies
+            self.stats['reloads'] += 1
+        logger.info(f"成功加载Cookie文件: {self.path}, 包含 {len(cookies)} 个cookie")
+
+        if changed and notify:
+            self._notify(cookies)
+        return changed
+
+    def start_watching(self):
+        """启动监视线程"""
+        if self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name='cookie-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop_event.wait(self.config['WATCH_INTERVAL']):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"检查Cookie文件出错: {str(e)}")
+
+
 def main():
-    # 确保cache目录存在
-    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
-    os.makedirs(cache_dir, exist_ok=True)
+    # 配置日志
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     
-    # 默认cookie文件路径
-    cookies_file = os.path.join(cache_dir, 'xiaohongshu_cookies.json')
+    # 默认cookie文件路径（与服务使用同一个文件，服务运行中会自动加载新cookie）
+    cookies_file = FILE_PATHS['COOKIES_FILE']
     
     print("=" * 60)
     print("小红书Cookie设置工具")
@@ -59,8 +251,7 @@ def main():
     
     # 保存到文件
     try:
-        with open(cookies_file, 'w', encoding='utf-8') as f:
-            json.dump(cookies, f, ensure_ascii=False, indent=2)
+        CookieJar(cookies_file).save(cookies)
         print("=" * 60)
         print(f"成功保存 {len(cookies)} 个cookie到文件: {cookies_file}")
         print("=" * 60)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+日志配置模块
+统一配置根日志记录器，所有日志经过队列由后台线程写入控制台和文件
+
+实现说明：
+1. 非阻塞 - 根记录器只挂一个QueueHandler，请求线程只把日志放入队列，
+   格式化和文件写入由QueueListener线程完成
+2. 文件轮转 - 日志文件按LOGGING_CONFIG的MAX_FILE_SIZE和BACKUP_COUNT轮转
+3. 结构化 - 文件日志每行一个JSON对象，包含本次搜索的关联ID（search_id）
+4. 逐元素日志限流 - 带 extra=PER_ELEMENT 的日志，每次搜索的每个代码位置只输出前
+   PER_ELEMENT_BURST 条，之后每 PER_ELEMENT_SAMPLE 条输出一条，搜索结束时汇总省略数量
+"""
+
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import LOGGING_CONFIG
+
+# 逐元素日志标记，用法: logger.debug("...", extra=PER_ELEMENT)
+PER_ELEMENT = {'per_element': True}
+
+# 没有搜索上下文时的关联ID
+NO_SEARCH_ID = '-'
+
+_search_id = ContextVar('search_id', default=NO_SEARCH_ID)
+_listener = None
+_setup_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def current_search_id():
+    """获取当前线程（上下文）的搜索关联ID"""
+    return _search_id.get()
+
+
+class SearchContextFilter(logging.Filter):
+    """
+    在记录产生的线程中补充搜索关联ID，并对逐元素日志限流
+
+    挂在QueueHandler上，因此在请求线程中执行，能读到该线程的上下文变量。
+    """
+
+    def __init__(self, burst=None, sample=None):
+        super().__init__()
+        self.burst = burst if burst is not None else LOGGING_CONFIG['PER_ELEMENT_BURST']
+        self.sample = sample if sample is not None else LOGGING_CONFIG['PER_ELEMENT_SAMPLE']
+        self._counts = {}  # (search_id, 代码位置) -> 已产生的记录数
+        self._suppressed = {}  # search_id -> 省略的记录数
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        search_id = _search_id.get()
+        record.search_id = search_id
+        if not getattr(record, 'per_element', False):
+            return True
+
+        key = (search_id, record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+            if count <= self.burst or (self.sample and (count - self.burst) % self.sample == 0):
+                return True
+            self._suppressed[search_id] = self._suppressed.get(search_id, 0) + 1
+        return False
+
+    def drain(self, search_id):
+        """
+        清除一次搜索的计数
+
+        返回:
+            int: 该搜索省略的逐元素日志数
+        """
+        with self._lock:
+            for key in [key for key in self._counts if key[0] == search_id]:
+                del self._counts[key]
+            return self._suppressed.pop(search_id, 0)
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志格式化为一行JSON"""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'search_id': getattr(record, 'search_id', NO_SEARCH_ID),
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+_context_filter = SearchContextFilter()
+
+
+@contextmanager
+def search_context(label=None):
+    """
+    搜索日志上下文，上下文中产生的日志带有同一个关联ID
+
+    已在搜索上下文中时（如接口处理函数中调用爬虫）沿用外层的关联ID。
+
+    参数:
+        label (str): 写入开始日志的说明，如搜索关键词
+
+    返回:
+        str: 关联ID
+    """
+    outer = _search_id.get()
+    if outer != NO_SEARCH_ID:
+        yield outer
+        return
+
+    search_id = uuid.uuid4().hex[:12]
+    token = _search_id.set(search_id)
+    try:
+        if label:
+            logger.debug(f"搜索开始: {label}")
+        yield search_id
+    finally:
+        suppressed = _context_filter.drain(search_id)
+        if suppressed:
+            logger.info(f"本次搜索省略了 {suppressed} 条逐元素日志")
+        _search_id.reset(token)
+
+
+def setup_logging(log_file=None, console=True, level=None):
+    """
+    配置根日志记录器（重复调用时先停止之前的队列线程）
+
+    参数:
+        log_file (str): 日志文件路径，None表示不写文件
+        console (bool): 是否输出到控制台
+        level (str): 日志级别，默认使用LOGGING_CONFIG['LEVEL']
+    """
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+        handlers = []
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(LOGGING_CONFIG['FORMAT'], LOGGING_CONFIG['DATE_FORMAT']))
+            handlers.append(console_handler)
+        if log_file:
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=LOGGING_CONFIG['MAX_FILE_SIZE'],
+                backupCount=LOGGING_CONFIG['BACKUP_COUNT'],
+                encoding=LOGGING_CONFIG['ENCODING']
+            )
+            if LOGGING_CONFIG['JSON_FORMAT']:
+                file_handler.setFormatter(JsonFormatter())
+            else:
+                file_handler.setFormatter(logging.Formatter(LOGGING_CONFIG['FORMAT'], LOGGING_CONFIG['DATE_FORMAT']))
+            handlers.append(file_handler)
+
+        # 无界队列：有界队列写满时QueueHandler会报错而不是等待
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(_context_filter)
+
+        # 替换之前通过basicConfig等方式挂上的处理器，避免重复输出
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(getattr(logging, level or LOGGING_CONFIG['LEVEL']))
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging():
+    """停止队列线程，写完队列中剩余的日志"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行指标模块
+提供Prometheus文本格式的计数器、直方图和回调指标
+
+实现说明：
+1. 热路径无锁 - 每个线程写自己的计数分片，只有线程第一次写入时加锁登记分片
+2. 导出时汇总 - /metrics请求时合并所有分片
+3. 回收分片 - 登记新分片和导出时都把已退出线程的分片并入归档计数，
+   每个请求一个线程时分片数也不超过存活线程数
+"""
+
+import bisect
+import time
+import threading
+from contextlib import contextmanager
+
+# 默认耗时直方图分桶（秒），覆盖从毫秒级缓存命中到数十秒的浏览器抓取
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30, 60)
+
+
+def _format_value(value):
+    """格式化指标数值"""
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    """格式化标签，返回 {a="x",b="y"} 形式的字符串"""
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+class _ShardSet:
+    """按线程分片的计数数组"""
+
+    def __init__(self, size):
+        self._size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live = []
+        self._retired = [0] * size
+
+    def shard(self):
+        """获取当前线程的分片（只有所属线程会写入）"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * self._size
+            with self._lock:
+                self._retire_dead()
+                self._live.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    def _retire_dead(self):
+        """把已退出线程的分片并入归档计数（调用方需持有锁）"""
+        live = []
+        for thread, shard in self._live:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for i, value in enumerate(shard):
+                    self._retired[i] += value
+        self._live = live
+
+    def collect(self):
+        """汇总所有分片"""
+        with self._lock:
+            self._retire_dead()
+            total = list(self._retired)
+            for _, shard in self._live:
+                for i, value in enumerate(shard):
+                    total[i] += value
+        return total
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _ShardSet(1)
+
+    def inc(self, amount=1):
+        self._shards.shard()[0] += amount
+
+    def value(self):
+        return self._shards.collect()[0]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        # 布局: 各分桶计数（非累计）+ +Inf分桶计数 + 总和
+        self._shards = _ShardSet(len(buckets) + 2)
+
+    def observe(self, value):
+        shard = self._shards.shard()
+        shard[bisect.bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        """返回 (累计分桶计数列表, 总数, 总和)"""
+        data = self._shards.collect()
+        cumulative = []
+        running = 0
+        for count in data[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, data[-1]
+
+
+class _Metric:
+    """带标签的指标基类"""
+
+    type_name = ''
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *labelvalues):
+        """获取指定标签值的子指标"""
+        labelvalues = tuple(str(value) for value in labelvalues)
+        child = self._children.get(labelvalues)
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f"指标 {self.name} 需要标签: {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def render(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def render(self):
+        lines = self._header()
+        for labelvalues, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} "
+                         f"{_format_value(child.value())}")
+        return lines
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    @contextmanager
+    def time(self, *labelvalues):
+        """记录代码块耗时（秒）"""
+        child = self.labels(*labelvalues)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            child.observe(time.perf_counter() - start)
+
+    def render(self):
+        lines = self._header()
+        bounds = [_format_value(float(bound)) for bound in self.buckets] + ['+Inf']
+        for labelvalues, child in list(self._children.items()):
+            cumulative, count, total = child.snapshot()
+            for bound, value in zip(bounds, cumulative):
+                labels = _format_labels(self.labelnames, labelvalues, ('le', bound))
+                lines.append(f"{self.name}_bucket{labels} {value}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(float(total))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    导出时通过回调函数取值的指标
+    回调返回数值，或 {标签值元组: 数值} 字典；返回None时不导出
+    """
+
+    def __init__(self, name, documentation, callback, labelnames=(), type_name='gauge', registry=None):
+        self.callback = callback
+        self.type_name = type_name
+        super().__init__(name, documentation, labelnames, registry)
+
+    def render(self):
+        try:
+            values = self.callback()
+        except Exception:
+            values = None
+        if values is None:
+            return []
+
+        if not isinstance(values, dict):
+            values = {(): values}
+
+        lines = self._header()
+        for labelvalues, value in values.items():
+            if not isinstance(labelvalues, tuple):
+                labelvalues = (labelvalues,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已注册: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, name):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self):
+        """导出Prometheus文本格式（0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# 全局注册表
+REGISTRY = MetricsRegistry()
+
+# ==================== 搜索服务指标 ====================
+
+SEARCH_REQUEST_SECONDS = Histogram(
+    'xhs_search_request_seconds', '/api/search 请求总耗时（秒）', ['status'])
+
+SEARCH_PHASE_SECONDS = Histogram(
+    'xhs_search_phase_seconds', '搜索各阶段耗时（秒）', ['phase'])
+
+CACHE_REQUESTS = Counter(
+    'xhs_cache_requests_total', '各级缓存的命中和未命中次数', ['tier', 'result'])
+
+STRATEGY_RUNS = Counter(
+    'xhs_strategy_runs_total', '提取策略执行次数', ['strategy'])
+
+STRATEGY_NOTES = Counter(
+    'xhs_strategy_notes_total', '提取策略产出的笔记数（去重前）', ['strategy'])
+
+STRATEGY_SKIPS = Counter(
+    'xhs_strategy_skipped_total', '因已提取到足够笔记而跳过的策略次数', ['strategy'])
+
+EXTRACTED_NOTES = Counter(
+    'xhs_extracted_notes_total', '提取流程各阶段的笔记数', ['stage'])
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+搜索关键词规范化模块
+将写法不同但含义相同的关键词映射为同一个规范关键词，使它们共享缓存文件、结果页面、全文索引和热门关键词统计。
+规范关键词只用作这些键；实际抓取（搜索页URL、页面文本匹配）使用 clean_query 整理后的原关键词
+
+规范化步骤：
+1. NFKC - 全角字母数字、兼容字符统一为标准形式
+2. 忽略大小写 - casefold
+3. 繁体转简体 - 安装了opencc时使用其完整词表，否则使用内置常用字表
+4. 标点和空白 - 标点、符号和控制字符替换为空格（KEEP_SYMBOLS中的字符除外），连续空白合并；中文字符之间的空格去掉
+5. 同义词 - 按同义词表映射为规范关键词
+
+规范化后为空的关键词（如只有标点）保持原样，避免不同的无效关键词共用同一个缓存。
+"""
+
+import re
+import json
+import hashlib
+import logging
+import os
+import sys
+import unicodedata
+from functools import lru_cache
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import QUERY_NORMALIZATION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 中日韩统一表意文字（扩展A、基本区、兼容区）
+_CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_CJK_SPACE_PATTERN = re.compile(f'(?<=[{_CJK}]) +| +(?=[{_CJK}])')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# 内置繁简对照表（常用字），未安装opencc时使用
+_TRADITIONAL = (
+    '愛礙襖罷擺敗辦幫綁寶報貝備筆邊編變標錶別賓餅補參蠶倉層產長場廠車陳稱誠遲齒蟲處傳創詞聰從錯帶單擔黨導燈遞點電'
+    '釣調動東凍鬥獨讀對頓奪兒爾發範飛費豐鳳膚婦復該蓋幹趕剛鋼鎬個鞏溝夠購構顧關觀館廣歸貴國過還漢號劃畫話壞歡換'
+    '黃揮會彙夥貨機積極擊雞級記際繼價堅檢簡見將講獎膠澆腳餃階節潔結緊僅進盡驚鏡舊舉劇絕軍開課塊寬礦虧蘭藍籃覽'
+    '勞樂類裡禮麗歷連聯臉煉涼兩輛療遼獵鄰靈齡領樓錄陸驢亂輪論羅買賣麥滿貓貿麼門們夢綿緬麵廟滅鳴謀難鬧腦內擬鳥'
+    '紐濃農暖歐盤賠噴鵬騙評撲僕齊騎氣棄遷錢淺牆搶橋親輕傾慶窮區趨權勸確讓熱認榮軟銳灑傘掃殺紗曬閃傷賞燒設紳審'
+    '聲勝師詩濕時實識勢視試飾適壽書熟屬術樹帥雙誰稅順說絲鬆頌訴肅雖隨歲孫損縮鎖態攤壇談歎湯燙討題體條鐵廳聽'
+    '頭圖團腿襪彎灣萬網為圍偉衛溫聞穩問烏無霧係細蝦鮮閒顯險現線鄉響項銷蕭協寫謝鋅興選學尋訊壓鴨亞煙鹽嚴顏驗'
+    '陽養樣藥葉頁醫儀億憶藝義議陰銀飲應營影優憂郵遊魚漁語與預園員緣遠願約躍閱雲運雜載讚髒則擇澤責賊贈紮摘'
+    '張賬漲帳照這針診陣鎮爭證織職紙誌製質鐘種眾週豬燭囑築專轉裝壯狀準濁資綜總縱鑽組嘴鷗')
+_SIMPLIFIED = (
+    '爱碍袄罢摆败办帮绑宝报贝备笔边编变标表别宾饼补参蚕仓层产长场厂车陈称诚迟齿虫处传创词聪从错带单担党导灯递点电'
+    '钓调动东冻斗独读对顿夺儿尔发范飞费丰凤肤妇复该盖干赶刚钢镐个巩沟够购构顾关观馆广归贵国过还汉号划画话坏欢换'
+    '黄挥会汇伙货机积极击鸡级记际继价坚检简见将讲奖胶浇脚饺阶节洁结紧仅进尽惊镜旧举剧绝军开课块宽矿亏兰蓝篮览'
+    '劳乐类里礼丽历连联脸炼凉两辆疗辽猎邻灵龄领楼录陆驴乱轮论罗买卖麦满猫贸么门们梦绵缅面庙灭鸣谋难闹脑内拟鸟'
+    '纽浓农暖欧盘赔喷鹏骗评扑仆齐骑气弃迁钱浅墙抢桥亲轻倾庆穷区趋权劝确让热认荣软锐洒伞扫杀纱晒闪伤赏烧设绅审'
+    '声胜师诗湿时实识势视试饰适寿书熟属术树帅双谁税顺说丝松颂诉肃虽随岁孙损缩锁态摊坛谈叹汤烫讨题体条铁厅听'
+    '头图团腿袜弯湾万网为围伟卫温闻稳问乌无雾系细虾鲜闲显险现线乡响项销萧协写谢锌兴选学寻讯压鸭亚烟盐严颜验'
+    '阳养样药叶页医仪亿忆艺义议阴银饮应营影优忧邮游鱼渔语与预园员缘远愿约跃阅云运杂载赞脏则择泽责贼赠扎摘'
+    '张账涨帐照这针诊阵镇争证织职纸志制质钟种众周猪烛嘱筑专转装壮状准浊资综总纵钻组嘴鸥')
+_BUILTIN_T2S = str.maketrans(_TRADITIONAL, _SIMPLIFIED)
+
+
+def _load_converter():
+    """加载繁简转换函数，优先使用opencc"""
+    try:
+        import opencc
+        converter = opencc.OpenCC('t2s')
+        logger.debug("关键词繁简转换使用opencc")
+        return converter.convert
+    except ImportError:
+        return lambda text: text.translate(_BUILTIN_T2S)
+    except Exception as e:
+        logger.warning(f"初始化opencc失败，使用内置繁简对照表: {str(e)}")
+        return lambda text: text.translate(_BUILTIN_T2S)
+
+
+def _fold(text, to_simplified):
+    """执行同义词映射之前的规范化步骤"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    if to_simplified:
+        text = _t2s(text)
+
+    # 标点(P)、符号(S)、分隔符(Z)和控制字符(C)视为空白，有区分意义的符号保留
+    keep = QUERY_NORMALIZATION_CONFIG.get('KEEP_SYMBOLS', '')
+    text = ''.join(' ' if unicodedata.category(ch)[0] in 'PSZC' and ch not in keep else ch for ch in text)
+    text = _WHITESPACE_PATTERN.sub(' ', text).strip()
+    return _CJK_SPACE_PATTERN.sub('', text)
+
+
+def _load_aliases(config):
+    """加载同义词表（配置文件和可选的JSON文件），键和值都先规范化"""
+    aliases = dict(config.get('ALIASES') or {})
+
+    aliases_file = config.get('ALIASES_FILE')
+    if aliases_file and os.path.exists(aliases_file):
+        try:
+            with open(aliases_file, 'r', encoding='utf-8') as f:
+                aliases.update(json.load(f))
+            logger.info(f"已加载关键词同义词表: {aliases_file}")
+        except Exception as e:
+            logger.warning(f"加载关键词同义词表失败: {str(e)}")
+
+    to_simplified = config['TRADITIONAL_TO_SIMPLIFIED']
+    folded = {}
+    for alias, canonical in aliases.items():
+        alias_key = _fold(str(alias), to_simplified)
+        if alias_key:
+            folded[alias_key] = _fold(str(canonical), to_simplified) or alias_key
+    return folded
+
+
+_t2s = _load_converter()
+_aliases = _load_aliases(QUERY_NORMALIZATION_CONFIG)
+
+
+def clean_query(keyword):
+    """
+    整理用户输入的关键词，用于实际抓取
+
+    只做NFKC（全角转半角）和空白整理，保留大小写、繁简和标点符号，
+    使搜索页URL和页面文本匹配使用用户的原始写法
+
+    参数:
+        keyword (str): 用户输入的关键词
+
+    返回:
+        str: 整理后的关键词
+    """
+    return _WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFKC', keyword or '')).strip()
+
+
+@lru_cache(maxsize=4096)
+def normalize_query(keyword):
+    """
+    规范化搜索关键词
+
+    参数:
+        keyword (str): 用户输入的关键词
+
+    返回:
+        str: 规范关键词；未启用规范化或规范化后为空时返回去掉首尾空白的原关键词
+    """
+    keyword = (keyword or '').strip()
+    if not QUERY_NORMALIZATION_CONFIG['ENABLED']:
+        return keyword
+
+    folded = _fold(keyword, QUERY_NORMALIZATION_CONFIG['TRADITIONAL_TO_SIMPLIFIED'])
+    if not folded:
+        return keyword
+    return _aliases.get(folded, folded)
+
+
+def query_hash(keyword):
+    """
+    计算关键词的缓存键
+
+    参数:
+        keyword (str): 用户输入的关键词（内部先规范化）
+
+    返回:
+        str: 规范关键词的MD5十六进制摘要，用于缓存文件名和结果页面地址
+    """
+    return hashlib.md5(normalize_query(keyword).encode()).hexdigest()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+序列化模块
+缓存文件和接口响应的编码，按配置选择标准库json、orjson或msgpack，缓存文件可选zstd压缩
+
+实现说明：
+1. 文件头 - 缓存文件以6字节文件头开始：b'XHS'、格式版本、编码、压缩方式，读取时按文件头解码，
+   与配置无关，修改配置后旧文件仍可读取；没有文件头的文件按加入本模块之前的JSON缓存读取
+2. 可选依赖 - orjson、msgpack、zstandard在第一次使用时导入，配置的编码或压缩方式未安装时
+   记录一次警告并退回标准库json/不压缩
+3. JSON编码 - json和orjson写入的内容相同（UTF-8 JSON），读取JSON内容时总是优先使用orjson
+4. 原子写入 - 先写入临时文件再改名，其他线程不会读到写了一半的缓存
+"""
+
+import json
+import struct
+import logging
+import importlib
+import os
+import sys
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from config.config import SERIALIZATION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'XHS'
+# 文件头格式版本，文件头或编码方式不兼容地变化时递增
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('>3sBBB')  # 魔数、格式版本、编码、压缩方式
+
+CODEC_JSON = 1
+CODEC_MSGPACK = 2
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+
+_COMPRESSIONS = {None: COMPRESSION_NONE, 'none': COMPRESSION_NONE, 'zstd': COMPRESSION_ZSTD}
+
+Backend = namedtuple('Backend', ['name', 'codec', 'dumps', 'loads'])
+
+_warned = set()
+_warned_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _optional(module_name):
+    """导入可选依赖，未安装时返回None"""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+def _warn_once(message):
+    with _warned_lock:
+        if message in _warned:
+            return
+        _warned.add(message)
+    logger.warning(message)
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+@lru_cache(maxsize=None)
+def get_backend(name):
+    """
+    获取编码后端
+
+    参数:
+        name (str): json、orjson或msgpack
+
+    返回:
+        Backend: 后端，未安装时返回None
+
+    异常:
+        ValueError: 未知的后端名称
+    """
+    if name == 'json':
+        return Backend('json', CODEC_JSON, _stdlib_dumps, json.loads)
+    if name == 'orjson':
+        orjson = _optional('orjson')
+        if orjson is None:
+            return None
+        return Backend('orjson', CODEC_JSON,
+                       lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), orjson.loads)
+    if name == 'msgpack':
+        msgpack = _optional('msgpack')
+        if msgpack is None:
+            return None
+        return Backend('msgpack', CODEC_MSGPACK,
+                       lambda obj: msgpack.packb(obj, use_bin_type=True),
+                       lambda data: msgpack.unpackb(data, raw=False))
+    raise ValueError(f"未知的序列化后端: {name}")
+
+
+def _resolve_backend(name):
+    """获取配置的后端，未安装时退回标准库json"""
+    backend = get_backend(name)
+    if backend is None:
+        _warn_once(f"未安装{name}，缓存文件使用标准库json编码")
+        return get_backend('json')
+    return backend
+
+
+def zstd_available():
+    """是否安装了zstandard"""
+    return _optional('zstandard') is not None
+
+
+def _json_backend():
+    """读取JSON内容时使用的后端（优先orjson）"""
+    return get_backend('orjson') or get_backend('json')
+
+
+def json_dumps(obj):
+    """
+    编码JSON（安装了orjson时使用orjson），用于接口响应
+
+    返回:
+        bytes: UTF-8 JSON，中文不转义
+    """
+    return _json_backend().dumps(obj)
+
+
+def json_loads(data):
+    """解码JSON（安装了orjson时使用orjson）"""
+    return _json_backend().loads(data)
+
+
+def encode(obj, fmt=None, compression=None):
+    """
+    编码为带文件头的缓存内容
+
+    参数:
+        obj: 要编码的对象（dict、list、str、数字等）
+        fmt (str): 编码后端，默认使用SERIALIZATION_CONFIG['CACHE_FORMAT']
+        compression (str): 压缩方式（'none'或'zstd'），默认使用SERIALIZATION_CONFIG['CACHE_COMPRESSION']
+
+    返回:
+        bytes: 文件头 + 编码（及压缩）后的内容
+    """
+    backend = _resolve_backend(fmt or SERIALIZATION_CONFIG['CACHE_FORMAT'])
+    if compression is None:
+        compression = SERIALIZATION_CONFIG['CACHE_COMPRESSION']
+    compression_id = _COMPRESSIONS.get(compression)
+    if compression_id is None:
+        raise ValueError(f"未知的压缩方式: {compression}")
+
+    payload = backend.dumps(obj)
+    if compression_id == COMPRESSION_ZSTD:
+        zstandard = _optional('zstandard')
+        if zstandard is None:
+            _warn_once("未安装zstandard，缓存文件不压缩")
+            compression_id = COMPRESSION_NONE
+        else:
+            payload = zstandard.ZstdCompressor(level=SERIALIZATION_CONFIG['ZSTD_LEVEL']).compress(payload)
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, backend.codec, compression_id) + payload
+
+
+def decode(data):
+    """
+    解码缓存内容
+
+    参数:
+        data (bytes): 缓存文件内容
+
+    返回:
+        解码后的对象
+
+    异常:
+        ValueError: 文件头版本、编码或压缩方式不支持，或读取需要的依赖未安装
+    """
+    if not data.startswith(MAGIC):
+        # 没有文件头：加入序列化模块之前写入的JSON缓存
+        return json_loads(data)
+
+    _, version, codec, compression_id = _HEADER.unpack_from(data)
+    if version > FORMAT_VERSION:
+        raise ValueError(f"不支持的缓存格式版本: {version}")
+    payload = data[_HEADER.size:]
+
+    if compression_id == COMPRESSION_ZSTD:
+        zstandard = _optional('zstandard')
+        if zstandard is None:
+            raise ValueError("读取zstd压缩的缓存需要安装zstandard")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif compression_id != COMPRESSION_NONE:
+        raise ValueError(f"不支持的压缩方式: {compression_id}")
+
+    if codec == CODEC_JSON:
+        return json_loads(payload)
+    if codec == CODEC_MSGPACK:
+        backend = get_backend('msgpack')
+        if backend is None:
+            raise ValueError("读取msgpack编码的缓存需要安装msgpack")
+        return backend.loads(payload)
+    raise ValueError(f"不支持的缓存编码: {codec}")
+
+
+def write_file(path, obj):
+    """
+    编码并原子写入缓存文件
+
+    参数:
+        path (str): 文件路径
+        obj: 要写入的对象
+    """
+    data = encode(obj)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_file(path):
+    """
+    读取并解码缓存文件
+
+    参数:
+        path (str): 文件路径
+
+    返回:
+        解码后的对象
+
+    异常:
+        OSError: 文件读取失败
+        ValueError: 内容无法解码
+    """
+    with open(path, 'rb') as f:
+        return decode(f.read())
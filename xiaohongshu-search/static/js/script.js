@@ -199,6 +199,30 @@ document.addEventListener('DOMContentLoaded', function() {
      * @param {Object} note - 笔记数据
      */
     function openNoteDetail(note) {
+        renderNoteDetail(note);
+        
+        // 显示模态框
+        modal.style.display = 'block';
+        document.body.style.overflow = 'hidden';
+        
+        // 异步加载完整详情（通常命中后台预取的详情缓存）
+        if (note.id) {
+            modal.dataset.noteId = note.id;
+            getNoteDetail(note.id)
+                .then(detail => {
+                    if (detail && modal.style.display === 'block' && modal.dataset.noteId === note.id) {
+                        renderNoteDetail(Object.assign({}, note, detail));
+                    }
+                })
+                .catch(error => console.warn('加载笔记详情失败:', error));
+        }
+    }
+    
+    /**
+     * 渲染笔记详情模态框内容
+     * @param {Object} note - 笔记数据
+     */
+    function renderNoteDetail(note) {
         // 创建图片占位符URL
         const coverImageUrl = note.cover || generatePlaceholderImage(note.title || '小红书笔记');
         
@@ -238,10 +262,6 @@ document.addEventListener('DOMContentLoaded', function() {
                 <div class="modal-note-stat"><i class="fas fa-share"></i> ${formatNumber(note.shares)} 分享</div>
             </div>
         `;
-        
-        // 显示模态框
-        modal.style.display = 'block';
-        document.body.style.overflow = 'hidden';
     }
     
     /**